@@ -1,12 +1,19 @@
-from flask import Flask, render_template, redirect, url_for
+from flask import Flask, render_template, redirect, url_for, jsonify, request
 from config import Config
 from extensions import db, login_manager, socketio
 from models import init_db, User
+from sqlalchemy.orm import joinedload
 from blueprints.auth import auth_bp
 from blueprints.academic import academic_bp
 from blueprints.attendance import attendance_bp
 from blueprints.student import student_bp
 from blueprints.reporting import reporting_bp
+from utils.offload import init_offload, offload_metrics, OffloadRejected, OffloadTimeout
+from utils.tracing import init_tracing, span
+from utils.slow_queries import init_slow_query_log, slow_query_log
+from utils.admission import init_admission, admission_metrics, AdmissionRejected
+from utils.maintenance import init_maintenance, maintenance_status
+from utils.templating import init_templates, fragment_cache
 from flask_login import current_user, login_required
 import os
 
@@ -23,6 +30,12 @@ def create_app():
     login_manager.init_app(app)
     login_manager.login_view = 'auth.login'
     socketio.init_app(app)
+    init_offload(app)
+    init_admission(app)
+    init_tracing(app)
+    init_slow_query_log(app)
+    init_maintenance(app)
+    init_templates(app)
 
     # Tüm blueprintleri uygulamaya ekle
     app.register_blueprint(auth_bp)
@@ -36,7 +49,11 @@ def create_app():
         """
         Kullanıcı oturumu için kullanıcıyı ID ile getirir.
         """
-        return User.query.get(int(user_id))
+        # Yetki kontrollerinde kullanılan profil kayıtları her istekte aynı sorguda yüklenir
+        with span('auth.load_user'):
+            return User.query.options(
+                joinedload(User.academician_details), joinedload(User.student_details)
+            ).get(int(user_id))
 
     @app.route('/')
     def home():
@@ -51,6 +68,75 @@ def create_app():
                 return redirect(url_for('student.student_dashboard'))
         return render_template('home.html')
 
+    @app.errorhandler(OffloadRejected)
+    @app.errorhandler(OffloadTimeout)
+    def offload_unavailable(error):
+        """
+        Arka plan havuzu dolu veya zaman aşımında ise 503 döndürür.
+        """
+        return 'Sunucu şu anda yoğun, lütfen birkaç saniye sonra tekrar deneyin.', 503, {'Retry-After': '5'}
+
+    @app.errorhandler(AdmissionRejected)
+    def admission_rejected(error):
+        """
+        Kabul denetimi isteği almadığında veritabanına dokunmadan 503 döndürür.
+        """
+        message = 'Sunucu şu anda yoğun, lütfen birkaç saniye sonra tekrar deneyin.'
+        headers = {'Retry-After': str(error.retry_after)}
+        if request.is_json:
+            return jsonify({'status': 'error', 'message': message, 'retry_after': error.retry_after}), 503, headers
+        return message, 503, headers
+
+    @app.route('/metrics/offload')
+    @login_required
+    def offload_metrics_view():
+        """
+        Arka plan havuzlarının sayaçlarını JSON olarak döndürür (akademisyenler için).
+        """
+        if not current_user.is_academician():
+            return jsonify({'status': 'error', 'message': 'Yetkiniz yok'}), 403
+        return jsonify(offload_metrics())
+
+    @app.route('/metrics/admission')
+    @login_required
+    def admission_metrics_view():
+        """
+        Kabul denetimi sınıflarının kuyruk derinliğini ve reddetme sayaçlarını JSON olarak döndürür.
+        """
+        if not current_user.is_academician():
+            return jsonify({'status': 'error', 'message': 'Yetkiniz yok'}), 403
+        return jsonify(admission_metrics())
+
+    @app.route('/metrics/slow_queries')
+    @login_required
+    def slow_queries_view():
+        """
+        Yavaş sorgu parmak izlerini toplam süreye göre sıralı JSON olarak döndürür (akademisyenler için).
+        """
+        if not current_user.is_academician():
+            return jsonify({'status': 'error', 'message': 'Yetkiniz yok'}), 403
+        return jsonify({'threshold_ms': slow_query_log.threshold_ms, 'queries': slow_query_log.stats()})
+
+    @app.route('/metrics/maintenance')
+    @login_required
+    def maintenance_view():
+        """
+        Bakım işlerinin son çalışma sonuçlarını ve sonraki çalışma zamanlarını JSON olarak döndürür.
+        """
+        if not current_user.is_academician():
+            return jsonify({'status': 'error', 'message': 'Yetkiniz yok'}), 403
+        return jsonify(maintenance_status())
+
+    @app.route('/metrics/fragments')
+    @login_required
+    def fragment_cache_view():
+        """
+        Şablon parça önbelleğinin doluluk ve isabet sayaçlarını JSON olarak döndürür.
+        """
+        if not current_user.is_academician():
+            return jsonify({'status': 'error', 'message': 'Yetkiniz yok'}), 403
+        return jsonify(fragment_cache.metrics())
+
     @app.context_processor
     def inject_user_type():
         """
@@ -0,0 +1,28 @@
+# archive_terms.py
+#
+# Kapanmış dönemlerin yoklama kayıtlarını sıcak tablodan ARCHIVE_FOLDER altındaki
+# sütun tabanlı .npy dosyalarına taşır. Raporlar arşivi otomatik olarak okur.
+# Aktif oturumu olan dönemler arşivlenmez; önce oturumlar durdurulmalıdır.
+#
+# Kullanım:
+#     python archive_terms.py 2024 Güz
+#     python archive_terms.py 2024 Güz 2024 Bahar
+
+import sys
+from app import app
+from utils.archive import archive_term, ArchiveError
+
+if len(sys.argv) < 3 or len(sys.argv) % 2 != 1:
+    print("Kullanım: python archive_terms.py <DersYili> <DersDonemi> [<DersYili> <DersDonemi> ...]")
+    sys.exit(1)
+
+terms = list(zip(sys.argv[1::2], sys.argv[2::2]))
+
+with app.app_context():
+    for ders_yili, ders_donemi in terms:
+        try:
+            archived = archive_term(ders_yili, ders_donemi)
+        except ArchiveError as error:
+            print(error)
+            sys.exit(1)
+        print(f"{ders_yili} {ders_donemi}: {archived} yoklama kaydı arşivlendi.")
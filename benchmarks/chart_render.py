@@ -0,0 +1,75 @@
+"""
+Rapor grafikleri için SVG ve matplotlib çizicilerinin karşılaştırması.
+
+Haftalık çubuk grafiği, genel pasta grafiği ve ilk 20 öğrencilik devamsızlık grafiğini
+her iki yöntemle çizer; grafik başına süreyi, çıktı boyutunu ve ilk çağrıdaki
+içe aktarma (import) süresini yazdırır. Veritabanı ve işçi süreç kullanılmaz.
+
+Kullanım:
+    python benchmarks/chart_render.py --weeks 14 --students 60 --repeat 20
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def build_data(week_count, student_count):
+    """
+    Sahte haftalık sayılar ve devamsızlık listesi üretir.
+    """
+    rng = random.Random(42)
+    weekly_data = []
+    for week in range(1, week_count + 1):
+        present = rng.randint(student_count // 2, student_count)
+        weekly_data.append({'week': week, 'present': present, 'absent': student_count - present})
+    overall = {
+        'present': sum(w['present'] for w in weekly_data),
+        'absent': sum(w['absent'] for w in weekly_data)
+    }
+    absence = sorted((
+        {'student_no': f'{2000000 + i}', 'name': f'Ad{i} Soyad{i}', 'absence_percentage': rng.uniform(0, 60)}
+        for i in range(student_count)
+    ), key=lambda d: d['absence_percentage'], reverse=True)[:20]
+    return weekly_data, overall, absence
+
+
+def measure(name, func, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        output = func()
+    elapsed = (time.perf_counter() - started) / repeat
+    size = len(output.encode('utf-8')) if isinstance(output, str) else len(output.getvalue())
+    print(f"{name:<28} {elapsed * 1000:8.1f} ms {size / 1024:8.1f} KB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--weeks', type=int, default=14)
+    parser.add_argument('--students', type=int, default=60)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    weekly_data, overall, absence = build_data(args.weeks, args.students)
+
+    started = time.perf_counter()
+    from utils import svg_charts
+    print(f"svg içe aktarma: {(time.perf_counter() - started) * 1000:.1f} ms")
+    measure('svg haftalık', lambda: svg_charts.weekly_attendance_svg(weekly_data), args.repeat)
+    measure('svg pasta', lambda: svg_charts.overall_attendance_svg(overall['present'], overall['absent']), args.repeat)
+    measure('svg devamsızlık', lambda: svg_charts.absence_svg('Ders', absence, 30), args.repeat)
+
+    from utils import reporting
+    started = time.perf_counter()
+    reporting._pyplot()
+    print(f"matplotlib içe aktarma: {(time.perf_counter() - started) * 1000:.1f} ms")
+    measure('matplotlib haftalık', lambda: reporting.render_weekly_attendance_chart(weekly_data), args.repeat)
+    measure('matplotlib pasta', lambda: reporting.render_overall_attendance_pie(overall), args.repeat)
+    measure('matplotlib devamsızlık', lambda: reporting.render_absence_chart('Ders', absence, 30), args.repeat)
+
+
+if __name__ == '__main__':
+    main()
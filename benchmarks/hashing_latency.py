@@ -0,0 +1,74 @@
+"""
+Eşzamanlı girişlerin yoklama (check-in) gecikmesine etkisini ölçer.
+
+eventlet altında N eşzamanlı şifre doğrulaması çalışırken, her 10 ms'de bir
+uyanan hafif bir greenlet'in (check-in isteğinin yerine geçer) gecikmesini
+ölçer. Hash işlemi doğrudan ve ortak iş parçacığı havuzu (tpool) üzerinden çalıştırılarak karşılaştırılır.
+
+Kullanım:
+    python benchmarks/hashing_latency.py --logins 50 --method pbkdf2:sha256:600000
+"""
+import eventlet
+eventlet.monkey_patch()
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import generate_password_hash, check_password_hash
+from utils.offload import thread_pool
+
+TICK = 0.01
+
+
+def probe(stop, delays):
+    """
+    Hub'ın ne kadar geç uyandırdığını ölçen check-in benzeri greenlet.
+    """
+    while not stop.ready():
+        start = time.perf_counter()
+        eventlet.sleep(TICK)
+        delays.append((time.perf_counter() - start - TICK) * 1000)
+
+
+def run(mode, password_hash, logins):
+    check = (lambda: thread_pool.run(check_password_hash, password_hash, 'parola')) if mode == 'tpool' \
+        else (lambda: check_password_hash(password_hash, 'parola'))
+    delays = []
+    stop = eventlet.event.Event()
+    prober = eventlet.spawn(probe, stop, delays)
+    eventlet.sleep(TICK * 5)
+
+    pool = eventlet.GreenPool(logins)
+    start = time.perf_counter()
+    for _ in range(logins):
+        pool.spawn(check)
+    pool.waitall()
+    elapsed = time.perf_counter() - start
+    stop.send(True)
+    prober.wait()
+
+    delays.sort()
+    p99 = delays[int(len(delays) * 0.99) - 1] if delays else 0
+    print(f'{mode:<8} {logins / elapsed:8.1f} giriş/sn | check-in gecikmesi p50={statistics.median(delays):7.1f} ms '
+          f'p99={p99:7.1f} ms max={delays[-1]:7.1f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=50)
+    parser.add_argument('--method', default='pbkdf2:sha256:600000')
+    args = parser.parse_args()
+
+    password_hash = generate_password_hash('parola', method=args.method)
+    print(f'{args.logins} eşzamanlı giriş, yöntem {args.method}')
+    run('direct', password_hash, args.logins)
+    run('tpool', password_hash, args.logins)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Katılım ısı haritası için yük testi.
+
+Öğrenci x oturum katılım kümesinden (varsayılan 2.000 öğrenci x 42 oturum, haftada 3 oturum)
+matrisi oluşturur ve dört kipte (numara / devamsızlık sırası, oturum / hafta bazında) PNG üretir;
+her adımın süresini ve PNG boyutunu yazdırır. Veritabanı kullanılmaz.
+
+Kullanım:
+    python benchmarks/heatmap_render.py --students 2000 --sessions 42 --repeat 10
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.heatmap import presence_matrix, render_heatmap
+
+
+def build_data(student_count, session_count, sessions_per_week):
+    """
+    Sahte oturum ve öğrenci kimlikleri ile %80 katılımlı (OturumID, OgrenciID) kümesi üretir.
+    """
+    session_ids = list(range(1, session_count + 1))
+    weeks = [(i // sessions_per_week) + 1 for i in range(session_count)]
+    student_ids = list(range(1, student_count + 1))
+    rng = random.Random(42)
+    attended = {
+        (session_id, student_id)
+        for session_id in session_ids for student_id in student_ids if rng.random() < 0.8
+    }
+    return session_ids, weeks, student_ids, attended
+
+
+def timed(func, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return result, (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--sessions', type=int, default=42)
+    parser.add_argument('--sessions-per-week', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    session_ids, weeks, student_ids, attended = build_data(args.students, args.sessions, args.sessions_per_week)
+    print(f"{args.students} öğrenci x {args.sessions} oturum, {len(attended)} yoklama kaydı")
+
+    matrix, elapsed = timed(lambda: presence_matrix(session_ids, student_ids, attended), args.repeat)
+    print(f"{'matris':<28} {elapsed:8.1f} ms")
+    for group_by_week in (False, True):
+        for sort_by_absence in (False, True):
+            png, elapsed = timed(lambda: render_heatmap(matrix, weeks, group_by_week, sort_by_absence), args.repeat)
+            name = f"{'hafta' if group_by_week else 'oturum'} / {'devamsızlık' if sort_by_absence else 'numara'}"
+            print(f"{name:<28} {elapsed:8.1f} ms {len(png) / 1024:8.1f} KB")
+
+
+if __name__ == '__main__':
+    main()
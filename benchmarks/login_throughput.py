@@ -0,0 +1,109 @@
+"""
+Giriş (login) sorgusu için yük testi.
+
+Geçici bir SQLite veritabanına çok sayıda kullanıcı ekler, eski ilike sorgusu ile
+indeksli User.find_by_login sorgusunu karşılaştırır ve /login rotasının saniyedeki
+giriş sayısını ölçer.
+
+Kullanım:
+    python benchmarks/login_throughput.py --users 30000 --logins 500
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'login_bench.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from werkzeug.security import generate_password_hash
+from app import app
+from extensions import db
+from models import init_db, User, Student
+
+PASSWORD = 'bench-password'
+
+
+def seed_users(count):
+    """
+    Toplu ekleme ile öğrenci kullanıcıları oluşturur.
+    """
+    # Düşük maliyetli hash: burada ölçülen şey sorgu, hash değil
+    password_hash = generate_password_hash(PASSWORD, method='pbkdf2:sha256:1000')
+    users = [{
+        'id': i,
+        'Email': f'ogrenci{i}@ogr.bandirma.edu.tr',
+        'OgrenciNo': f'{2000000 + i}',
+        'SifreHash': password_hash,
+        'UserType': 'student',
+        'Isim': f'Ad{i}',
+        'Soyisim': f'Soyad{i}',
+        'is_active_user': True
+    } for i in range(1, count + 1)]
+    students = [{
+        'OgrenciID': i,
+        'UserID': i,
+        'OgrenciNo': f'{2000000 + i}',
+        'is_active_user': True
+    } for i in range(1, count + 1)]
+    db.session.execute(User.__table__.insert(), users)
+    db.session.execute(Student.__table__.insert(), students)
+    db.session.commit()
+
+
+def legacy_lookup(identifier):
+    return User.query.filter(
+        (User.Email.ilike(identifier)) | (User.OgrenciNo.ilike(identifier))
+    ).first()
+
+
+def time_lookups(label, lookup, identifiers):
+    start = time.perf_counter()
+    for identifier in identifiers:
+        assert lookup(identifier) is not None
+    elapsed = time.perf_counter() - start
+    print(f'{label:<28} {len(identifiers) / elapsed:10.0f} sorgu/sn  ({elapsed * 1000 / len(identifiers):.3f} ms/sorgu)')
+
+
+def explain(label, statement, params):
+    plan = db.session.execute(text(f'EXPLAIN QUERY PLAN {statement}'), params).fetchall()
+    print(f'{label}: ' + ' | '.join(row[-1] for row in plan))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=30000)
+    parser.add_argument('--lookups', type=int, default=2000)
+    parser.add_argument('--logins', type=int, default=300)
+    args = parser.parse_args()
+
+    init_db(app)
+    with app.app_context():
+        seed_users(args.users)
+        ids = [random.randint(1, args.users) for _ in range(args.lookups)]
+        identifiers = [f'OGRENCI{i}@ogr.bandirma.edu.tr' if i % 2 else f'{2000000 + i}' for i in ids]
+
+        print(f'{args.users} kullanıcı, {args.lookups} arama')
+        explain('ilike planı', 'SELECT id FROM "Kullanicilar" WHERE "Email" LIKE :v OR "OgrenciNo" LIKE :v', {'v': 'x'})
+        explain('e-posta planı', 'SELECT id FROM "Kullanicilar" WHERE lower("Email") = :v', {'v': 'x'})
+        explain('öğrenci no planı', 'SELECT id FROM "Kullanicilar" WHERE lower("OgrenciNo") = :v', {'v': 'x'})
+        time_lookups('ilike (eski)', legacy_lookup, identifiers)
+        time_lookups('find_by_login (indeksli)', User.find_by_login, identifiers)
+
+    client = app.test_client()
+    start = time.perf_counter()
+    for _ in range(args.logins):
+        i = random.randint(1, args.users)
+        response = client.post('/login', data={'email_or_no': f'{2000000 + i}', 'password': PASSWORD})
+        assert response.status_code == 302
+        client.get('/logout')
+    elapsed = time.perf_counter() - start
+    print(f'/login {args.logins / elapsed:10.1f} giriş/sn (şifre doğrulama dahil)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+SQLite'tan PostgreSQL'e taşıma (migrate_to_postgres.py) için yük testi.
+
+Geçici bir SQLite dosyasına --courses ders x --sessions oturum x --students öğrenci boyutunda,
+%80 katılımlı bir yoklama kümesi yazar (varsayılan yaklaşık 2 milyon YoklamaKayit satırı),
+ardından verilen boş PostgreSQL veritabanına taşır ve doğrular. Tablo başına süreyi,
+satır/sn hızını ve sürecin en yüksek bellek kullanımını yazdırır.
+
+Kullanım:
+    createdb yoklama_bench
+    python benchmarks/pg_migration.py --database-url postgresql://localhost/yoklama_bench
+    python benchmarks/pg_migration.py --database-url postgresql://localhost/yoklama_bench --students 6000
+"""
+import argparse
+import os
+import random
+import resource
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from extensions import db
+import models  # noqa: F401  tabloları db.metadata'ya kaydeder
+from utils.migration import migrate
+
+
+def seed(path, course_count, session_count, student_count):
+    """
+    Tabloları oluşturur ve yoklama kümesini doğrudan sqlite3 ile toplu ekler.
+    """
+    engine = create_engine(f'sqlite:///{path}')
+    db.metadata.create_all(engine)
+    engine.dispose()
+
+    rng = random.Random(42)
+    start = datetime(2025, 9, 15, 9, 0)
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.execute("INSERT INTO Kullanicilar (id, Email, SifreHash, UserType, Isim, Soyisim, is_active_user) "
+                           "VALUES (1, 'hoca@bandirma.edu.tr', 'x', 'academician', 'Ad', 'Soyad', 1)")
+        connection.execute('INSERT INTO Akademisyenler (AkademisyenID, UserID) VALUES (1, 1)')
+        connection.executemany(
+            "INSERT INTO Kullanicilar (id, OgrenciNo, SifreHash, UserType, Isim, Soyisim, is_active_user) "
+            "VALUES (?, ?, 'x', 'student', 'Öğrenci', ?, 1)",
+            ((i + 1, f'2025{i:05d}', f'No\t{i}') for i in range(1, student_count + 1)))
+        connection.executemany(
+            'INSERT INTO Ogrenciler (OgrenciID, UserID, OgrenciNo, is_active_user) VALUES (?, ?, ?, 1)',
+            ((i, i + 1, f'2025{i:05d}') for i in range(1, student_count + 1)))
+        connection.executemany(
+            "INSERT INTO Dersler (DersID, DersKodu, DersAdi, DersYili, DersDonemi, DevamZorunluluguVarMi, AkademisyenID) "
+            "VALUES (?, ?, ?, '2025', 'Güz', 1, 1)",
+            ((c, f'BM{c:03d}', f'Ders {c}') for c in range(1, course_count + 1)))
+        connection.executemany(
+            'INSERT INTO DersOgrenciler (id, DersID, OgrenciID, KayitTarihi) VALUES (?, ?, ?, ?)',
+            ((c * student_count + s, c, s, str(start)) for c in range(1, course_count + 1)
+             for s in range(1, student_count + 1)))
+        sessions = [(c * session_count + n, c, n + 1, start + timedelta(days=7 * n, hours=c % 8))
+                    for c in range(1, course_count + 1) for n in range(session_count)]
+        connection.executemany(
+            'INSERT INTO DersOturumlari (OturumID, DersID, OturumNumarasi, OturumSiraNumarasi, BaslangicZamani, '
+            'BitisZamani, AktifMi, QR_CODE_VERSION) VALUES (?, ?, ?, 1, ?, ?, 0, 1)',
+            ((sid, c, n, str(at), str(at + timedelta(hours=2))) for sid, c, n, at in sessions))
+        connection.executemany(
+            'INSERT INTO YoklamaKayitlari (OturumID, OgrenciID, KayitZamani) VALUES (?, ?, ?)',
+            ((sid, s, str(at + timedelta(seconds=rng.randrange(7200), microseconds=rng.randrange(10 ** 6))))
+             for sid, _, _, at in sessions for s in range(1, student_count + 1) if rng.random() < 0.8))
+    count = connection.execute('SELECT COUNT(*) FROM YoklamaKayitlari').fetchone()[0]
+    connection.close()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', required=True, help='boş PostgreSQL veritabanı')
+    parser.add_argument('--courses', type=int, default=20)
+    parser.add_argument('--sessions', type=int, default=42, help='ders başına oturum')
+    parser.add_argument('--students', type=int, default=3000, help='ders başına öğrenci')
+    parser.add_argument('--batch-size', type=int, default=50000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'pg_migration.db')
+    started = time.perf_counter()
+    count = seed(path, args.courses, args.sessions, args.students)
+    print(f'{count} yoklama kaydı {time.perf_counter() - started:.1f} sn içinde yazıldı '
+          f'({os.path.getsize(path) / 1048576:.0f} MB)')
+
+    source = create_engine(f'sqlite:///{path}')
+    target = create_engine(args.database_url)
+    started = time.perf_counter()
+    results = migrate(source, target, args.batch_size, truncate=True)
+    elapsed = time.perf_counter() - started
+    rows = sum(row_count for _, row_count, _, _ in results)
+    print(f"{'toplam (doğrulama dahil)':<24} {rows:>10} satır  {elapsed:7.1f} sn  {rows / elapsed:>9.0f} satır/sn")
+    print(f'en yüksek bellek: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB')
+    target.dispose()
+    os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
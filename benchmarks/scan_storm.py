@@ -0,0 +1,410 @@
+"""
+Amfide aynı anda QR okutma ("scan storm") için uçtan uca yük testi.
+
+Geçici bir veritabanına bir ders, N öğrenci ve rapor çeken akademisyenler ekler, uygulamayı
+Procfile'daki gibi gunicorn + eventlet (tek işçi) ile yerel olarak başlatır ve:
+  - akademisyen view_qr sayfasını açar; --displays kadar ekran yeni QR'ları Socket.IO ile alır
+    (QR_REFRESH_INTERVAL penceresi başına bir QR) ve canlı panel Socket.IO üzerinden dinlenir,
+  - tüm öğrenciler --window saniyelik pencere içinde rastgele anlarda /qr_scan/batch ile okutur,
+  - aynı sırada diğer akademisyenler kendi derslerinin raporlarını çeker.
+Sonunda yoklama isteklerinin p50/p95/p99 süresini, okutmadan panele bildirim gelene kadar
+geçen süreyi, kaybolan bildirimleri ve her istek türünün hata oranını yazdırır.
+
+Öğrencinin okuttuğu jeton, ekrandaki QR'ın içeriğidir; test istemcisi bunu görüntüyü çözmek
+yerine her QR gönderiminden sonra veritabanından (DersOturumlari.QRCodeData) okur.
+
+Ek paketler: requests, websocket-client ve eventlet işçisini içeren bir gunicorn sürümü
+(gunicorn 23 ve sonrasında eventlet işçisi yoktur).
+
+Kullanım:
+    python benchmarks/scan_storm.py --students 300 --window 20 --report-users 5
+    python benchmarks/scan_storm.py --database-url postgresql://localhost/yoklama_bench
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMP_DIR = tempfile.mkdtemp()
+# Düşük maliyetli hash: sunucu da aynı yöntemi kullandığından girişte yeniden hash'lenmez
+HASH_METHOD = 'pbkdf2:sha256:1000'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=300)
+    parser.add_argument('--window', type=float, default=20, help='okutmaların yayıldığı süre (sn)')
+    parser.add_argument('--report-users', type=int, default=5, help='rapor çeken akademisyen sayısı')
+    parser.add_argument('--report-interval', type=float, default=1, help='rapor istekleri arası bekleme (sn)')
+    parser.add_argument('--history-weeks', type=int, default=10, help='rapor derslerindeki geçmiş hafta sayısı')
+    parser.add_argument('--displays', type=int, default=1, help='aynı oturumun QR\'ını gösteren ekran sayısı')
+    parser.add_argument('--login-concurrency', type=int, default=32)
+    parser.add_argument('--drain', type=float, default=5, help='son okutmadan sonra bildirim bekleme süresi (sn)')
+    parser.add_argument('--database-url', help='boş bir veritabanı (varsayılan: geçici SQLite)')
+    parser.add_argument('--worker-class', default='eventlet')
+    return parser.parse_args()
+
+
+ARGS = parse_args()
+DATABASE_URL = ARGS.database_url or f"sqlite:///{os.path.join(TEMP_DIR, 'scan_storm.db')}"
+os.environ['DATABASE_URL'] = DATABASE_URL
+os.environ['PASSWORD_HASH_METHOD'] = HASH_METHOD
+sys.path.insert(0, ROOT)
+
+import requests
+import socketio
+from werkzeug.security import generate_password_hash
+from app import app
+from extensions import db
+from models import init_db, User, Akademisyen, Student, Ders, CourseStudent, DersOturum, YoklamaKayit
+
+PASSWORD = 'bench-password'
+MAX_SCAN_ATTEMPTS = 5
+INSTRUCTOR_EMAIL = 'hoca0@bandirma.edu.tr'
+
+
+def seed(student_count, report_users, history_weeks):
+    """
+    Toplu ekleme ile öğrencileri, akademisyenleri ve dersleri oluşturur.
+    Ders 1 yoklamanın alınacağı derstir; diğer dersler geçmiş yoklamalarla rapor için doldurulur.
+    Öğrencinin OgrenciID değeri i, öğrenci numarası 2000000 + i'dir.
+    """
+    password_hash = generate_password_hash(PASSWORD, method=HASH_METHOD)
+    now = datetime.utcnow()
+    users, academicians, courses = [], [], []
+    for i in range(report_users + 1):
+        # Toplu eklemede sütunlar ilk satırdan alındığından tüm satırlar aynı anahtarları taşır
+        users.append({'id': i + 1, 'Email': f'hoca{i}@bandirma.edu.tr', 'OgrenciNo': None, 'SifreHash': password_hash,
+                      'UserType': 'academician', 'Isim': f'Hoca{i}', 'Soyisim': 'Test', 'is_active_user': True})
+        academicians.append({'AkademisyenID': i + 1, 'UserID': i + 1})
+        courses.append({'DersID': i + 1, 'DersKodu': f'BM{100 + i}', 'DersAdi': f'Ders {i}', 'DersYili': '2025',
+                        'DersDonemi': 'Güz', 'AkademisyenID': i + 1})
+
+    first_student_user = report_users + 2
+    users += [{
+        'id': first_student_user + i - 1,
+        'Email': f'ogrenci{i}@ogr.bandirma.edu.tr',
+        'OgrenciNo': f'{2000000 + i}',
+        'SifreHash': password_hash,
+        'UserType': 'student',
+        'Isim': f'Ad{i}',
+        'Soyisim': f'Soyad{i}',
+        'is_active_user': True
+    } for i in range(1, student_count + 1)]
+    students = [{'OgrenciID': i, 'UserID': first_student_user + i - 1, 'OgrenciNo': f'{2000000 + i}',
+                 'is_active_user': True} for i in range(1, student_count + 1)]
+    enrollments = [{'DersID': course['DersID'], 'OgrenciID': i, 'KayitTarihi': now}
+                   for course in courses for i in range(1, student_count + 1)]
+
+    sessions, records = [], []
+    rng = random.Random(42)
+    session_id = 0
+    for course in courses[1:]:
+        for week in range(1, history_weeks + 1):
+            session_id += 1
+            started = now - timedelta(weeks=history_weeks - week + 1)
+            sessions.append({'OturumID': session_id, 'DersID': course['DersID'], 'OturumNumarasi': week,
+                             'OturumSiraNumarasi': 1, 'BaslangicZamani': started,
+                             'BitisZamani': started + timedelta(hours=1), 'AktifMi': False, 'QR_CODE_VERSION': 1})
+            records += [{'OturumID': session_id, 'OgrenciID': i, 'KayitZamani': started}
+                        for i in range(1, student_count + 1) if rng.random() < 0.8]
+
+    for model, rows in ((User, users), (Akademisyen, academicians), (Ders, courses), (Student, students),
+                        (CourseStudent, enrollments), (DersOturum, sessions), (YoklamaKayit, records)):
+        if rows:
+            db.session.execute(model.__table__.insert(), rows)
+    db.session.commit()
+    return [course['DersID'] for course in courses[1:]]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port, worker_class):
+    """
+    Uygulamayı Procfile'daki komutla başlatır ve /login yanıt verene kadar bekler.
+    """
+    log = open(os.path.join(TEMP_DIR, 'gunicorn.log'), 'w+')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--worker-class', worker_class, '-w', '1',
+         '--bind', f'127.0.0.1:{port}', 'app:app'],
+        cwd=ROOT, env=os.environ.copy(), stdout=log, stderr=subprocess.STDOUT
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            break
+        try:
+            requests.get(f'http://127.0.0.1:{port}/login', timeout=5)
+            return process, log
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    log.seek(0)
+    sys.exit('Sunucu başlatılamadı:\n' + log.read()[-2000:])
+
+
+class Recorder:
+    """
+    İstek türüne göre süreleri ve sonuçları iş parçacığı güvenli şekilde toplar.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.outcomes = {}
+
+    def add(self, kind, latency, outcome):
+        with self.lock:
+            self.latencies.setdefault(kind, []).append(latency)
+            self.outcomes.setdefault(kind, Counter())[outcome] += 1
+
+    def timed_get(self, kind, http, url, ok=(200,)):
+        started = time.monotonic()
+        try:
+            response = http.get(url, timeout=30, allow_redirects=False)
+            outcome = 'ok' if response.status_code in ok else f'http {response.status_code}'
+        except requests.RequestException as error:
+            response, outcome = None, type(error).__name__
+        self.add(kind, time.monotonic() - started, outcome)
+        return response
+
+
+def login(base_url, identifier):
+    http = requests.Session()
+    started = time.monotonic()
+    response = http.post(f'{base_url}/login', data={'email_or_no': identifier, 'password': PASSWORD},
+                         allow_redirects=False, timeout=30)
+    # Başarısız girişte form yeniden gösterilir (200), başarılıda yönlendirilir
+    if response.status_code != 302:
+        raise RuntimeError(f'{identifier} giriş yapamadı ({response.status_code})')
+    return http, time.monotonic() - started
+
+
+def current_token(session_id):
+    """
+    Ekrandaki QR'ın içindeki imzalı jetonu veritabanından okur.
+    """
+    with app.app_context():
+        data = db.session.query(DersOturum.QRCodeData).filter_by(OturumID=session_id).scalar()
+        db.session.remove()
+    return json.loads(data)['token']
+
+
+def connect_socket(base_url, http, event, data, handlers):
+    """
+    Akademisyenin oturum çereziyle Socket.IO bağlantısı açar ve verilen olayla odaya katılır.
+    """
+    client = socketio.Client(reconnection=False)
+    for name, handler in handlers.items():
+        client.on(name, handler)
+    cookie = '; '.join(f'{name}={value}' for name, value in http.cookies.items())
+    client.connect(base_url, headers={'Cookie': cookie}, transports=['websocket'])
+    ack = client.call(event, data, timeout=10)
+    if not ack or ack.get('status') != 'success':
+        raise RuntimeError(f'{event} başarısız: {ack}')
+    return client
+
+
+class Panel:
+    """
+    Akademisyenin canlı yoklama paneli: oturum odasına katılır ve her öğrencinin bildirim zamanını tutar.
+    """
+
+    def __init__(self, base_url, http, session_id):
+        self.arrivals = {}
+        self.client = connect_socket(base_url, http, 'join', {'room': f'session_{session_id}'},
+                                     {'attendance_delta': self.on_delta})
+
+    def on_delta(self, delta):
+        arrived = time.monotonic()
+        for student in delta['joined']:
+            self.arrivals.setdefault(student['student_id'], arrived)
+
+
+class Display:
+    """
+    view_qr ekranı: QR odasına katılır ve gelen her QR'ın varış zamanını ve sürümünü tutar.
+    İlk ekran her yeni QR'dan sonra öğrencilerin okuttuğu jetonu günceller.
+    """
+
+    def __init__(self, base_url, http, session_id, state=None):
+        self.updates = []
+        self.session_id = session_id
+        self.state = state
+        self.client = connect_socket(base_url, http, 'watch_qr', {'session_id': session_id},
+                                     {'qr_update': self.on_qr})
+
+    def on_qr(self, data):
+        self.updates.append((time.monotonic(), data['version']))
+        if self.state is not None:
+            self.state['token'] = current_token(self.session_id)
+
+
+def report_loop(base_url, http, course_id, stop, recorder, interval):
+    paths = [f'/reports/{course_id}', f'/attendance_report/{course_id}', f'/reports/{course_id}/weekly_chart']
+    while not stop.is_set():
+        for path in paths:
+            recorder.timed_get('rapor', http, base_url + path)
+        stop.wait(interval)
+
+
+def scan(base_url, http, student_id, at, state, recorder, scans):
+    """
+    Öğrenci telefonunun okutma isteği; at anına kadar bekler, ekrandaki jetonla okutur.
+    Sunucu 503 dönerse okutma sayfası gibi Retry-After (rastgele sapmalı) kadar bekleyip tekrar gönderir;
+    süre ilk denemeden son yanıta kadar ölçülür.
+    """
+    time.sleep(max(0, at - time.monotonic()))
+    started = time.monotonic()
+    payload = {'scans': [{'token': state['token'], 'scanned_at': int(time.time() * 1000)}]}
+    for attempt in range(MAX_SCAN_ATTEMPTS):
+        # Girişten sonra boşta kalan bağlantıyı sunucu kapatmış olabilir (keep-alive); telefon gibi
+        # her okutmada yeni bağlantı açılır, yoksa ölçüm istemci tarafındaki yarışı da sayar
+        http.close()
+        try:
+            response = http.post(f'{base_url}/qr_scan/batch', json=payload, timeout=30)
+            if response.status_code == 200:
+                outcome = response.json()['results'][0]['status']
+            else:
+                outcome = f'http {response.status_code}'
+        except (requests.RequestException, ValueError) as error:
+            response, outcome = None, type(error).__name__
+        if response is None or response.status_code != 503:
+            break
+        recorder.add('503 yeniden deneme', 0, 'ok')
+        retry_after = int(response.headers.get('Retry-After', 5))
+        time.sleep(retry_after + random.random() * retry_after)
+    recorder.add('yoklama', time.monotonic() - started, outcome)
+    scans[student_id] = (started, outcome)
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def summary(label, values, outcomes=None):
+    line = f'{label:<22} {len(values):6d}'
+    if values:
+        line += '  ' + '  '.join(f'p{p}={percentile(values, p) * 1000:7.1f} ms' for p in (50, 95, 99))
+        line += f'  max={max(values) * 1000:7.1f} ms'
+    if outcomes is not None:
+        errors = sum(count for outcome, count in outcomes.items() if outcome not in ('ok', 'recorded'))
+        line += f'  hata=%{100 * errors / max(1, sum(outcomes.values())):.1f}'
+        other = {outcome: count for outcome, count in outcomes.items() if outcome not in ('ok', 'recorded')}
+        if other:
+            line += f'  {dict(other)}'
+    print(line)
+
+
+def main():
+    init_db(app)
+    with app.app_context():
+        report_courses = seed(ARGS.students, ARGS.report_users, ARGS.history_weeks)
+        db.session.remove()
+    print(f'{ARGS.students} öğrenci, {ARGS.report_users} rapor kullanıcısı, {ARGS.window:.0f} sn pencere')
+
+    port = free_port()
+    server, log = start_server(port, ARGS.worker_class)
+    base_url = f'http://127.0.0.1:{port}'
+    recorder = Recorder()
+    stop = threading.Event()
+    threads = []
+    try:
+        instructor, _ = login(base_url, INSTRUCTOR_EMAIL)
+        response = instructor.post(f'{base_url}/start_attendance/1',
+                                   data={'week_number': '1', 'action_type': 'new_week'}, allow_redirects=False)
+        with app.app_context():
+            session_id = db.session.query(DersOturum.OturumID).filter_by(DersID=1, AktifMi=True).scalar()
+            db.session.remove()
+        if session_id is None:
+            sys.exit(f'Yoklama oturumu başlatılamadı ({response.status_code})')
+        recorder.timed_get('view_qr', instructor, f'{base_url}/generate_qr/{session_id}')
+        state = {'token': current_token(session_id)}
+        panel = Panel(base_url, instructor, session_id)
+        displays = [Display(base_url, instructor, session_id, state if index == 0 else None)
+                    for index in range(ARGS.displays)]
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(ARGS.login_concurrency) as pool:
+            logins = list(pool.map(lambda i: login(base_url, f'{2000000 + i}'), range(1, ARGS.students + 1)))
+        login_elapsed = time.monotonic() - started
+        summary('giriş', [latency for _, latency in logins])
+        print(f'{"":<22} {ARGS.students / login_elapsed:6.1f} giriş/sn')
+
+        for index, course_id in enumerate(report_courses):
+            reporter, _ = login(base_url, f'hoca{index + 1}@bandirma.edu.tr')
+            threads.append(threading.Thread(target=report_loop, daemon=True, args=(
+                base_url, reporter, course_id, stop, recorder, ARGS.report_interval)))
+        for thread in threads:
+            thread.start()
+
+        # Her öğrenci kendi iş parçacığında, pencere içinde rastgele bir anda okutur
+        scans = {}
+        storm_start = time.monotonic() + 1
+        rng = random.Random(7)
+        scanners = [threading.Thread(target=scan, args=(
+            base_url, http, student_id, storm_start + rng.uniform(0, ARGS.window), state, recorder, scans))
+            for student_id, (http, _) in enumerate(logins, 1)]
+        for scanner in scanners:
+            scanner.start()
+        for scanner in scanners:
+            scanner.join()
+        storm_elapsed = time.monotonic() - storm_start
+        time.sleep(ARGS.drain)
+        stop.set()
+        for thread in threads:
+            thread.join(timeout=30)
+        panel.client.disconnect()
+        for display in displays:
+            display.client.disconnect()
+        admission = instructor.get(f'{base_url}/metrics/admission', timeout=30).json()
+    finally:
+        stop.set()
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        log.close()
+
+    recorded = [student_id for student_id, (_, outcome) in scans.items() if outcome == 'recorded']
+    delays = [panel.arrivals[student_id] - scans[student_id][0] for student_id in recorded
+              if student_id in panel.arrivals]
+    print(f'{"":<22} {len(recorded) / storm_elapsed:6.1f} yoklama/sn ({storm_elapsed:.1f} sn)')
+    summary('yoklama', recorder.latencies.get('yoklama', []), recorder.outcomes.get('yoklama', Counter()))
+    summary('okutma -> panel', delays)
+    print(f'{"":<22} kayıp bildirim: {len(recorded) - len(delays)}')
+    print(f'{"":<22} 503 sonrası yeniden deneme: {len(recorder.latencies.get("503 yeniden deneme", []))}')
+    # Ekranlar arası paylaşım: her pencerede tek QR üretildiyse farklı sürüm sayısı ekran sayısına bağlı değildir
+    gaps = [later - earlier for display in displays
+            for (earlier, _), (later, _) in zip(display.updates, display.updates[1:])]
+    summary('qr gönderim aralığı', gaps)
+    versions = {version for display in displays for _, version in display.updates}
+    print(f'{"":<22} {len(displays)} ekran, {sum(len(display.updates) for display in displays)} gönderim, '
+          f'{len(versions)} farklı QR')
+    for kind in ('view_qr', 'rapor'):
+        summary(kind, recorder.latencies.get(kind, []), recorder.outcomes.get(kind, Counter()))
+    for name in ('checkin', 'report'):
+        metrics = admission[name]
+        print(f"kabul denetimi {name:<7} alınan={metrics['admitted']} kuyruğa={metrics['queued']} "
+              f"en çok kuyruk={metrics['max_waiting']} reddedilen={metrics['rejected']} "
+              f"zaman aşımı={metrics['timed_out']} en uzun bekleme={metrics['max_wait_seconds'] * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
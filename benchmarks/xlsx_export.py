@@ -0,0 +1,98 @@
+"""
+Yoklama raporu dışa aktarma için yük testi.
+
+Öğrenci x oturum yoklama tablosunu (varsayılan 1.000 öğrenci x 28 oturum) CSV,
+openpyxl yalnızca yazma (write-only) kipi ve openpyxl normal kipi ile yazar;
+saniyedeki satır sayısını ve en yüksek bellek kullanımını karşılaştırır.
+Veritabanı kullanılmaz, satırlar uygulamadaki attendance_matrix_rows ile üretilir.
+
+Kullanım:
+    python benchmarks/xlsx_export.py --students 1000 --sessions 28
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openpyxl import Workbook
+from utils.export import attendance_matrix_rows, csv_file, write_xlsx
+
+
+def build_data(student_count, session_count):
+    """
+    Rapor satırları için sahte oturum, öğrenci ve yoklama verisi üretir (%80 katılım).
+    """
+    sessions = [
+        SimpleNamespace(OturumID=i, OturumNumarasi=(i - 1) // 2 + 1, OturumSiraNumarasi=(i - 1) % 2 + 1)
+        for i in range(1, session_count + 1)
+    ]
+    students = [
+        SimpleNamespace(OgrenciID=i, OgrenciNo=f'{2000000 + i}', user=SimpleNamespace(Isim=f'Ad{i}', Soyisim=f'Soyad{i}'))
+        for i in range(1, student_count + 1)
+    ]
+    rng = random.Random(42)
+    attended = {
+        (session.OturumID, student.OgrenciID)
+        for session in sessions for student in students if rng.random() < 0.8
+    }
+    return sessions, students, attended
+
+
+def write_csv(rows, path):
+    with open(path, 'wb') as f:
+        f.write(csv_file(rows).getvalue())
+
+
+def write_xlsx_write_only(rows, path):
+    with open(path, 'wb') as f:
+        write_xlsx(rows, f, 'Yoklama')
+
+
+def write_xlsx_normal(rows, path):
+    # Karşılaştırma için: tüm hücreler bellekte tutulur
+    workbook = Workbook()
+    sheet = workbook.active
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+
+
+def measure(name, writer, data, row_count):
+    path = os.path.join(tempfile.mkdtemp(), f'{name}.out')
+    started = time.perf_counter()
+    writer(attendance_matrix_rows(*data), path)
+    elapsed = time.perf_counter() - started
+    size = os.path.getsize(path)
+
+    # tracemalloc yazmayı yavaşlattığı için bellek ayrı bir çalıştırmada ölçülür
+    tracemalloc.start()
+    writer(attendance_matrix_rows(*data), path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    os.remove(path)
+    print(f"{name:<20} {elapsed:8.2f} sn {row_count / elapsed:10.0f} satır/sn "
+          f"{peak / 1024 / 1024:8.1f} MB bellek {size / 1024:8.0f} KB dosya")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=1000)
+    parser.add_argument('--sessions', type=int, default=28)
+    args = parser.parse_args()
+
+    data = build_data(args.students, args.sessions)
+    row_count = args.students + 1
+    print(f"{args.students} öğrenci x {args.sessions} oturum ({row_count} satır)")
+    measure('csv', write_csv, data, row_count)
+    measure('xlsx write-only', write_xlsx_write_only, data, row_count)
+    measure('xlsx normal', write_xlsx_normal, data, row_count)
+
+
+if __name__ == '__main__':
+    main()
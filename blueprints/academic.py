@@ -1,24 +1,26 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, current_app
 from flask_login import login_required, current_user
 from extensions import db
-from models import Ders, Akademisyen, CourseStudent, Student, DersOturum, YoklamaKayit, User
-import os
-import pandas as pd
+from models import Ders, Akademisyen, CourseStudent, Student, DersOturum, YoklamaKayit, delete_course_cascade
+from sqlalchemy.orm import joinedload
 import json
 import qrcode
 import base64
 from io import BytesIO
 from datetime import datetime
-from werkzeug.utils import secure_filename
-from werkzeug.security import generate_password_hash
+from utils.offload import process_pool, OffloadRejected, OffloadTimeout
+from utils.roster import RosterError, PREVIEW_LIMIT, read_roster, roster_records, diff_roster, apply_roster, sign_roster, load_signed_roster
 from collections import defaultdict
 from sqlalchemy.exc import IntegrityError
+from utils.replica import read_replica
+from utils.pagination import get_page_args, keyset_paginate, course_roster_query
 
 academic_bp = Blueprint('academic', __name__)
 
 
 @academic_bp.route('/dashboard')
 @login_required
+@read_replica
 def dashboard():
     """
     Akademisyen paneli ana sayfası. Akademisyenin derslerini listeler.
@@ -115,17 +117,38 @@ def course_students(course_id):
     """
     Seçilen dersin öğrenci listesini ve aktif oturumunu gösterir.
     """
-    course = Ders.query.get_or_404(course_id)
-    students = Student.query.join(CourseStudent).filter(CourseStudent.DersID == course_id).all()
+    # Başlıktaki akademisyen adı için
+    course = Ders.query.options(joinedload(Ders.akademisyen).joinedload(Akademisyen.user_account)).get_or_404(course_id)
+    page_args = get_page_args()
+
+    # Öğrenci listesi OgrenciNo üzerinden anahtar tabanlı sayfalanır
+    students_query = course_roster_query(course_id, page_args['search'])
+
+    page = keyset_paginate(
+        students_query, Student.OgrenciNo, page_args['limit'],
+        after=page_args['after'], before=page_args['before'], descending=page_args['descending']
+    )
+    total_students = CourseStudent.query.filter_by(DersID=course_id).count()
+
+    if request.args.get('format') == 'json':
+        return jsonify({
+            'course_id': course.DersID,
+            'total': total_students,
+            'students': [serialize_student(student) for student in page.items],
+            'page': page.to_dict()
+        })
+
     # Aktif oturum kontrolü
     active_session = DersOturum.query.filter_by(DersID=course_id, AktifMi=True).first()
-    return render_template('course_students.html', course=course, students=students, active_session=active_session)
+    return render_template('course_students.html', course=course, students=page.items, page=page,
+                           page_args=page_args, total_students=total_students, active_session=active_session)
 
 @academic_bp.route('/upload_students/<int:course_id>', methods=['GET', 'POST'])
 @login_required
 def upload_students_to_course(course_id):
     """
-    Excel dosyasından öğrenci yükleme işlemini yapar.
+    CSV veya Excel dosyasından öğrenci yükleme işlemini yapar.
+    Varsayılan olarak önce değişikliklerin önizlemesi gösterilir, onaylandığında kaydedilir.
     """
     if not current_user.is_academician():
         flash('Bu sayfaya erişim yetkiniz yok.', 'danger')
@@ -142,9 +165,15 @@ def upload_students_to_course(course_id):
         flash('Bu derse öğrenci yükleme yetkiniz yok.', 'danger')
         return redirect(url_for('auth.dashboard'))
 
-    current_students_in_course = [cs.ogrenci_objesi for cs in course.kayitli_ogrenciler]
-
     if request.method == 'POST':
+        # Önizlemesi yapılmış listenin onaylanması: dosya tekrar yüklenmez, imzalı liste kullanılır
+        if request.form.get('roster_token'):
+            records = load_signed_roster(request.form['roster_token'], course.DersID)
+            if records is None:
+                flash('Önizlemenin süresi dolmuş veya geçersiz. Lütfen dosyayı tekrar yükleyin.', 'danger')
+                return redirect(request.url)
+            return import_roster(course, records)
+
         if 'file' not in request.files:
             flash('Dosya yüklenmedi.', 'danger')
             return redirect(request.url)
@@ -154,138 +183,47 @@ def upload_students_to_course(course_id):
             flash('Dosya seçilmedi.', 'danger')
             return redirect(request.url)
 
-        if file and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            uploads_folder = current_app.config['UPLOAD_FOLDER']
-            if not os.path.exists(uploads_folder):
-                os.makedirs(uploads_folder)
-            filepath = os.path.join(uploads_folder, filename)
-            file.save(filepath)
-
-            try:
-                df = pd.read_excel(filepath)
-
-                # Gerekli sütunları kontrol et
-                required_columns = ['Öğrenci No', 'Adı', 'Soyadı']
-                missing_columns = [col for col in required_columns if col not in df.columns]
-
-                if missing_columns:
-                    flash(f'Excel dosyasında eksik sütunlar bulundu: {", ".join(missing_columns)}. Lütfen kontrol edin.', 'danger')
-                    return redirect(request.url)
-
-                added_count = 0
-                already_in_course_count = 0
-                updated_passive_count = 0
-                new_passive_student_created_count = 0
-
-                for index, row in df.iterrows():
-                    student_no = str(row['Öğrenci No']).strip()
-                    student_ad = str(row['Adı']).strip()
-                    student_soyad = str(row['Soyadı']).strip()
-                    
-                    # İsteğe bağlı sütunlar
-                    student_sinif = str(row['Sınıfı']).strip() if 'Sınıfı' in df.columns and pd.notna(row['Sınıfı']) else None
-                    student_birim_program = str(row['Birim Program']).strip() if 'Birim Program' in df.columns and pd.notna(row['Birim Program']) else None
-
-                    if not student_no.isdigit():
-                        flash(f'Geçersiz öğrenci numarası formatı: {student_no} (satır {index + 2}). Sadece rakamlardan oluşmalıdır.', 'warning')
-                        continue
-
-                    user_with_student_no = User.query.filter_by(OgrenciNo=student_no).first()
-                    if user_with_student_no:
-                        if user_with_student_no.UserType != 'student':
-                            # Bu kullanıcı öğrenci değilse, güncelleme yapma!
-                            continue
-                        # Sadece öğrenci kullanıcılarının adı/soyadı güncellensin
-                        user_with_student_no.Isim = student_ad
-                        user_with_student_no.Soyisim = student_soyad
-                        
-                        student_obj = None
-
-                        # Öğrenci detaylarını güncelle
-                        student_obj = user_with_student_no.student_details
-
-                        if student_obj:
-                            student_obj.Sinif = student_sinif
-                            student_obj.BirimProgram = student_birim_program
-
-                        # Pasif hesap durumunu kontrol et
-                        if not user_with_student_no.is_active_user:
-                            updated_passive_count += 1
-
-                        # Eğer User objesi var ama Student objesi eksikse
-                        if not student_obj:
-                            student_obj = Student(
-                                UserID=user_with_student_no.id,
-                                OgrenciNo=student_no,
-                                Sinif=student_sinif,
-                                BirimProgram=student_birim_program
-                            )
-                            db.session.add(student_obj)
-
-                    else:
-                        # Yeni öğrenci hesabı oluştur
-                        new_user = User(
-                            OgrenciNo=student_no,
-                            Isim=student_ad,
-                            Soyisim=student_soyad,
-                            Email=None,
-                            SifreHash=generate_password_hash(os.urandom(16).hex()),
-                            UserType='student',
-                            is_active_user=False
-                        )
-                        db.session.add(new_user)
-                        db.session.flush()
-
-                        new_student = Student(
-                            UserID=new_user.id,
-                            OgrenciNo=student_no,
-                            Sinif=student_sinif,
-                            BirimProgram=student_birim_program
-                        )
-                        db.session.add(new_student)
-                        student_obj = new_student
-                        new_passive_student_created_count += 1
-                    
-                    db.session.flush()
-
-                    # Ders kaydını kontrol et ve ekle
-                    existing_enrollment = CourseStudent.query.filter_by(
-                        OgrenciID=student_obj.OgrenciID,
-                        DersID=course.DersID
-                    ).first()
-
-                    if not existing_enrollment:
-                        new_enrollment = CourseStudent(
-                            OgrenciID=student_obj.OgrenciID,
-                            DersID=course.DersID,
-                            KayitTarihi=datetime.utcnow()
-                        )
-                        db.session.add(new_enrollment)
-                        added_count += 1
-                    else:
-                        already_in_course_count += 1
-
-                db.session.commit()
-
-                flash(f'"{course.DersAdi}" dersine {added_count} öğrenci başarıyla eklendi.', 'success')
-                if new_passive_student_created_count > 0:
-                    flash(f'{new_passive_student_created_count} yeni pasif öğrenci hesabı oluşturuldu. Öğrenciler sisteme giriş yapabilmek için kendi öğrenci numaralarıyla kayıt olmalılar.', 'info')
-                if updated_passive_count > 0:
-                    flash(f'{updated_passive_count} mevcut pasif öğrenci bilgisi güncellendi.', 'info')
-                if already_in_course_count > 0:
-                    flash(f'{already_in_course_count} öğrenci zaten derse kayıtlıydı.', 'info')
-
-            except Exception as e:
-                db.session.rollback()
-                flash(f'Dosya işlenirken bir hata oluştu: {str(e)}', 'danger')
-            finally:
-                if os.path.exists(filepath):
-                    os.remove(filepath)
-
-            return redirect(url_for('academic.course_students', course_id=course.DersID))
-
-    return render_template('upload_students_to_course.html', course=course, current_students=current_students_in_course)
+        if not allowed_file(file.filename):
+            flash('Desteklenmeyen dosya türü. Lütfen CSV veya Excel dosyası yükleyin.', 'danger')
+            return redirect(request.url)
+
+        try:
+            # Dosya diske yazılmadan bellekten okunur; ayrıştırma GIL'e bağlı olduğundan ayrı süreçte yapılır
+            roster = process_pool.run(read_roster, file.read(), file.filename.rsplit('.', 1)[1].lower())
+        except RosterError as e:
+            flash(str(e), 'danger')
+            return redirect(request.url)
+        except (OffloadRejected, OffloadTimeout):
+            raise
+        except Exception as e:
+            flash(f'Dosya işlenirken bir hata oluştu: {str(e)}', 'danger')
+            return redirect(request.url)
+
+        records = roster_records(roster)
+        invalid_rows = roster[~roster['valid']]
+        duplicate_rows = roster[roster['duplicate']]
+
+        if request.form.get('mode') == 'import':
+            if len(invalid_rows):
+                rows = ', '.join(str(row) for row in invalid_rows['row'].head(10))
+                flash(f'{len(invalid_rows)} satırda geçersiz öğrenci numarası atlandı (satır {rows}). Sadece rakamlardan oluşmalıdır.', 'warning')
+            return import_roster(course, records)
+
+        diff = diff_roster(course.DersID, records)
+        return render_template(
+            'roster_import_preview.html',
+            course=course,
+            diff=diff,
+            invalid_rows=invalid_rows.head(PREVIEW_LIMIT).to_dict('records'),
+            invalid_count=len(invalid_rows),
+            duplicate_rows=duplicate_rows.head(PREVIEW_LIMIT).to_dict('records'),
+            duplicate_count=len(duplicate_rows),
+            roster_token=sign_roster(course.DersID, records),
+            limit=PREVIEW_LIMIT
+        )
+
+    # Mevcut öğrenci listesi burada yüklenmez, sayfalı olarak course_students üzerinden görüntülenir
+    return render_template('upload_students_to_course.html', course=course)
 
 @academic_bp.route('/edit_course/<int:course_id>', methods=['GET', 'POST'])
 @login_required
@@ -343,10 +281,8 @@ def delete_course(course_id):
     Ders ve bağlı oturumları siler.
     """
     course = Ders.query.get_or_404(course_id)
-    # Önce bağlı oturumları sil
-    for oturum in course.oturumlar:
-        db.session.delete(oturum)
-    db.session.delete(course)
+    # Oturumlar, yoklama kayıtları ve öğrenci kayıtları toplu olarak silinir
+    delete_course_cascade(course.DersID)
     db.session.commit()
     flash('Ders ve bağlı oturumlar silindi.', 'success')
     return redirect(url_for('academic.list_courses'))
@@ -380,6 +316,42 @@ def reports_dashboard():
     # Raporlar sayfası kodları
     return render_template('reports_dashboard.html')
 
+def serialize_student(student):
+    """
+    Öğrenci bilgisini JSON yanıtları için sözlüğe çevirir.
+    """
+    return {
+        'student_id': student.OgrenciID,
+        'student_no': student.OgrenciNo,
+        'name': student.user.Isim,
+        'surname': student.user.Soyisim,
+        'email': student.user.Email,
+        'active': student.user.is_active_user
+    }
+
+def import_roster(course, records):
+    """
+    Öğrenci listesini derse toplu olarak uygular ve sonucu bildirir.
+    """
+    try:
+        counts = apply_roster(course.DersID, diff_roster(course.DersID, records))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Dosya işlenirken bir hata oluştu: {str(e)}', 'danger')
+        return redirect(url_for('academic.upload_students_to_course', course_id=course.DersID))
+
+    flash(f'"{course.DersAdi}" dersine {counts["added"]} öğrenci başarıyla eklendi.', 'success')
+    if counts["created"] > 0:
+        flash(f'{counts["created"]} yeni pasif öğrenci hesabı oluşturuldu. Öğrenciler sisteme giriş yapabilmek için kendi öğrenci numaralarıyla kayıt olmalılar.', 'info')
+    if counts["updated_passive"] > 0:
+        flash(f'{counts["updated_passive"]} mevcut pasif öğrenci bilgisi güncellendi.', 'info')
+    if counts["already_enrolled"] > 0:
+        flash(f'{counts["already_enrolled"]} öğrenci zaten derse kayıtlıydı.', 'info')
+    if counts["conflicts"] > 0:
+        flash(f'{counts["conflicts"]} numara öğrenci olmayan bir hesaba ait olduğu için atlandı.', 'warning')
+    return redirect(url_for('academic.course_students', course_id=course.DersID))
+
 def allowed_file(filename):
     """
     Dosya uzantısı kontrolü yapar.
@@ -2,62 +2,43 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, jsonify, send_file
 from flask_login import login_required, current_user
 from extensions import db
-from models import Ders, DersOturum, YoklamaKayit, CourseStudent, Student
+from models import Ders, DersOturum, CourseStudent, Student, delete_sessions_cascade
+from sqlalchemy.orm import joinedload
 from datetime import datetime, timedelta
 import json
-import qrcode
-import base64
 from io import BytesIO, StringIO
-import uuid
-import csv
 from collections import defaultdict
+from utils.pagination import get_page_args, keyset_paginate, course_roster_query
+from utils.conditional import conditional_course_view
+from utils.qr_rotation import current_qr, forget_qr
+from utils.archive import attendance_pairs
+from utils.replica import read_replica
+from utils.admission import admission
+from utils.export import send_report, attendance_matrix_rows
+from utils.heatmap import presence_matrix, render_heatmap
+from utils.live import presence_snapshot, forget_session, can_watch
+from utils.tracing import span
 
 attendance_bp = Blueprint('attendance', __name__)
 
 # CSV indirme fonksiyonu
 @attendance_bp.route('/download_attendance_report/<int:course_id>')
+@admission('report')
 @login_required
+@read_replica
+@conditional_course_view
 def download_attendance_report(course_id):
     """
-    Seçilen dersin yoklama raporunu CSV olarak indirir.
+    Seçilen dersin yoklama raporunu CSV (veya ?format=xlsx ile Excel) olarak indirir.
     """
     course = Ders.query.get_or_404(course_id)
     sessions = DersOturum.query.filter_by(DersID=course_id).order_by(DersOturum.OturumNumarasi, DersOturum.OturumSiraNumarasi).all()
-    grouped_sessions = defaultdict(list)
-    for session_obj in sessions:
-        grouped_sessions[session_obj.OturumNumarasi].append(session_obj)
-    sorted_week_numbers = sorted(grouped_sessions.keys())
-    students = Student.query.join(CourseStudent, Student.OgrenciID == CourseStudent.OgrenciID).filter(CourseStudent.DersID == course_id).all()
-    report_data = {}
-    for student in students:
-        attendance = {}
-        for week_num in sorted_week_numbers:
-            for session in grouped_sessions[week_num]:
-                kayit = YoklamaKayit.query.filter_by(OturumID=session.OturumID, OgrenciID=student.OgrenciID).first()
-                session_key = f"{session.OturumNumarasi}-{session.OturumSiraNumarasi}"
-                attendance[session_key] = 'X' if kayit else ''
-        report_data[student.OgrenciID] = {
-            'student_no': student.OgrenciNo,
-            'student_name': f"{student.user.Isim} {student.user.Soyisim}",
-            'attendance': attendance
-        }
-    import io
-    output = io.StringIO()
-    writer = csv.writer(output)
-    header = ['Öğrenci No', 'Adı Soyadı']
-    for week_num in sorted_week_numbers:
-        for session in grouped_sessions[week_num]:
-            header.append(f"Hafta {week_num} - Oturum {session.OturumSiraNumarasi}")
-    writer.writerow(header)
-    for student_id, data in report_data.items():
-        row = [data['student_no'], data['student_name']]
-        for week_num in sorted_week_numbers:
-            for session in grouped_sessions[week_num]:
-                session_key = f"{session.OturumNumarasi}-{session.OturumSiraNumarasi}"
-                row.append('Var' if data['attendance'][session_key] == 'X' else 'Yok')
-        writer.writerow(row)
-    csv_bytes = io.BytesIO(output.getvalue().encode('utf-8'))
-    return send_file(csv_bytes, mimetype='text/csv', as_attachment=True, download_name=f'yoklama_raporu_{course.DersKodu}.csv')
+    students = Student.query.join(CourseStudent, Student.OgrenciID == CourseStudent.OgrenciID).\
+        options(joinedload(Student.user)).filter(CourseStudent.DersID == course_id).all()
+    attended = attendance_pairs(course_id, [session.OturumID for session in sessions])
+    # Oturumlar hafta ve oturum sırasına göre sıralı olduğundan sütunlar aynı sırada yazılır
+    rows = attendance_matrix_rows(sessions, students, attended)
+    return send_report(rows, f'yoklama_raporu_{course.DersKodu}', 'Yoklama')
 
 @attendance_bp.route('/course_sessions/<int:course_id>')
 @login_required
@@ -70,18 +51,39 @@ def view_course_sessions(course_id):
         flash('Yetkiniz yok', 'danger')
         return redirect(url_for('academicain.dashboard'))
 
-    # Oturumları hafta numarasına ve ardından sıra numarasına göre sırala
-    sessions = DersOturum.query.filter_by(DersID=course_id).order_by(DersOturum.OturumNumarasi, DersOturum.OturumSiraNumarasi, DersOturum.BaslangicZamani).all()
-    
-    # Oturumları haftalara göre gruplamak için
+    # Oturumlar OturumID üzerinden anahtar tabanlı sayfalanır
+    page_args = get_page_args(cursor_type=int)
+    sessions_query = DersOturum.query.filter_by(DersID=course_id)
+    if page_args['search'].isdigit():
+        sessions_query = sessions_query.filter(DersOturum.OturumNumarasi == int(page_args['search']))
+    active_filter = request.args.get('active')
+    if active_filter in ('0', '1'):
+        sessions_query = sessions_query.filter(DersOturum.AktifMi == (active_filter == '1'))
+
+    page = keyset_paginate(
+        sessions_query, DersOturum.OturumID, page_args['limit'],
+        after=page_args['after'], before=page_args['before'], descending=page_args['descending']
+    )
+
+    if request.args.get('format') == 'json':
+        return jsonify({
+            'course_id': course.DersID,
+            'sessions': [serialize_session(session_obj) for session_obj in page.items],
+            'page': page.to_dict()
+        })
+
+    # Sayfadaki oturumları haftalara göre grupla
     grouped_sessions = defaultdict(list)
-    for session_obj in sessions:
+    for session_obj in page.items:
         grouped_sessions[session_obj.OturumNumarasi].append(session_obj)
+    for week_num in grouped_sessions:
+        grouped_sessions[week_num].sort(key=lambda x: (x.OturumSiraNumarasi, x.BaslangicZamani))
 
     # Dictionary'i hafta numarasına göre sırala
-    sorted_grouped_sessions = sorted(grouped_sessions.items())
+    sorted_grouped_sessions = sorted(grouped_sessions.items(), reverse=page_args['descending'])
 
-    return render_template('course_sessions.html', course=course, grouped_sessions=sorted_grouped_sessions)
+    return render_template('course_sessions.html', course=course, grouped_sessions=sorted_grouped_sessions,
+                           page=page, page_args=page_args)
 
 @attendance_bp.route('/start_attendance/<int:course_id>', methods=['GET', 'POST'])
 @login_required
@@ -99,7 +101,7 @@ def start_attendance(course_id):
     last_session = DersOturum.query.filter_by(DersID=course_id).order_by(DersOturum.OturumNumarasi.desc()).first()
     last_week = last_session.OturumNumarasi if last_session else 0
     next_week = last_week + 1
-    if not course.kayitli_ogrenciler:
+    if not db.session.query(CourseStudent.query.filter_by(DersID=course_id).exists()).scalar():
         flash('Bu derse kayıtlı öğrenci olmadığı için yoklama oturumu başlatılamaz!', 'danger')
         return redirect(url_for('attendance.view_course_sessions', course_id=course_id))
     if not current_user.is_academician() or course.AkademisyenID != current_user.academician_details.AkademisyenID:
@@ -197,7 +199,7 @@ def stop_attendance(session_id):
     """
     Aktif yoklama oturumunu durdurur.
     """
-    session_to_stop = DersOturum.query.get_or_404(session_id)
+    session_to_stop = DersOturum.query.options(joinedload(DersOturum.ders)).get_or_404(session_id)
     if not current_user.is_academician() or session_to_stop.ders.AkademisyenID != current_user.academician_details.AkademisyenID:
         flash('Yetkiniz yok', 'danger')
         return redirect(url_for('auth.dashboard'))
@@ -205,6 +207,8 @@ def stop_attendance(session_id):
     session_to_stop.AktifMi = False
     session_to_stop.BitisZamani = datetime.utcnow()
     db.session.commit()
+    forget_session(session_to_stop.OturumID)
+    forget_qr(session_to_stop.OturumID)
     flash('Yoklama oturumu durduruldu', 'success')
     return redirect(url_for('attendance.view_course_sessions', course_id=session_to_stop.DersID))
 
@@ -215,50 +219,21 @@ def generate_qr(session_id):
     Oturum için QR kodu üretir ve görüntüler.
     """
     # Oturum bilgilerini al ve yetki kontrolü yap
-    session_obj = DersOturum.query.get_or_404(session_id)
+    session_obj = DersOturum.query.options(joinedload(DersOturum.ders)).get_or_404(session_id)
     if not current_user.is_academician() or session_obj.ders.AkademisyenID != current_user.academician_details.AkademisyenID:
         flash('Yetkiniz yok', 'danger')
         return redirect(url_for('auth.dashboard'))
 
-    # QR kodu verisini oluştur (zaman damgası ve rastgele versiyon ekleyerek)
-    qr_data = {
-        'course_id': session_obj.DersID,
-        'session_id': session_obj.OturumID,
-        'week': session_obj.OturumNumarasi,
-        'session_order': session_obj.OturumSiraNumarasi,
-        'timestamp': datetime.utcnow().isoformat(),  # Zaman damgası
-        'random': uuid.uuid4().hex[:8]  # Rastgele değer
-    }
-    
-    # Veritabanını güncelle
-    session_obj.QRCodeData = json.dumps(qr_data)
-    session_obj.QR_Olusma_Zamani = datetime.utcnow()
-    session_obj.QR_CODE_VERSION = session_obj.QR_CODE_VERSION + 1 if session_obj.QR_CODE_VERSION else 1
-    db.session.commit()
-
-    # QR kodu oluştur
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(session_obj.QRCodeData)
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white")
-
-    # Base64'e çevir
-    buffered = BytesIO()
-    img.save(buffered, format="PNG")
-    img_str = base64.b64encode(buffered.getvalue()).decode('utf-8')
+    # Geçerli penceredeki QR; sonraki QR'lar sayfaya Socket.IO ile gönderilir (utils/qr_rotation.py)
+    qr = current_qr(session_obj)
 
     # Template'e gönder
     return render_template('view_qr.html',
-                         qr_image=img_str,
+                         qr_image=qr['qr_image'],
                          session=session_obj,
-                         refresh_interval=5000,  # 5 saniye (milisaniye)
-                         now=datetime.utcnow(),
-                         remaining_seconds=30)  # 30 saniye geçerlilik
+                         refresh_interval=current_app.config['QR_REFRESH_INTERVAL'],
+                         refresh_in=qr['refresh_in'],
+                         now=datetime.utcnow())
 
 @attendance_bp.route('/delete_session/<int:session_id>', methods=['POST'])
 @login_required
@@ -266,21 +241,25 @@ def delete_session(session_id):
     """
     Oturumu ve ilişkili yoklama kayıtlarını siler.
     """
-    session_to_delete = DersOturum.query.get_or_404(session_id)
+    session_to_delete = DersOturum.query.options(joinedload(DersOturum.ders)).get_or_404(session_id)
     course_id = session_to_delete.DersID
 
     if not current_user.is_academician() or session_to_delete.ders.AkademisyenID != current_user.academician_details.AkademisyenID:
         return jsonify({'status': 'error', 'message': 'Yetkiniz yok'}), 403
 
-    # İlişkili yoklama kayıtlarını sil
-    YoklamaKayit.query.filter_by(OturumID=session_id).delete()
-    db.session.delete(session_to_delete)
+    # Oturumu ve ilişkili yoklama kayıtlarını toplu olarak sil
+    delete_sessions_cascade([session_to_delete.OturumID])
     db.session.commit()
+    forget_session(session_id)
+    forget_qr(session_id)
 
     return jsonify({'status': 'success'})
 
 @attendance_bp.route('/attendance_report/<int:course_id>')
+@admission('report')
 @login_required
+@read_replica
+@conditional_course_view
 def attendance_report(course_id):
     """
     Seçilen dersin yoklama raporunu hazırlar ve görüntüler.
@@ -292,23 +271,41 @@ def attendance_report(course_id):
 
     # Yoklama verilerini hazırla
     sessions = DersOturum.query.filter_by(DersID=course_id).order_by(DersOturum.OturumNumarasi, DersOturum.OturumSiraNumarasi, DersOturum.BaslangicZamani).all()
-    course_students = CourseStudent.query.filter_by(DersID=course_id).all()
-    students_in_course = [rel.ogrenci_objesi for rel in course_students]
-
-    report_data = {}
-    for student in students_in_course:
-        report_data[student.OgrenciID] = {
-            'student_no': student.OgrenciNo,
-            'student_name': f"{student.user.Isim} {student.user.Soyisim}",
-            'attendance': {}
-        }
-        for session_obj in sessions:
-            attended = YoklamaKayit.query.filter_by(
-                OturumID=session_obj.OturumID,
-                OgrenciID=student.OgrenciID
-            ).first()
-            session_key = f"{session_obj.OturumNumarasi}-{session_obj.OturumSiraNumarasi}"
-            report_data[student.OgrenciID]['attendance'][session_key] = 'X' if attended else ''
+
+    # Öğrenciler OgrenciNo üzerinden sayfalanır, yalnızca sayfadaki öğrencilerin kayıtları okunur
+    page_args = get_page_args()
+    students_query = course_roster_query(course_id, page_args['search'])
+    page = keyset_paginate(
+        students_query, Student.OgrenciNo, page_args['limit'],
+        after=page_args['after'], before=page_args['before'], descending=page_args['descending']
+    )
+
+    def build_report_data():
+        attended_pairs = attendance_pairs(
+            course_id,
+            [session_obj.OturumID for session_obj in sessions],
+            [student.OgrenciID for student in page.items]
+        )
+        report_data = {}
+        for student in page.items:
+            report_data[student.OgrenciID] = {
+                'student_no': student.OgrenciNo,
+                'student_name': f"{student.user.Isim} {student.user.Soyisim}",
+                'attendance': {}
+            }
+            for session_obj in sessions:
+                session_key = f"{session_obj.OturumNumarasi}-{session_obj.OturumSiraNumarasi}"
+                attended = (session_obj.OturumID, student.OgrenciID) in attended_pairs
+                report_data[student.OgrenciID]['attendance'][session_key] = 'X' if attended else ''
+        return report_data
+
+    if request.args.get('format') == 'json':
+        return jsonify({
+            'course_id': course.DersID,
+            'sessions': [serialize_session(session_obj) for session_obj in sessions],
+            'students': list(build_report_data().values()),
+            'page': page.to_dict()
+        })
 
     grouped_sessions_for_header = defaultdict(list)
     for session_obj in sessions:
@@ -319,43 +316,81 @@ def attendance_report(course_id):
 
     sorted_week_numbers = sorted(grouped_sessions_for_header.keys())
 
+    # Tablo gövdesi parça önbelleğindeyse (utils/templating.py) yoklama kayıtları hiç okunmaz
     return render_template('attendance_report.html',
                            course=course,
-                           report_data=report_data,
+                           report_data=build_report_data,
                            grouped_sessions=grouped_sessions_for_header,
-                           sorted_week_numbers=sorted_week_numbers)
+                           sorted_week_numbers=sorted_week_numbers,
+                           page=page,
+                           page_args=page_args)
+
+@attendance_bp.route('/attendance_report/<int:course_id>/heatmap')
+@admission('report')
+@login_required
+@read_replica
+@conditional_course_view
+def attendance_heatmap(course_id):
+    """
+    Dersin tüm öğrenci x oturum katılım matrisini ısı haritası (PNG) olarak döndürür.
+    ?sort=absence devamsızlığa göre sıralar, ?group=week oturumları haftalara göre birleştirir.
+    """
+    course = Ders.query.get_or_404(course_id)
+    if not current_user.is_academician() or course.AkademisyenID != current_user.academician_details.AkademisyenID:
+        return jsonify({'status': 'error', 'message': 'Yetkiniz yok'}), 403
+
+    # Yalnızca kimlik sütunları okunur; ORM nesnesi oluşturulmaz
+    sessions = db.session.query(DersOturum.OturumID, DersOturum.OturumNumarasi).\
+        filter(DersOturum.DersID == course_id).\
+        order_by(DersOturum.OturumNumarasi, DersOturum.OturumSiraNumarasi, DersOturum.BaslangicZamani).all()
+    student_ids = [row[0] for row in db.session.query(Student.OgrenciID).
+                   join(CourseStudent, Student.OgrenciID == CourseStudent.OgrenciID).
+                   filter(CourseStudent.DersID == course_id).order_by(Student.OgrenciNo).all()]
+    session_ids = [session_id for session_id, _ in sessions]
+    attended = attendance_pairs(course_id, session_ids)
+
+    with span('heatmap.render', students=len(student_ids), sessions=len(session_ids)):
+        png = render_heatmap(
+            presence_matrix(session_ids, student_ids, attended),
+            [week for _, week in sessions],
+            group_by_week=request.args.get('group') == 'week',
+            sort_by_absence=request.args.get('sort') == 'absence'
+        )
+    return send_file(BytesIO(png), mimetype='image/png')
 
 @attendance_bp.route('/refresh_qr/<int:session_id>')
 @login_required
 def refresh_qr(session_id):
     """
-    Oturum için QR kodunu yeniler ve JSON olarak döndürür.
+    Oturumun geçerli QR kodunu JSON olarak döndürür. Ekranlar QR'ı Socket.IO ile alır;
+    bu uç nokta bağlantı koptuğunda yedek olarak yoklanır ve pencere başına yeni QR üretmez.
     """
-    # QR kodunu üret ve JSON döndür
-    session_obj = DersOturum.query.get_or_404(session_id)
-    
-    # QR kod verisini güncelle (zaman damgası ekleyerek)
-    qr_data = {
-        'course_id': session_obj.DersID,
-        'session_id': session_obj.OturumID,
-        'timestamp': datetime.utcnow().isoformat()  # Zaman damgası ekleyin
-    }
-    session_obj.QRCodeData = json.dumps(qr_data)
-    session_obj.QR_Olusma_Zamani = datetime.utcnow()
-    db.session.commit()
+    session_obj = DersOturum.query.options(joinedload(DersOturum.ders)).get_or_404(session_id)
+    if not can_watch(session_obj):
+        return jsonify({'status': 'error', 'message': 'Yetkiniz yok'}), 403
+    return jsonify(current_qr(session_obj))
 
-    # Yeni QR kodu oluştur
-    qr = qrcode.QRCode(version=1, box_size=10, border=4)
-    qr.add_data(session_obj.QRCodeData)
-    img = qr.make_image(fill_color="black", back_color="white")
-    
-    buffered = BytesIO()
-    img.save(buffered, format="PNG")
-    img_str = base64.b64encode(buffered.getvalue()).decode('utf-8')
-    
-    return jsonify({
-        'qr_image': img_str,
-        'last_refresh': datetime.utcnow().strftime('%H:%M:%S'),
-        'status': 'success'
-    })
+@attendance_bp.route('/live_attendance/<int:session_id>')
+@login_required
+def live_attendance(session_id):
+    """
+    Aktif oturumun katılım listesini bellekteki kümeden döndürür.
+    Canlı panel yeniden bağlandığında veya delta sırası atlandığında kullanılır.
+    """
+    session_obj = DersOturum.query.options(joinedload(DersOturum.ders)).get_or_404(session_id)
+    if not can_watch(session_obj):
+        return jsonify({'status': 'error', 'message': 'Yetkiniz yok'}), 403
+    return jsonify(presence_snapshot(session_id))
 
+def serialize_session(session_obj):
+    """
+    Oturum bilgisini JSON yanıtları için sözlüğe çevirir.
+    """
+    return {
+        'session_id': session_obj.OturumID,
+        'week': session_obj.OturumNumarasi,
+        'order': session_obj.OturumSiraNumarasi,
+        'started_at': session_obj.BaslangicZamani.isoformat() if session_obj.BaslangicZamani else None,
+        'ended_at': session_obj.BitisZamani.isoformat() if session_obj.BitisZamani else None,
+        'active': bool(session_obj.AktifMi)
+    }
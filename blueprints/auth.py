@@ -1,12 +1,10 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, session
 from flask_login import login_user, logout_user, current_user, login_required
-from werkzeug.security import generate_password_hash, check_password_hash
 from extensions import db
 from models import User, Akademisyen, Student, PasswordResetToken, Ders, CourseStudent
 import uuid
 from datetime import datetime, timedelta
-from utils.auth import send_password_reset_email
-from werkzeug.security import generate_password_hash, check_password_hash  # check_password_hash eklenmeli
+from utils.auth import send_password_reset_email, hash_password, password_needs_rehash
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -29,9 +27,7 @@ def login():
         email_or_no = request.form.get('email_or_no')
         password = request.form.get('password')
 
-        user = User.query.filter(
-            (User.Email.ilike(email_or_no)) | (User.OgrenciNo.ilike(email_or_no))
-        ).first()
+        user = User.find_by_login(email_or_no)
 
         if not user:
             flash('Kullanıcı bulunamadı.', 'danger')
@@ -45,6 +41,11 @@ def login():
             flash('Şifre yanlış.', 'danger')
             return render_template('login.html')
 
+        # Eski yöntem/maliyetle üretilmiş hash'i güncel parametrelerle yenile
+        if password_needs_rehash(user.SifreHash):
+            user.SifreHash = hash_password(password)
+            db.session.commit()
+
         if user.is_student():
             # Öğrenci tablosunda da aktif olmalı
             student = user.student_details
@@ -97,7 +98,7 @@ def register():
 
         existing_user_by_no = User.query.filter_by(OgrenciNo=ogrenci_no).first()
         if existing_user_by_no and not existing_user_by_no.is_active_user:
-            existing_user_by_no.SifreHash = generate_password_hash(password)
+            existing_user_by_no.SifreHash = hash_password(password)
             existing_user_by_no.Isim = ad
             existing_user_by_no.Soyisim = soyad
             existing_user_by_no.Email = email
@@ -118,7 +119,7 @@ def register():
         new_user = User(
             OgrenciNo=ogrenci_no,
             Email=email,
-            SifreHash=generate_password_hash(password),
+            SifreHash=hash_password(password),
             UserType='student',
             Isim=ad,
             Soyisim=soyad,
@@ -226,7 +227,7 @@ def reset_password(token):
 
         user = User.query.get(reset_token.user_id)
         if user:
-            user.SifreHash = generate_password_hash(new_password)
+            user.SifreHash = hash_password(new_password)
             db.session.delete(reset_token) # Tokenı kullanıldıktan sonra sil
             db.session.commit()
             flash('Şifreniz başarıyla sıfırlandı. Şimdi giriş yapabilirsiniz.', 'success')
@@ -1,18 +1,18 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, send_file, jsonify
+from flask import Blueprint, render_template, redirect, url_for, flash, request, send_file, jsonify, Response
 from flask_login import login_required, current_user
 from extensions import db
 from models import Ders, CourseStudent, YoklamaKayit, DersOturum, Student
-from utils.reporting import calculate_attendance, generate_weekly_attendance_chart, generate_overall_attendance_pie, generate_attendance_chart
-import io
-import csv
-import base64
-import matplotlib
-matplotlib.use('Agg')
+from utils.reporting import calculate_attendance, generate_weekly_attendance_chart, generate_overall_attendance_pie, generate_attendance_chart, chart_response, chart_markup, svg_backend, AttendanceScope, overall_attendance
+from utils.conditional import conditional_course_view
+from utils.replica import read_replica
+from utils.admission import admission
+from utils.export import csv_file, send_report, student_report_rows, class_list_rows, load_courses_report_data, stream_reports_zip
 
 reporting_bp = Blueprint('reporting', __name__)
 
 @reporting_bp.route('/reports_dashboard')
 @login_required
+@read_replica
 def reports_dashboard():
     """
     Akademisyen için raporlar ana sayfası. Kendi derslerini listeler.
@@ -29,8 +29,38 @@ def reports_dashboard():
     courses = Ders.query.filter_by(AkademisyenID=academician_details.AkademisyenID).all()
     return render_template('reports_dashboard.html', courses=courses)
 
+@reporting_bp.route('/reports/export')
+@admission('report')
+@login_required
+@read_replica
+def export_all_reports():
+    """
+    Akademisyenin tüm derslerinin CSV raporlarını ve grafiklerini tek bir zip dosyası olarak indirir.
+    Veriler toplu sorgularla bir kez okunur, zip parça parça gönderilir.
+    """
+    if not current_user.is_academician() or not current_user.academician_details:
+        flash('Bu sayfaya erişim yetkiniz yok.', 'danger')
+        return redirect(url_for('home'))
+
+    courses = Ders.query.filter_by(AkademisyenID=current_user.academician_details.AkademisyenID).\
+        order_by(Ders.DersYili, Ders.DersDonemi, Ders.DersKodu).all()
+    if not courses:
+        flash('Dışa aktarılacak ders bulunamadı.', 'warning')
+        return redirect(url_for('reporting.reports_dashboard'))
+
+    # Veritabanı okumaları yanıt akmaya başlamadan (replika yönlendirmesi geçerliyken) tamamlanır
+    report_data = load_courses_report_data(courses)
+    return Response(
+        stream_reports_zip(report_data),
+        mimetype='application/zip',
+        headers={'Content-Disposition': 'attachment; filename=yoklama_raporlari.zip'}
+    )
+
 @reporting_bp.route('/reports/<int:course_id>')
+@admission('report')
 @login_required
+@read_replica
+@conditional_course_view
 def course_reports(course_id):
     """
     Seçilen dersin haftalık ve genel yoklama grafiklerini gösterir.
@@ -40,22 +70,25 @@ def course_reports(course_id):
         return redirect(url_for('auth.home'))
     
     data = calculate_attendance(course_id)
-    weekly_chart = generate_weekly_attendance_chart(data['weekly_data'])
+    week = request.args.get('week', type=int)
+    weekly_data = [w for w in data['weekly_data'] if w['week'] == week] if week else data['weekly_data']
+    weekly_chart = generate_weekly_attendance_chart(weekly_data)
     overall_pie = generate_overall_attendance_pie(data['overall_attendance'])
     
-    # Grafikleri base64 formatına çevir
-    weekly_chart_base64 = base64.b64encode(weekly_chart.getvalue()).decode('utf-8') if weekly_chart else None
-    overall_pie_base64 = base64.b64encode(overall_pie.getvalue()).decode('utf-8') if overall_pie else None
-    
+    # SVG grafikler sayfaya doğrudan, PNG grafikler base64 olarak gömülür
     return render_template(
         'course_reports.html',
         data=data,
-        weekly_chart=weekly_chart_base64,
-        overall_pie=overall_pie_base64
+        weekly_chart=chart_markup(weekly_chart, 'Haftalık Katılım'),
+        overall_pie=chart_markup(overall_pie, 'Genel Katılım'),
+        chart_extension='svg' if svg_backend() else 'png'
     )
 
 @reporting_bp.route('/reports/<int:course_id>/failing_students')
+@admission('report')
 @login_required
+@read_replica
+@conditional_course_view
 def failing_students_report(course_id):
     """
     Devamsızlıktan kalan öğrencilerin raporunu CSV olarak indirir.
@@ -66,30 +99,18 @@ def failing_students_report(course_id):
     attendance_data = calculate_attendance(course_id)
     failing_students = attendance_data['failing_students']
     
-    # CSV raporu oluştur
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['Öğrenci No', 'Ad Soyad', 'Katıldığı Hafta', 'Devamsızlık Sayısı', 'Durum'])
-    
-    for student in failing_students:
-        writer.writerow([
-            student['student_no'],
-            student['name'],
-            student['attended_weeks'],
-            student['absence_count'],
-            student['status']
-        ])
-    
-    output.seek(0)
     return send_file(
-        io.BytesIO(output.getvalue().encode('utf-8')),
+        csv_file(student_report_rows(failing_students, 'Devamsızlık Sayısı')),
         mimetype='text/csv',
         as_attachment=True,
         download_name=f'devamsizliktan_kalanlar_{course_id}.csv'
     )
 
 @reporting_bp.route('/reports/<int:course_id>/borderline_students')
+@admission('report')
 @login_required
+@read_replica
+@conditional_course_view
 def borderline_students_report(course_id):
     """
     Devamsızlık sınırında olan öğrencilerin raporunu CSV olarak indirir.
@@ -101,99 +122,70 @@ def borderline_students_report(course_id):
     borderline_students = [s for s in attendance_data['student_attendance'] 
                           if s['absence_count'] == attendance_data['max_allowed_absences']]
     
-    # CSV raporu oluştur
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['Öğrenci No', 'Ad Soyad', 'Katıldığı Hafta', 'Devamsızlık', 'Durum'])
-    
-    for student in borderline_students:
-        writer.writerow([
-            student['student_no'],
-            student['name'],
-            student['attended_weeks'],
-            student['absence_count'],
-            student['status']
-        ])
-    
-    output.seek(0)
-    return send_file(
-        io.BytesIO(output.getvalue().encode('utf-8')),
-        mimetype='text/csv',
-        as_attachment=True,
-        download_name=f'sinirda_olan_ogrenciler_{course_id}.csv'
-    )
     return send_file(
-        io.BytesIO(output.getvalue().encode('utf-8')),
+        csv_file(student_report_rows(borderline_students)),
         mimetype='text/csv',
         as_attachment=True,
         download_name=f'sinirda_olan_ogrenciler_{course_id}.csv'
     )
 
 @reporting_bp.route('/reports/<int:course_id>/weekly_chart')
+@admission('report')
 @login_required
+@read_replica
+@conditional_course_view
 def weekly_attendance_chart(course_id):
     """
-    Haftalık yoklama grafiğini PNG olarak döndürür.
+    Haftalık yoklama grafiğini SVG (veya matplotlib kipinde PNG) olarak döndürür.
     """
     if not current_user.is_academician():
         return redirect(url_for('auth.home'))
     week = request.args.get('week', type=int)
-    attendance_data = calculate_attendance(course_id)
+    # Yalnızca istenen haftanın oturumları ve kayıtları okunur
+    scope = AttendanceScope(course_id)
     if week:
-        weekly_data = [w for w in attendance_data['weekly_data'] if w['week'] == week]
-    else:
-        weekly_data = attendance_data['weekly_data']
-    chart = generate_weekly_attendance_chart(weekly_data)
-    return send_file(chart, mimetype='image/png')
+        scope = scope.weeks(week, week)
+    chart = generate_weekly_attendance_chart(scope.weekly_data())
+    return chart_response(chart)
 
 @reporting_bp.route('/reports/<int:course_id>/overall_pie')
+@admission('report')
 @login_required
+@read_replica
+@conditional_course_view
 def overall_attendance_pie(course_id):
     """
-    Genel yoklama pasta grafiğini PNG olarak döndürür.
+    Genel yoklama pasta grafiğini SVG (veya matplotlib kipinde PNG) olarak döndürür.
     """
     if not current_user.is_academician():
         return redirect(url_for('auth.home'))
     
-    attendance_data = calculate_attendance(course_id)
-    chart = generate_overall_attendance_pie(attendance_data['overall_attendance'])
-    return send_file(chart, mimetype='image/png')
+    # Öğrenci listesi yüklenmeden haftalık sayılardan hesaplanır
+    weekly_data = AttendanceScope(course_id).weekly_data()
+    chart = generate_overall_attendance_pie(overall_attendance(weekly_data))
+    return chart_response(chart)
 
 @reporting_bp.route('/reports/<int:course_id>/full_attendance')
+@admission('report')
 @login_required
+@read_replica
+@conditional_course_view
 def full_attendance_report(course_id):
     """
-    Tüm öğrencilerin yoklama durumunu CSV olarak indirir.
+    Tüm öğrencilerin yoklama durumunu CSV (veya ?format=xlsx ile Excel) olarak indirir.
     """
     if not current_user.is_academician():
         return redirect(url_for('auth.home'))
     
     attendance_data = calculate_attendance(course_id)
     
-    # CSV raporu oluştur
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['Öğrenci No', 'Ad Soyad', 'Katıldığı Hafta', 'Devamsızlık', 'Durum'])
-    
-    for student in attendance_data['student_attendance']:
-        writer.writerow([
-            student['student_no'],
-            student['name'],
-            student['attended_weeks'],
-            student['absence_count'],
-            student['status']
-        ])
-    
-    output.seek(0)
-    return send_file(
-        io.BytesIO(output.getvalue().encode('utf-8')),
-        mimetype='text/csv',
-        as_attachment=True,
-        download_name=f'tum_ogrenciler_{course_id}.csv'
-    )
+    return send_report(student_report_rows(attendance_data['student_attendance']), f'tum_ogrenciler_{course_id}', 'Tüm Öğrenciler')
 
 @reporting_bp.route('/reports/<int:course_id>/class_list')
+@admission('report')
 @login_required
+@read_replica
+@conditional_course_view
 def class_list_report(course_id):
     """
     Sınıf listesini CSV olarak indirir.
@@ -203,42 +195,28 @@ def class_list_report(course_id):
     
     data = calculate_attendance(course_id)
     
-    # CSV raporu oluştur
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['#', 'Öğrenci No', 'Ad Soyad', 'E-posta', 'Sınıf', 'Program', 'Durum'])
-    
-    for i, student in enumerate(data['class_list'], 1):
-        writer.writerow([
-            i,
-            student['student_no'],
-            student['name'],
-            student['email'],
-            student['class'],
-            student['program'],
-            student['active']
-        ])
-    
-    output.seek(0)
     return send_file(
-        io.BytesIO(output.getvalue().encode('utf-8')),
+        csv_file(class_list_rows(data['class_list'])),
         mimetype='text/csv',
         as_attachment=True,
         download_name=f'sinif_listesi_{course_id}.csv'
     )
 
 @reporting_bp.route('/reports/<int:course_id>/attendance_chart')
+@admission('report')
 @login_required
+@read_replica
+@conditional_course_view
 def attendance_chart(course_id):
     """
-    Seçilen dersin yoklama grafiğini PNG olarak döndürür.
+    Seçilen dersin devamsızlık grafiğini SVG (veya matplotlib kipinde PNG) olarak döndürür.
     """
     if not current_user.is_academician():
         return redirect(url_for('auth.home'))
     
     img = generate_attendance_chart(course_id)
     if img:
-        return send_file(img, mimetype='image/png')
+        return chart_response(img)
     else:
         flash('Grafik oluşturmak için yeterli veri yok.', 'warning')
         return redirect(url_for('auth.course_reports', course_id=course_id))
\ No newline at end of file
@@ -1,13 +1,17 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, current_app
 from flask_login import login_required, current_user
 from extensions import db
-from models import Student, CourseStudent, Ders, YoklamaKayit, DersOturum
-from datetime import datetime
+from models import Student, CourseStudent, Ders, Akademisyen, YoklamaKayit, DersOturum, insert_attendance_records
+from sqlalchemy.orm import joinedload
+from utils.archive import attendance_pairs
+from utils.reporting import AttendanceScope
+from utils.qr import verify_qr_token
+from utils.live import mark_present, prepare_presence
+from utils.replica import read_replica
+from utils.admission import admission
+from datetime import datetime, timedelta, timezone
 from flask_login import current_user
 import json
-from flask_socketio import SocketIO
-
-socketio = SocketIO()
 
 student_bp = Blueprint('student', __name__)
 def get_current_student_details():
@@ -20,6 +24,7 @@ def get_current_student_details():
 
 @student_bp.route('/student_dashboard')
 @login_required
+@read_replica
 def student_dashboard():
     """
     Öğrenci paneli ana sayfası. Kayıtlı dersleri ve devamsızlık durumunu gösterir.
@@ -34,21 +39,20 @@ def student_dashboard():
         flash('Öğrenci profiliniz bulunamadı.', 'danger')
         return redirect(url_for('home'))
 
-    registered_courses_relations = student_details.dersleri
+    # Dersler ve panelde gösterilen akademisyen adı tek sorguda yüklenir
+    registered_courses_relations = CourseStudent.query.filter_by(OgrenciID=student_details.OgrenciID).options(
+        joinedload(CourseStudent.ders_objesi).joinedload(Ders.akademisyen).joinedload(Akademisyen.user_account)
+    ).order_by(CourseStudent.id).all()
     registered_courses = []
     # ...devamı aynı...
 
     for rel in registered_courses_relations:
         course = rel.ders_objesi
-        # Tüm oturumlar
-        sessions = DersOturum.query.filter_by(DersID=course.DersID).all()
+        # Tüm oturumlar; yalnızca bu öğrencinin kayıtları okunur
+        scope = AttendanceScope(course.DersID).students([student_details.OgrenciID])
+        sessions = scope.sessions()
         total_sessions = len(sessions)
-        attended_sessions = db.session.query(DersOturum.OturumID).\
-            join(YoklamaKayit, DersOturum.OturumID == YoklamaKayit.OturumID).\
-            filter(
-                YoklamaKayit.OgrenciID == student_details.OgrenciID,
-                DersOturum.DersID == course.DersID
-            ).distinct().count()
+        attended_sessions = len(scope.attended(sessions))
         max_allowed_absence = 4  # veya sisteminizdeki değeri kullanın
         remaining_absence = max_allowed_absence - (total_sessions - attended_sessions)
 
@@ -87,13 +91,15 @@ def student_my_courses():
         flash('Öğrenci profiliniz bulunamadı.', 'danger')
         return redirect(url_for('auth.home'))
 
-    registered_course_relations = student_details.dersleri
+    registered_course_relations = CourseStudent.query.filter_by(OgrenciID=student_details.OgrenciID).\
+        options(joinedload(CourseStudent.ders_objesi)).order_by(CourseStudent.id).all()
     my_courses = [rel.ders_objesi for rel in registered_course_relations]
 
     return render_template('student_my_courses.html', my_courses=my_courses)
 
 @student_bp.route('/student/course_attendance/<int:course_id>')
 @login_required
+@read_replica
 def student_course_attendance(course_id):
     """
     Seçilen dersin haftalık yoklama durumunu gösterir.
@@ -122,9 +128,9 @@ def student_course_attendance(course_id):
 
     # Öğrencinin katıldığı oturumlar
     attended_session_ids = set(
-        r[0] for r in db.session.query(YoklamaKayit.OturumID)
-        .filter(YoklamaKayit.OgrenciID == student_details.OgrenciID)
-        .all()
+        session_id for session_id, _ in attendance_pairs(
+            course_id, [s.OturumID for s in sessions], [student_details.OgrenciID]
+        )
     )
 
     weekly_attendance = []
@@ -168,6 +174,7 @@ def student_course_attendance(course_id):
 
 
 @student_bp.route('/qr_scan', methods=['GET', 'POST'])
+@admission('checkin')
 def qr_scan():
     """
     Öğrenci QR kodu okutarak yoklama kaydı oluşturur.
@@ -191,33 +198,156 @@ def qr_scan():
         session_id = request.args.get('session_id', '')
         return render_template('student_scan_qr.html', session_id=session_id)
 
-    # POST işlemi
-    qr_data = request.form.get('qr_data')
+    # POST işlemi: QR'daki imzalı jeton toplu yüklemeyle aynı kurallarla, okutma anı şimdi kabul edilerek doğrulanır
     try:
-        qr_dict = json.loads(qr_data)
-        session_id = qr_dict.get('session_id')
-        session_obj = DersOturum.query.get(session_id)
-        if not session_obj:
-            flash('Oturum bulunamadı.', 'danger')
-            return redirect(url_for('student.student_dashboard'))
-    except Exception:
-        flash('Geçersiz QR kod.', 'danger')
+        token = json.loads(request.form.get('qr_data') or '').get('token')
+    except (ValueError, AttributeError):
+        token = None
+    results, records = verify_scans(student_details.OgrenciID, [
+        {'token': token, 'scanned_at': datetime.utcnow().isoformat()}
+    ])
+    if not records:
+        flash(SCAN_ERRORS.get(results[0], 'Geçersiz QR kod.'), 'danger')
         return redirect(url_for('student.student_dashboard'))
 
-    # Otomatik yoklama kaydı oluştur
-    # Zaten kaydı varsa tekrar eklenmesin
-    existing_record = YoklamaKayit.query.filter_by(OturumID=session_obj.OturumID, OgrenciID=student_details.OgrenciID).first()
-    if not existing_record:
-        new_record = YoklamaKayit(OturumID=session_obj.OturumID, OgrenciID=student_details.OgrenciID, KayitZamani=datetime.utcnow())
-        db.session.add(new_record)
+    session_id, (_, recorded_at) = next(iter(records.items()))
+    prepare_presence([session_id])
+    insert_attendance_records([(session_id, student_details.OgrenciID, recorded_at)])
+    db.session.commit()
+
+    # Akademisyen paneline yalnızca yeni katılan öğrenci gönderilir
+    mark_present(session_id, [
+        (student_details.OgrenciID, current_user.OgrenciNo, f"{current_user.Isim} {current_user.Soyisim}")
+    ])
+
+    flash('Yoklamanız başarıyla kaydedildi.', 'success')
+    return redirect(url_for('student.student_dashboard'))
+
+
+@student_bp.route('/qr_scan/batch', methods=['POST'])
+@admission('checkin')
+@login_required
+def qr_scan_batch():
+    """
+    Çevrimdışıyken cihazda kuyruğa alınan QR okutmalarını tek istekte kaydeder.
+    Her okutma imzalı QR jetonu ve okutma zamanından oluşur.
+    """
+    if not current_user.is_student():
+        return jsonify({'status': 'error', 'message': 'Yetkiniz yok'}), 403
+
+    student_details = get_current_student_details()
+    if not student_details:
+        return jsonify({'status': 'error', 'message': 'Öğrenci profiliniz bulunamadı.'}), 404
+
+    payload = request.get_json(silent=True) or {}
+    scans = payload.get('scans')
+    if not isinstance(scans, list) or not scans:
+        return jsonify({'status': 'error', 'message': 'Okutma listesi boş.'}), 400
+    if len(scans) > current_app.config['CHECKIN_BATCH_LIMIT']:
+        return jsonify({'status': 'error', 'message': 'Tek istekte çok fazla okutma gönderildi.'}), 413
+
+    results, records = verify_scans(student_details.OgrenciID, scans)
+    if records:
+        # Önceden kaydedilmiş oturumlar "duplicate" olarak raporlanır, ekleme yine de ON CONFLICT ile korunur
+        already_recorded = set(r[0] for r in db.session.query(YoklamaKayit.OturumID).filter(
+            YoklamaKayit.OgrenciID == student_details.OgrenciID,
+            YoklamaKayit.OturumID.in_(records.keys())
+        ).all())
+        new_records = []
+        for session_id, (index, recorded_at) in records.items():
+            if session_id in already_recorded:
+                results[index] = 'duplicate'
+            else:
+                new_records.append((session_id, student_details.OgrenciID, recorded_at))
+                results[index] = 'recorded'
+        prepare_presence([session_id for session_id, _, _ in new_records])
+        insert_attendance_records(new_records)
         db.session.commit()
 
-    # SocketIO ile canlı güncelleme gönder
-    student_full_name = f"{current_user.Isim} {current_user.Soyisim}"
-    student_no = current_user.OgrenciNo
+        student_name = f"{current_user.Isim} {current_user.Soyisim}"
+        for session_id, _, _ in new_records:
+            mark_present(session_id, [(student_details.OgrenciID, current_user.OgrenciNo, student_name)])
+
+    return jsonify({
+        'status': 'success',
+        'recorded': results.count('recorded'),
+        'results': [{'index': index, 'status': status} for index, status in enumerate(results)]
+    })
 
-    socketio.emit('attendance_update',
-                  {'student_name': student_full_name, 
-                   'student_no': student_no, 
-                   'student_id': student_details.OgrenciID},
-                  room=f'session_{session_obj.OturumID}')
\ No newline at end of file
+def parse_scanned_at(value):
+    """
+    İstemcinin gönderdiği okutma zamanını (epoch milisaniye veya ISO 8601) UTC datetime'a çevirir.
+    """
+    try:
+        if isinstance(value, (int, float)):
+            return datetime.utcfromtimestamp(value / 1000)
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
+    except (TypeError, ValueError, OverflowError, OSError):
+        return None
+
+# verify_scans durumlarının öğrenciye gösterilen karşılıkları
+SCAN_ERRORS = {
+    'expired': 'QR kodunun süresi dolmuş, lütfen ekrandaki güncel kodu okutun.',
+    'not_enrolled': 'Bu derse kayıtlı değilsiniz.',
+    'closed': 'Bu oturum sona ermiş.'
+}
+
+def verify_scans(student_id, scans):
+    """
+    Okutmaları jeton imzası, QR geçerlilik süresi, oturumun bitiş zamanı ve ders kaydına göre doğrular.
+    Okutma zamanı istemciden geldiğinden yükleme oturum bittikten en geç CHECKIN_OFFLINE_MAX_AGE sonra kabul edilir.
+    (her okutmanın durumu, {OturumID: (okutma sırası, kayıt zamanı)}) döndürür.
+    """
+    now = datetime.utcnow()
+    skew = timedelta(seconds=current_app.config['CHECKIN_CLOCK_SKEW'])
+    validity = timedelta(seconds=current_app.config['QR_CODE_DURATION'])
+    grace = timedelta(seconds=current_app.config['CHECKIN_OFFLINE_MAX_AGE'])
+    max_duration = timedelta(seconds=current_app.config['SESSION_MAX_DURATION'])
+
+    results = ['invalid'] * len(scans)
+    candidates = {}
+    for index, scan in enumerate(scans):
+        if not isinstance(scan, dict):
+            continue
+        verified = verify_qr_token(scan.get('token'))
+        scanned_at = parse_scanned_at(scan.get('scanned_at'))
+        if not verified or scanned_at is None:
+            continue
+        session_id, issued_at = verified
+        # QR kodu ekranda en fazla QR_CODE_DURATION saniye geçerlidir
+        if not (issued_at - skew <= scanned_at <= min(issued_at + validity, now) + skew):
+            results[index] = 'expired'
+            continue
+        if session_id in candidates:
+            results[index] = 'duplicate'
+            continue
+        recorded_at = min(max(scanned_at, issued_at), now)
+        candidates[session_id] = (index, recorded_at, issued_at)
+
+    if not candidates:
+        return results, {}
+
+    sessions = DersOturum.query.filter(DersOturum.OturumID.in_(candidates.keys())).all()
+    enrolled_courses = set(r[0] for r in db.session.query(CourseStudent.DersID).filter(
+        CourseStudent.OgrenciID == student_id,
+        CourseStudent.DersID.in_(set(s.DersID for s in sessions))
+    ).all())
+
+    records = {}
+    for session_obj in sessions:
+        index, recorded_at, issued_at = candidates[session_obj.OturumID]
+        if session_obj.DersID not in enrolled_courses:
+            results[index] = 'not_enrolled'
+        elif session_obj.BitisZamani and (issued_at > session_obj.BitisZamani + skew or
+                                          now > session_obj.BitisZamani + grace):
+            results[index] = 'closed'
+        elif (not session_obj.BitisZamani and max_duration and
+              # BaslangicZamani start_attendance'ta yerel saatle yazılır
+              datetime.now() > session_obj.BaslangicZamani + max_duration + grace):
+            results[index] = 'closed'
+        else:
+            records[session_obj.OturumID] = (index, recorded_at)
+    return results, records
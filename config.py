@@ -13,10 +13,91 @@ class Config:
     SQLALCHEMY_DATABASE_URI = db_uri
     # --- KONTROL EDİLECEK BÖLÜMÜN SONU ---
 
+    # Rapor ve panel okumaları için replika (ör. sqlite:///replica.db); tanımlı değilse birincil kullanılır
+    replica_uri = os.environ.get('REPLICA_DATABASE_URL')
+    if replica_uri and replica_uri.startswith("postgres://"):
+        replica_uri = replica_uri.replace("postgres://", "postgresql://", 1)
+    SQLALCHEMY_BINDS = {'replica': replica_uri} if replica_uri else {}
+    # Kullanıcı yazma yaptıktan sonra bu süre boyunca okumaları birincilden yapılır
+    REPLICA_STALENESS_SECONDS = int(os.environ.get('REPLICA_STALENESS_SECONDS', 10))
+
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Geliştirme ve testte '1' yapılırsa yükleme stratejisi belirtilmemiş ilişkilere erişim
+    # SQL çalıştırmak yerine hata fırlatır; yeni N+1 sorgular hemen fark edilir (models.py)
+    SQLALCHEMY_RAISE_ON_LAZY_LOAD = os.environ.get('SQLALCHEMY_RAISE_ON_LAZY_LOAD') == '1'
     UPLOAD_FOLDER = 'uploads'
+    ARCHIVE_FOLDER = os.environ.get('ARCHIVE_FOLDER', 'archive')
     ALLOWED_EXTENSIONS = {'csv', 'xlsx', 'xls'}
     MAX_ABSENCE_PERCENTAGE = 30
+    # Rapor grafikleri: 'svg' (bağımlılıksız, sayfaya gömülür) veya 'matplotlib' (PNG, isteğe bağlı)
+    CHART_BACKEND = os.environ.get('CHART_BACKEND', 'svg')
     QR_REFRESH_SECONDS = 5
     QR_REFRESH_INTERVAL = 5
     QR_CODE_DURATION = 30
+    # Çevrimdışı toplu yoklama yüklemesi
+    CHECKIN_BATCH_LIMIT = 200
+    CHECKIN_CLOCK_SKEW = 60
+    # Okutma oturum bittikten (BitisZamani; açık oturumda başlangıç + SESSION_MAX_DURATION) en geç
+    # bu süre (saniye) sonra yüklenmeli; ekran fotoğrafının ders bitince başka bir cihazdan
+    # kullanılabileceği süreyi sınırlar
+    CHECKIN_OFFLINE_MAX_AGE = int(os.environ.get('CHECKIN_OFFLINE_MAX_AGE', 15 * 60))
+    # Öğrenci listesi önizlemesinin onaylanabileceği süre (saniye)
+    ROSTER_PREVIEW_MAX_AGE = 3600
+    PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 200
+    # Şifre hash yöntemi ve maliyeti; değiştirildiğinde eski hash'ler girişte güncellenir
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    # Bloklayan işler için havuz ayarları (utils/offload.py)
+    OFFLOAD_PROCESS_WORKERS = int(os.environ.get('OFFLOAD_PROCESS_WORKERS', 2))
+    OFFLOAD_PROCESS_MAX_PENDING = int(os.environ.get('OFFLOAD_PROCESS_MAX_PENDING', 16))
+    OFFLOAD_PROCESS_TIMEOUT = int(os.environ.get('OFFLOAD_PROCESS_TIMEOUT', 30))
+    OFFLOAD_THREAD_WORKERS = int(os.environ.get('OFFLOAD_THREAD_WORKERS', 4))
+    OFFLOAD_THREAD_MAX_PENDING = int(os.environ.get('OFFLOAD_THREAD_MAX_PENDING', 64))
+    OFFLOAD_THREAD_TIMEOUT = int(os.environ.get('OFFLOAD_THREAD_TIMEOUT', 10))
+    # Kabul denetimi (utils/admission.py). Toplam sınır veritabanı bağlantı havuzundan
+    # (varsayılan 5 + 10 taşma) küçük tutulur; kalan bağlantılar QR ve panel sayfalarına kalır.
+    ADMISSION_MAX_ACTIVE = int(os.environ.get('ADMISSION_MAX_ACTIVE', 10))
+    # Yoklama (öncelikli): toplam sınırın tamamını kullanabilir, uzun kuyruk
+    ADMISSION_CHECKIN_MAX_ACTIVE = int(os.environ.get('ADMISSION_CHECKIN_MAX_ACTIVE', 10))
+    ADMISSION_CHECKIN_MAX_WAITING = int(os.environ.get('ADMISSION_CHECKIN_MAX_WAITING', 200))
+    ADMISSION_CHECKIN_WAIT_TIMEOUT = float(os.environ.get('ADMISSION_CHECKIN_WAIT_TIMEOUT', 5))
+    ADMISSION_CHECKIN_RETRY_AFTER = int(os.environ.get('ADMISSION_CHECKIN_RETRY_AFTER', 2))
+    # Raporlar: birkaç slot, kısa kuyruk; yoklama bekliyorsa sıra verilmez
+    ADMISSION_REPORT_MAX_ACTIVE = int(os.environ.get('ADMISSION_REPORT_MAX_ACTIVE', 3))
+    ADMISSION_REPORT_MAX_WAITING = int(os.environ.get('ADMISSION_REPORT_MAX_WAITING', 10))
+    ADMISSION_REPORT_WAIT_TIMEOUT = float(os.environ.get('ADMISSION_REPORT_WAIT_TIMEOUT', 2))
+    ADMISSION_REPORT_RETRY_AFTER = int(os.environ.get('ADMISSION_REPORT_RETRY_AFTER', 5))
+    # İstek izleme (utils/tracing.py): dosya yolu (OTLP JSON satırları) veya OTLP/HTTP adresi
+    # (ör. http://localhost:4318/v1/traces); boşsa izleme tamamen kapalıdır
+    TRACE_EXPORT = os.environ.get('TRACE_EXPORT', '')
+    TRACE_SERVICE_NAME = os.environ.get('TRACE_SERVICE_NAME', 'yoklama')
+    # Rastgele örneklenen isteklerin oranı (0-1); gelen traceparent başlığının kararı önceliklidir
+    TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', 0.01))
+    # 0'dan büyükse örneklenmeyen istekler de kaydedilir ve bu süreyi (ms) aşanlar aktarılır
+    TRACE_SLOW_REQUEST_MS = int(os.environ.get('TRACE_SLOW_REQUEST_MS', 0))
+    # Büyük rapor isteklerinde bellek sınırı; fazlası sayılıp atılır
+    TRACE_MAX_SPANS = int(os.environ.get('TRACE_MAX_SPANS', 500))
+    # Yavaş sorgu günlüğü (utils/slow_queries.py): eşik milisaniye, 0 kapalı
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 0))
+    # Her yavaş sorgu parmak izinin ilk örneği için EXPLAIN planı alınır (SQLite ve PostgreSQL)
+    SLOW_QUERY_EXPLAIN = os.environ.get('SLOW_QUERY_EXPLAIN', '1') == '1'
+    SLOW_QUERY_MAX_FINGERPRINTS = int(os.environ.get('SLOW_QUERY_MAX_FINGERPRINTS', 500))
+    # Bakım zamanlayıcısı (utils/maintenance.py): her işçide çalışır, her iş veritabanı kilidiyle tek işçide yürür
+    MAINTENANCE_ENABLED = os.environ.get('MAINTENANCE_ENABLED', '1') == '1'
+    MAINTENANCE_TICK = int(os.environ.get('MAINTENANCE_TICK', 60))
+    # Bu süre içinde bitmeyen işin kilidi (ör. işçi öldüyse) başka işçiye geçer
+    MAINTENANCE_LEASE_SECONDS = int(os.environ.get('MAINTENANCE_LEASE_SECONDS', 900))
+    # Akademisyenin durdurmayı unuttuğu oturumlar bu süreden (saniye) sonra kapatılır; 0 kapalı
+    SESSION_MAX_DURATION = int(os.environ.get('SESSION_MAX_DURATION', 4 * 3600))
+    # İş aralıkları (saniye); 0 işi kapatır. SQLite VACUUM veritabanını kilitler, seyrek tutulur
+    MAINTENANCE_CLOSE_SESSIONS_INTERVAL = int(os.environ.get('MAINTENANCE_CLOSE_SESSIONS_INTERVAL', 300))
+    MAINTENANCE_PURGE_TOKENS_INTERVAL = int(os.environ.get('MAINTENANCE_PURGE_TOKENS_INTERVAL', 3600))
+    MAINTENANCE_DERIVED_INTERVAL = int(os.environ.get('MAINTENANCE_DERIVED_INTERVAL', 3600))
+    MAINTENANCE_ANALYZE_INTERVAL = int(os.environ.get('MAINTENANCE_ANALYZE_INTERVAL', 24 * 3600))
+    MAINTENANCE_VACUUM_INTERVAL = int(os.environ.get('MAINTENANCE_VACUUM_INTERVAL', 7 * 24 * 3600))
+    # Derlenmiş şablonların yazıldığı dizin (instance klasörüne göre); boşsa bayt kodu önbelleği kapalı
+    JINJA_BYTECODE_CACHE = os.environ.get('JINJA_BYTECODE_CACHE', 'jinja_cache')
+    # {% cache %} parça önbelleği (utils/templating.py): en fazla girdi sayısı (0 kapalı) ve
+    # ders sürümüne girmeyen değişikliklerin (ör. öğrenci adı) en geç görüneceği süre (saniye)
+    FRAGMENT_CACHE_SIZE = int(os.environ.get('FRAGMENT_CACHE_SIZE', 500))
+    FRAGMENT_CACHE_TTL = int(os.environ.get('FRAGMENT_CACHE_TTL', 300))
@@ -1,7 +1,8 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_socketio import SocketIO
+from utils.replica import RoutingSession
 
-db = SQLAlchemy()  # Veritabanı bağlantısı
+db = SQLAlchemy(session_options={'class_': RoutingSession})  # Veritabanı bağlantısı (okumalar replikaya yönlendirilebilir)
 login_manager = LoginManager()  # Kullanıcı oturum yönetimi
 socketio = SocketIO()  # Gerçek zamanlı iletişim
\ No newline at end of file
@@ -4,7 +4,7 @@ import os
 from werkzeug.security import generate_password_hash
 from app import app  # Ana app nesnesini import ediyoruz
 from extensions import db
-from models import init_db, User, Akademisyen
+from models import init_db, User, Akademisyen, delete_orphan_attendance
 
 print("Render Build: Veritabanı ve başlangıç verileri oluşturuluyor...")
 
@@ -14,6 +14,12 @@ with app.app_context():
     init_db(app)
     print("Tablolar oluşturuldu.")
 
+    # Eski sürümlerde ders silinirken geride kalan yoklama kayıtlarını temizle
+    orphan_count = delete_orphan_attendance()
+    db.session.commit()
+    if orphan_count:
+        print(f"{orphan_count} sahipsiz yoklama kaydı silindi.")
+
     # akademisyen_kayit.txt dosyasından ilk kullanıcıyı ekler
     akademisyen_txt = 'akademisyen_kayit.txt'
     if os.path.exists(akademisyen_txt):
@@ -2,7 +2,17 @@ from extensions import db
 from flask_login import UserMixin
 from datetime import datetime
 import json
-from werkzeug.security import check_password_hash
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import joinedload
+from sqlalchemy.schema import CreateIndex
+from config import Config
+from utils.auth import verify_password as verify_password_hash
+
+# İlişkilerin varsayılan yükleme stratejisi. İlişkiye erişen her sorgu kendi
+# joinedload/selectinload seçeneğini belirtir; test ve geliştirmede belirtilmeyen
+# erişimler 'raise_on_sql' ile hata verir (kimlik haritasından okunanlar hariç).
+LAZY = 'raise_on_sql' if Config.SQLALCHEMY_RAISE_ON_LAZY_LOAD else 'select'
 
 
 class User(UserMixin, db.Model):
@@ -19,8 +29,8 @@ class User(UserMixin, db.Model):
     Soyisim = db.Column(db.String(50), nullable=False)
     is_active_user = db.Column(db.Boolean, default=True, nullable=False)
 
-    academician_details = db.relationship('Akademisyen', backref='user_account', uselist=False, lazy=True)
-    student_details = db.relationship('Student', backref='user', uselist=False, lazy=True)
+    academician_details = db.relationship('Akademisyen', backref=db.backref('user_account', lazy=LAZY), uselist=False, lazy=LAZY)
+    student_details = db.relationship('Student', backref=db.backref('user', lazy=LAZY), uselist=False, lazy=LAZY)
 
     def is_academician(self):
         return self.UserType == 'academician'
@@ -31,12 +41,31 @@ class User(UserMixin, db.Model):
     def get_id(self):
         return str(self.id)
     def verify_password(self, password):
-        return check_password_hash(self.SifreHash, password)
+        return verify_password_hash(self.SifreHash, password)
 
     @property
     def student_detail(self):
         return self.student_details[0] if self.student_details else None
 
+    @classmethod
+    def find_by_login(cls, email_or_no):
+        """
+        Giriş bilgisinden kullanıcıyı büyük/küçük harf duyarsız bulur.
+        Girdi biçimine göre yalnızca e-posta ya da öğrenci numarası indeksi kullanılır.
+        """
+        identifier = (email_or_no or '').strip().lower()
+        if not identifier:
+            return None
+        # Girişte öğrenci kaydının durumu da kontrol edildiğinden birlikte yüklenir
+        query = cls.query.options(joinedload(cls.student_details))
+        if '@' in identifier:
+            return query.filter(func.lower(cls.Email) == identifier).first()
+        return query.filter(func.lower(cls.OgrenciNo) == identifier).first()
+
+# Giriş sorguları lower() ile yapıldığından fonksiyonel indeksler gerekir
+db.Index('ix_kullanicilar_email_lower', func.lower(User.Email))
+db.Index('ix_kullanicilar_ogrencino_lower', func.lower(User.OgrenciNo))
+
 class Akademisyen(db.Model):
     """
     Akademisyenlerin temel bilgilerini tutar. User ile ilişkilidir.
@@ -72,7 +101,7 @@ class Ders(db.Model):
     DevamZorunluluguVarMi = db.Column(db.Boolean, default=True, nullable=False)
     AkademisyenID = db.Column(db.Integer, db.ForeignKey('Akademisyenler.AkademisyenID'), nullable=False)
 
-    akademisyen = db.relationship('Akademisyen', backref=db.backref('verdii_dersler', lazy=True))
+    akademisyen = db.relationship('Akademisyen', backref=db.backref('verdii_dersler', lazy=LAZY), lazy=LAZY)
 
     __table_args__ = (db.UniqueConstraint('DersKodu', 'DersYili', 'DersDonemi', 'AkademisyenID', name='_ders_akademisyen_uc'),)
 
@@ -86,8 +115,8 @@ class CourseStudent(db.Model):
     OgrenciID = db.Column(db.Integer, db.ForeignKey('Ogrenciler.OgrenciID'), nullable=False)
     KayitTarihi = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
-    ders_objesi = db.relationship('Ders', backref=db.backref('kayitli_ogrenciler', lazy=True, cascade="all, delete-orphan"))
-    ogrenci_objesi = db.relationship('Student', foreign_keys=[OgrenciID], backref=db.backref('dersleri', lazy=True, cascade="all, delete-orphan"))
+    ders_objesi = db.relationship('Ders', backref=db.backref('kayitli_ogrenciler', lazy=LAZY, cascade="all, delete-orphan"), lazy=LAZY)
+    ogrenci_objesi = db.relationship('Student', foreign_keys=[OgrenciID], backref=db.backref('dersleri', lazy=LAZY, cascade="all, delete-orphan"), lazy=LAZY)
 
     __table_args__ = (db.UniqueConstraint('DersID', 'OgrenciID', name='_ders_ogrenci_uc'),)
 
@@ -108,7 +137,7 @@ class DersOturum(db.Model):
     QR_CODE_VERSION = db.Column(db.Integer, default=1)
     
     # İlişki tanımı
-    ders = db.relationship('Ders', backref=db.backref('oturumlar', lazy=True))
+    ders = db.relationship('Ders', backref=db.backref('oturumlar', lazy=LAZY), lazy=LAZY)
     
     # DÜZELTİLMİŞ __table_args__ tanımı (tuple olarak)
     __table_args__ = (
@@ -137,8 +166,13 @@ class YoklamaKayit(db.Model):
     OgrenciID = db.Column(db.Integer, db.ForeignKey('Ogrenciler.OgrenciID'), nullable=False)
     KayitZamani = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
-    oturum = db.relationship('DersOturum', backref=db.backref('yoklama_kayitlari', lazy=True))
-    ogrenci = db.relationship('Student', backref=db.backref('yoklama_kayitlari', lazy=True))
+    oturum = db.relationship('DersOturum', backref=db.backref('yoklama_kayitlari', lazy=LAZY), lazy=LAZY)
+    ogrenci = db.relationship('Student', backref=db.backref('yoklama_kayitlari', lazy=LAZY), lazy=LAZY)
+
+    __table_args__ = (
+        # Öğrenci başına oturumda tek kayıt kuralını veritabanı korur (insert_attendance_records)
+        db.Index('ux_yoklama_oturum_ogrenci', 'OturumID', 'OgrenciID', unique=True),
+    )
 
 class PasswordResetToken(db.Model):
     """
@@ -150,11 +184,84 @@ class PasswordResetToken(db.Model):
     token = db.Column(db.String(128), unique=True, nullable=False)
     expiration_time = db.Column(db.DateTime, nullable=False)
 
-    user = db.relationship('User', backref=db.backref('password_reset_tokens', lazy=True))
+    user = db.relationship('User', backref=db.backref('password_reset_tokens', lazy=LAZY), lazy=LAZY)
+
+class MaintenanceLease(db.Model):
+    """
+    Bakım işlerinin zamanlamasını ve kilidini tutar (utils/maintenance.py). Zamanlar UTC'dir.
+    """
+    __tablename__ = 'maintenance_leases'
+    name = db.Column(db.String(50), primary_key=True)
+    owner = db.Column(db.String(100))
+    lease_until = db.Column(db.DateTime)
+    next_run = db.Column(db.DateTime, nullable=False)
+    last_run = db.Column(db.DateTime)
+    last_status = db.Column(db.String(200))
+
+def delete_sessions_cascade(session_ids):
+    """
+    Verilen oturumları yoklama kayıtlarıyla birlikte küme tabanlı siler.
+    Nesneler belleğe yüklenmez; commit çağırana bırakılır.
+    """
+    YoklamaKayit.query.filter(YoklamaKayit.OturumID.in_(session_ids)).delete(synchronize_session=False)
+    DersOturum.query.filter(DersOturum.OturumID.in_(session_ids)).delete(synchronize_session=False)
+
+def delete_course_cascade(course_id):
+    """
+    Dersi; oturumları, yoklama kayıtları ve öğrenci kayıtlarıyla birlikte küme tabanlı siler.
+    Toplam dört DELETE ifadesi çalışır; commit çağırana bırakılır.
+    """
+    course_sessions = select(DersOturum.OturumID).where(DersOturum.DersID == course_id)
+    YoklamaKayit.query.filter(YoklamaKayit.OturumID.in_(course_sessions)).delete(synchronize_session=False)
+    DersOturum.query.filter(DersOturum.DersID == course_id).delete(synchronize_session=False)
+    CourseStudent.query.filter(CourseStudent.DersID == course_id).delete(synchronize_session=False)
+    Ders.query.filter(Ders.DersID == course_id).delete(synchronize_session=False)
+
+def insert_attendance_records(records):
+    """
+    (OturumID, OgrenciID, KayitZamani) kayıtlarını tek bir INSERT ifadesiyle ekler.
+    Tabloda zaten bulunan (oturum, öğrenci) çiftleri benzersiz indeks üzerinden ON CONFLICT DO NOTHING
+    ile atlanır; aynı anda gelen iki istek de çift kayıt oluşturamaz.
+    Eklenen satır sayısını döndürür; commit çağırana bırakılır.
+    """
+    if not records:
+        return 0
+    dialect_insert = postgresql.insert if db.session.get_bind().dialect.name == 'postgresql' else sqlite.insert
+    statement = dialect_insert(YoklamaKayit).values([
+        {'OturumID': session_id, 'OgrenciID': student_id, 'KayitZamani': recorded_at}
+        for session_id, student_id, recorded_at in records
+    ]).on_conflict_do_nothing(index_elements=['OturumID', 'OgrenciID'])
+    return db.session.execute(statement).rowcount
+
+def delete_duplicate_attendance():
+    """
+    Aynı (oturum, öğrenci) çifti için birden fazla yoklama kaydı varsa en eskisini bırakıp
+    diğerlerini siler (benzersiz indeks öncesi sürümlerden kalanlar). Silinen satır sayısını döndürür.
+    """
+    first_records = select(func.min(YoklamaKayit.KayitID)).group_by(YoklamaKayit.OturumID, YoklamaKayit.OgrenciID)
+    return YoklamaKayit.query.filter(~YoklamaKayit.KayitID.in_(first_records)).delete(synchronize_session=False)
+
+def delete_orphan_attendance():
+    """
+    Oturumu artık bulunmayan yoklama kayıtlarını siler ve silinen satır sayısını döndürür.
+    """
+    existing_sessions = select(DersOturum.OturumID)
+    return YoklamaKayit.query.filter(~YoklamaKayit.OturumID.in_(existing_sessions)).delete(synchronize_session=False)
 
 def init_db(app):
     """
     Veritabanı tablolarını oluşturur.
     """
     with app.app_context():
-        db.create_all()
\ No newline at end of file
+        db.create_all()
+        # Benzersiz indeks eski, benzersiz olmayan ix_yoklama_oturum_ogrenci'nin yerini alır;
+        # oluşturulabilmesi için önce çift kayıtlar temizlenir
+        delete_duplicate_attendance()
+        db.session.commit()
+        # create_all mevcut tablolara sonradan eklenen indeksleri oluşturmaz
+        # (ifade indeksleri yansıtılamadığından IF NOT EXISTS kullanılır)
+        with db.engine.begin() as connection:
+            connection.execute(text('DROP INDEX IF EXISTS ix_yoklama_oturum_ogrenci'))
+            for table in db.metadata.sorted_tables:
+                for index in table.indexes:
+                    connection.execute(CreateIndex(index, if_not_exists=True))
\ No newline at end of file
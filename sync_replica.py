@@ -0,0 +1,42 @@
+# sync_replica.py
+#
+# Yerel geliştirmede iki SQLite dosyası ile okuma replikasını dener.
+# Birincil veritabanını REPLICA_DATABASE_URL dosyasına kopyalar; çalıştırılmadığı
+# sürece replika geride kalır, böylece gecikme ve birincile geri dönüş gözlemlenebilir.
+#
+# Kullanım:
+#     export REPLICA_DATABASE_URL=sqlite:///replica.db
+#     python sync_replica.py            # tek seferlik kopya
+#     python sync_replica.py 5          # 5 saniyede bir kopyala
+
+import sqlite3
+import sys
+import time
+from app import app
+from extensions import db
+from utils.replica import REPLICA_BIND
+
+with app.app_context():
+    if REPLICA_BIND not in db.engines:
+        print("REPLICA_DATABASE_URL tanımlı değil.")
+        sys.exit(1)
+    primary_path = db.engine.url.database
+    replica_path = db.engines[REPLICA_BIND].url.database
+    if db.engine.url.get_backend_name() != 'sqlite' or db.engines[REPLICA_BIND].url.get_backend_name() != 'sqlite':
+        print("Bu betik yalnızca SQLite dosyaları için kullanılabilir; diğer veritabanlarında yerleşik replikasyonu kullanın.")
+        sys.exit(1)
+
+interval = float(sys.argv[1]) if len(sys.argv) > 1 else None
+
+while True:
+    # SQLite yedekleme API'si, birincil kullanılırken tutarlı bir kopya alır
+    source = sqlite3.connect(primary_path)
+    target = sqlite3.connect(replica_path)
+    with target:
+        source.backup(target)
+    source.close()
+    target.close()
+    print(f"{time.strftime('%H:%M:%S')} replika güncellendi: {replica_path}")
+    if interval is None:
+        break
+    time.sleep(interval)
@@ -0,0 +1,62 @@
+"""
+Testlerin ortak ortamı ve fikstürleri.
+
+Uygulama konfigürasyonu içe aktarılırken okunduğundan ortam, test modülleri uygulamayı
+içe aktarmadan önce burada ayarlanır. SQLALCHEMY_RAISE_ON_LAZY_LOAD açıktır: önceden
+yüklenmemiş bir ilişkiye erişen görünüm test sırasında hata verir.
+"""
+import os
+import sys
+import tempfile
+
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'test.db')
+os.environ['MAINTENANCE_ENABLED'] = '0'
+os.environ['SQLALCHEMY_RAISE_ON_LAZY_LOAD'] = '1'
+os.environ['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from app import app
+from extensions import db
+from models import User, Akademisyen
+from utils.auth import hash_password
+
+
+def _login(client, email_or_no, password):
+    response = client.post('/login', data={'email_or_no': email_or_no, 'password': password})
+    assert response.status_code == 302
+    return client
+
+
+@pytest.fixture
+def login():
+    """
+    Verilen test istemcisiyle oturum açan yardımcı; başarılı girişte yönlendirme beklenir.
+    """
+    return _login
+
+
+@pytest.fixture
+def database():
+    """
+    Boş bir veritabanı ve hoca@bandirma.edu.tr / secret1 akademisyen hesabı hazırlar.
+    """
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = User(Email='hoca@bandirma.edu.tr', SifreHash=hash_password('secret1'), UserType='academician',
+                    Isim='Ali', Soyisim='Hoca')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Akademisyen(UserID=user.id))
+        db.session.commit()
+    yield db
+
+
+@pytest.fixture
+def client(database):
+    """
+    Akademisyen olarak oturum açmış test istemcisi.
+    """
+    return _login(app.test_client(), 'hoca@bandirma.edu.tr', 'secret1')
@@ -0,0 +1,114 @@
+"""
+Oturum ve ders silmenin kayıt sayısından bağımsız, sabit sayıda ifadeyle çalıştığını ve
+geride yoklama veya ders kaydı bırakmadığını doğrular.
+
+Kullanım:
+    python -m pytest tests/test_delete_cascade.py
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from app import app
+from extensions import db
+from models import User, Akademisyen, Student, Ders, CourseStudent, DersOturum, YoklamaKayit
+
+
+def create_course(code, student_count, session_count):
+    """
+    Her öğrencinin her oturuma katıldığı bir ders oluşturur; (DersID, OturumID listesi) döndürür.
+    """
+    academician = Akademisyen.query.first()
+    course = Ders(DersKodu=code, DersAdi=code, DersYili='2025', DersDonemi='Güz',
+                  AkademisyenID=academician.AkademisyenID)
+    db.session.add(course)
+    db.session.flush()
+    students = []
+    for i in range(student_count):
+        user = User(OgrenciNo=f'{code}{i:04d}', SifreHash='x', UserType='student', Isim='Öğrenci', Soyisim=str(i))
+        db.session.add(user)
+        db.session.flush()
+        student = Student(UserID=user.id, OgrenciNo=user.OgrenciNo)
+        db.session.add(student)
+        db.session.flush()
+        db.session.add(CourseStudent(DersID=course.DersID, OgrenciID=student.OgrenciID))
+        students.append(student)
+    session_ids = []
+    start = datetime(2025, 9, 15, 9, 0)
+    for week in range(1, session_count + 1):
+        session_obj = DersOturum(DersID=course.DersID, OturumNumarasi=week, OturumSiraNumarasi=1,
+                                 BaslangicZamani=start + timedelta(days=7 * week), AktifMi=False)
+        db.session.add(session_obj)
+        db.session.flush()
+        session_ids.append(session_obj.OturumID)
+        for student in students:
+            db.session.add(YoklamaKayit(OturumID=session_obj.OturumID, OgrenciID=student.OgrenciID))
+    db.session.commit()
+    return course.DersID, session_ids
+
+
+def count_statements(client, url):
+    """
+    İsteği gönderir; (yanıt, tüm ifadeler, DELETE ifadeleri) döndürür.
+    """
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = client.post(url)
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    deletes = [statement for statement in statements if statement.lstrip().upper().startswith('DELETE')]
+    return response, statements, deletes
+
+
+def test_delete_session_statement_count(client):
+    with app.app_context():
+        _, small_sessions = create_course('BM101', 2, 2)
+        _, large_sessions = create_course('BM102', 40, 2)
+
+    _, small_statements, small_deletes = count_statements(client, f'/delete_session/{small_sessions[0]}')
+    response, large_statements, large_deletes = count_statements(client, f'/delete_session/{large_sessions[0]}')
+
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'success'
+    # Yoklama kayıtları ve oturum: iki DELETE, öğrenci sayısından bağımsız
+    assert len(small_deletes) == len(large_deletes) == 2
+    assert len(small_statements) == len(large_statements)
+
+    with app.app_context():
+        for session_id in (small_sessions[0], large_sessions[0]):
+            assert db.session.get(DersOturum, session_id) is None
+            assert YoklamaKayit.query.filter_by(OturumID=session_id).count() == 0
+        # Aynı dersin diğer oturumu etkilenmez
+        assert YoklamaKayit.query.filter_by(OturumID=large_sessions[1]).count() == 40
+
+
+def test_delete_course_statement_count(client):
+    with app.app_context():
+        small_course, _ = create_course('BM101', 2, 2)
+        large_course, _ = create_course('BM102', 30, 6)
+        kept_course, kept_sessions = create_course('BM103', 3, 2)
+
+    _, small_statements, small_deletes = count_statements(client, f'/delete_course/{small_course}')
+    response, large_statements, large_deletes = count_statements(client, f'/delete_course/{large_course}')
+
+    assert response.status_code == 302
+    # Yoklama kayıtları, oturumlar, ders öğrencileri ve ders: dört DELETE
+    assert len(small_deletes) == len(large_deletes) == 4
+    assert len(small_statements) == len(large_statements)
+
+    with app.app_context():
+        for course_id in (small_course, large_course):
+            assert db.session.get(Ders, course_id) is None
+            assert DersOturum.query.filter_by(DersID=course_id).count() == 0
+            assert CourseStudent.query.filter_by(DersID=course_id).count() == 0
+        # Oturumu kalmayan yoklama kaydı yok; diğer ders olduğu gibi durur
+        orphans = YoklamaKayit.query.filter(~YoklamaKayit.OturumID.in_(db.session.query(DersOturum.OturumID)))
+        assert orphans.count() == 0
+        assert YoklamaKayit.query.filter(YoklamaKayit.OturumID.in_(kept_sessions)).count() == 6
+        assert CourseStudent.query.filter_by(DersID=kept_course).count() == 3
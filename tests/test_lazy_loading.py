@@ -0,0 +1,100 @@
+"""
+Rapor, ders listesi ve oturum sayfalarını akademisyen ve öğrenci olarak gezer. Testlerde
+SQLALCHEMY_RAISE_ON_LAZY_LOAD açık olduğundan (tests/conftest.py) önceden yüklenmemiş bir
+ilişkiye erişen görünüm 500 döndürür.
+
+Kullanım:
+    python -m pytest tests/test_lazy_loading.py
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from app import app
+from extensions import db
+from models import User, Akademisyen, Student, Ders, CourseStudent, DersOturum, YoklamaKayit
+from utils.auth import hash_password
+
+ACADEMICIAN_URLS = [
+    '/dashboard',
+    '/courses',
+    '/reports',
+    '/reports_dashboard',
+    '/course_students/{course_id}',
+    '/course_sessions/{course_id}',
+    '/attendance_report/{course_id}',
+    '/attendance_report/{course_id}/heatmap',
+    '/download_attendance_report/{course_id}',
+    '/reports/{course_id}',
+    '/reports/{course_id}/class_list',
+    '/reports/{course_id}/full_attendance',
+    '/reports/{course_id}/failing_students',
+    '/reports/{course_id}/borderline_students',
+    '/reports/{course_id}/attendance_chart',
+    '/reports/{course_id}/weekly_chart',
+    '/reports/{course_id}/overall_pie',
+    '/reports/export',
+    '/generate_qr/{session_id}',
+    '/refresh_qr/{session_id}',
+    '/live_attendance/{session_id}',
+]
+
+STUDENT_URLS = [
+    '/student_dashboard',
+    '/student/my_courses',
+    '/student/course_attendance/{course_id}',
+    '/qr_scan',
+]
+
+
+@pytest.fixture
+def course(database):
+    """
+    Üç öğrencili, üç geçmiş ve bir etkin oturumlu bir ders oluşturur; (DersID, etkin OturumID) döndürür.
+    """
+    with app.app_context():
+        academician = Akademisyen.query.first()
+        course = Ders(DersKodu='BM101', DersAdi='Programlama', DersYili='2025', DersDonemi='Güz',
+                      AkademisyenID=academician.AkademisyenID)
+        db.session.add(course)
+        db.session.flush()
+        students = []
+        for i in range(3):
+            user = User(Email=f's{i}@ogr.bandirma.edu.tr', OgrenciNo=f'2025{i:04d}',
+                        SifreHash=hash_password('secret1'), UserType='student', Isim='Öğrenci', Soyisim=str(i))
+            db.session.add(user)
+            db.session.flush()
+            student = Student(UserID=user.id, OgrenciNo=user.OgrenciNo)
+            db.session.add(student)
+            db.session.flush()
+            db.session.add(CourseStudent(DersID=course.DersID, OgrenciID=student.OgrenciID))
+            students.append(student)
+        start = datetime.utcnow() - timedelta(days=28)
+        for week in range(1, 5):
+            session_obj = DersOturum(DersID=course.DersID, OturumNumarasi=week, OturumSiraNumarasi=1,
+                                     BaslangicZamani=start + timedelta(days=7 * week), AktifMi=week == 4,
+                                     QR_CODE_VERSION=1)
+            db.session.add(session_obj)
+            db.session.flush()
+            for i, student in enumerate(students):
+                if (i + week) % 3:
+                    db.session.add(YoklamaKayit(OturumID=session_obj.OturumID, OgrenciID=student.OgrenciID,
+                                                KayitZamani=session_obj.BaslangicZamani))
+        db.session.commit()
+        return course.DersID, session_obj.OturumID
+
+
+@pytest.mark.parametrize('url', ACADEMICIAN_URLS)
+def test_academician_pages(client, course, url):
+    course_id, session_id = course
+    response = client.get(url.format(course_id=course_id, session_id=session_id))
+    assert response.status_code == 200
+    response.get_data()
+
+
+@pytest.mark.parametrize('url', STUDENT_URLS)
+def test_student_pages(database, course, login, url):
+    course_id, _ = course
+    client = login(app.test_client(), '20250001', 'secret1')
+    response = client.get(url.format(course_id=course_id))
+    assert response.status_code == 200
+    response.get_data()
@@ -0,0 +1,96 @@
+"""
+Çevrimdışı okutmaların oturum bittikten sonra yalnızca CHECKIN_OFFLINE_MAX_AGE süresince
+yüklenebildiğini doğrular: ekran fotoğrafıyla iletilen jeton, okutma zamanı jetonun üretim
+zamanı olarak gönderilse de ders bittikten saatler sonra kabul edilmez.
+
+Kullanım:
+    python -m pytest tests/test_offline_checkin.py
+"""
+import time
+from datetime import datetime, timedelta
+from unittest import mock
+
+import pytest
+from app import app
+from extensions import db
+from models import User, Akademisyen, Student, Ders, CourseStudent, DersOturum, YoklamaKayit
+from utils.auth import hash_password
+from utils.qr import sign_qr_token
+
+
+@pytest.fixture
+def student_client(database, login):
+    with app.app_context():
+        academician = Akademisyen.query.first()
+        course = Ders(DersKodu='BM101', DersAdi='Programlama', DersYili='2025', DersDonemi='Güz',
+                      AkademisyenID=academician.AkademisyenID)
+        db.session.add(course)
+        db.session.flush()
+        user = User(Email='s0@ogr.bandirma.edu.tr', OgrenciNo='20250000', SifreHash=hash_password('secret1'),
+                    UserType='student', Isim='Öğrenci', Soyisim='0')
+        db.session.add(user)
+        db.session.flush()
+        student = Student(UserID=user.id, OgrenciNo=user.OgrenciNo)
+        db.session.add(student)
+        db.session.flush()
+        db.session.add(CourseStudent(DersID=course.DersID, OgrenciID=student.OgrenciID))
+        db.session.commit()
+    return login(app.test_client(), '20250000', 'secret1')
+
+
+def create_session(started_ago, ended_ago=None):
+    """
+    Başlangıcı (yerel saat) ve bitişi (UTC) verilen süreler kadar önce olan bir oturum oluşturur.
+    """
+    with app.app_context():
+        session_obj = DersOturum(DersID=Ders.query.first().DersID, OturumNumarasi=1, OturumSiraNumarasi=1,
+                                 BaslangicZamani=datetime.now() - started_ago, AktifMi=ended_ago is None,
+                                 BitisZamani=datetime.utcnow() - ended_ago if ended_ago is not None else None)
+        db.session.add(session_obj)
+        db.session.commit()
+        return session_obj.OturumID
+
+
+def forwarded_scan(session_id, issued_ago):
+    """
+    issued_ago önce üretilmiş jetonu, okutma zamanı üretim zamanı olacak şekilde döndürür.
+    """
+    issued_at = time.time() - issued_ago.total_seconds()
+    with app.app_context(), mock.patch('itsdangerous.timed.time.time', return_value=issued_at):
+        token = sign_qr_token(session_id)
+    return {'token': token, 'scanned_at': int(issued_at * 1000)}
+
+
+def upload(client, scan):
+    response = client.post('/qr_scan/batch', json={'scans': [scan]})
+    assert response.status_code == 200
+    return response.get_json()['results'][0]['status']
+
+
+def recorded_count(session_id):
+    with app.app_context():
+        return YoklamaKayit.query.filter_by(OturumID=session_id).count()
+
+
+def test_forwarded_token_after_session_closed_is_rejected(student_client):
+    # Ders iki saat önce başladı, bir saat önce bitti; jeton ders sırasında üretilmişti
+    session_id = create_session(timedelta(hours=2), ended_ago=timedelta(hours=1))
+    scan = forwarded_scan(session_id, timedelta(minutes=90))
+    assert upload(student_client, scan) == 'closed'
+    assert recorded_count(session_id) == 0
+
+
+def test_stale_open_session_is_rejected(student_client):
+    # Bakım işi henüz kapatmamış olsa da SESSION_MAX_DURATION geçmiş oturum bitmiş sayılır
+    max_duration = timedelta(seconds=app.config['SESSION_MAX_DURATION'])
+    session_id = create_session(max_duration + timedelta(hours=1))
+    scan = forwarded_scan(session_id, max_duration + timedelta(minutes=50))
+    assert upload(student_client, scan) == 'closed'
+    assert recorded_count(session_id) == 0
+
+
+def test_offline_scan_uploaded_within_grace_is_recorded(student_client):
+    session_id = create_session(timedelta(hours=1), ended_ago=timedelta(minutes=5))
+    scan = forwarded_scan(session_id, timedelta(minutes=30))
+    assert upload(student_client, scan) == 'recorded'
+    assert recorded_count(session_id) == 1
@@ -0,0 +1,28 @@
+"""
+password_needs_rehash'in yapılandırılmış yöntemi Werkzeug'un hash'e yazdığı biçimle
+(varsayılan parametreler doldurulmuş olarak) karşılaştırdığını doğrular.
+
+Kullanım:
+    python -m pytest tests/test_password_rehash.py
+"""
+import pytest
+from werkzeug.security import generate_password_hash
+from app import app
+from utils.auth import password_needs_rehash
+
+
+@pytest.mark.parametrize('configured, stored, expected', [
+    ('scrypt', 'scrypt', False),
+    ('scrypt', 'scrypt:32768:8:1', False),
+    ('scrypt:32768:8:1', 'scrypt', False),
+    ('pbkdf2', 'pbkdf2:sha256:600000', False),
+    ('pbkdf2:sha256', 'pbkdf2:sha256:600000', False),
+    ('pbkdf2:sha256:600000', 'pbkdf2:sha256:1000', True),
+    ('pbkdf2:sha512', 'pbkdf2:sha256', True),
+    ('scrypt', 'pbkdf2:sha256', True),
+])
+def test_password_needs_rehash(monkeypatch, configured, stored, expected):
+    monkeypatch.setitem(app.config, 'PASSWORD_HASH_METHOD', configured)
+    password_hash = generate_password_hash('secret1', method=stored)
+    with app.app_context():
+        assert password_needs_rehash(password_hash) is expected
@@ -0,0 +1,61 @@
+"""
+QR döndürme görevinin her sürümü oturumun QR odasına yalnızca bir kez gönderdiğini doğrular.
+Ekran pencerenin ortasında katıldığında görev yuvarlanmış kalan süreyle erken uyanıp aynı
+sürümü tekrar tekrar göndermemelidir.
+
+Kullanım:
+    python -m pytest tests/test_qr_rotation.py
+"""
+from collections import Counter
+from datetime import datetime
+
+import pytest
+from app import app
+from extensions import db, socketio
+from models import Akademisyen, Ders, DersOturum
+from utils.qr_rotation import forget_qr, qr_room
+
+
+@pytest.fixture
+def session_id(database):
+    with app.app_context():
+        academician = Akademisyen.query.first()
+        course = Ders(DersKodu='BM101', DersAdi='Programlama', DersYili='2025', DersDonemi='Güz',
+                      AkademisyenID=academician.AkademisyenID)
+        db.session.add(course)
+        db.session.flush()
+        session_obj = DersOturum(DersID=course.DersID, OturumNumarasi=1, OturumSiraNumarasi=1,
+                                 BaslangicZamani=datetime.utcnow(), AktifMi=True, QR_CODE_VERSION=1)
+        db.session.add(session_obj)
+        db.session.commit()
+        session_id = session_obj.OturumID
+    yield session_id
+    forget_qr(session_id)
+
+
+def test_room_receives_each_version_once(client, session_id, monkeypatch):
+    monkeypatch.setitem(app.config, 'QR_REFRESH_INTERVAL', 1)
+    room_versions = []
+    emit = socketio.emit
+
+    def record(event, data=None, **kwargs):
+        if event == 'qr_update' and kwargs.get('room') == qr_room(session_id):
+            room_versions.append(data['version'])
+        return emit(event, data, **kwargs)
+
+    monkeypatch.setattr(socketio, 'emit', record)
+
+    # Pencereyi aç ve ekranı pencerenin ortasında bağla
+    first = client.get(f'/refresh_qr/{session_id}').get_json()
+    socketio.sleep(0.46)
+    display = socketio.test_client(app, headers={'Cookie': 'session=' + client.get_cookie('session').value})
+    assert display.emit('watch_qr', {'session_id': session_id}, callback=True)['status'] == 'success'
+    socketio.sleep(2.8)
+    display.disconnect()
+    # Görev odada ekran kalmadığını görüp çıksın
+    socketio.sleep(1.1)
+
+    counts = Counter(room_versions)
+    assert first['version'] not in counts
+    assert len(counts) >= 2
+    assert all(count == 1 for count in counts.values()), counts
@@ -0,0 +1,185 @@
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+# Yoklama ve rapor rotaları için kabul denetimi (admission control).
+# Her sınıfın aynı anda çalışan istek sınırı ve kısa bir bekleme kuyruğu vardır; kuyruk da
+# doluysa veya bekleme süresi aşılırsa istek veritabanına hiç dokunmadan 503 ile reddedilir.
+# Toplam sınır veritabanı bağlantı havuzundan küçük tutulur ki akademisyenin QR ve canlı
+# panel sayfaları (denetlenmez) her zaman bağlantı bulabilsin. Bir slot boşaldığında önce
+# yüksek öncelikli sınıfın (yoklama) bekleyenleri alınır.
+
+
+class AdmissionRejected(Exception):
+    """
+    İstek kabul edilmediğinde fırlatılır; retry_after istemcinin bekleyeceği saniyedir.
+    """
+
+    def __init__(self, class_name, retry_after):
+        super().__init__(f'{class_name} kapasitesi dolu')
+        self.class_name = class_name
+        self.retry_after = retry_after
+
+
+class AdmissionClass:
+    """
+    Bir uç nokta sınıfının sınırları ve sayaçları. priority değeri küçük olan önce alınır.
+    """
+
+    def __init__(self, name, priority, max_active, max_waiting, wait_timeout, retry_after):
+        self.name = name
+        self.priority = priority
+        self.configure(max_active, max_waiting, wait_timeout, retry_after)
+        self.active = 0
+        # Bekleyenler geliş sırasıyla alınır
+        self.queue = deque()
+        self.reset_metrics()
+
+    @property
+    def waiting(self):
+        return len(self.queue)
+
+    def configure(self, max_active, max_waiting, wait_timeout, retry_after):
+        self.max_active = max_active
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self.retry_after = retry_after
+
+    def reset_metrics(self):
+        self._metrics = {
+            'admitted': 0,
+            'queued': 0,
+            'rejected': 0,
+            'timed_out': 0,
+            'max_active': 0,
+            'max_waiting': 0,
+            'total_wait_seconds': 0.0,
+            'max_wait_seconds': 0.0
+        }
+
+    def metrics(self):
+        data = dict(self._metrics)
+        data['active'] = self.active
+        data['queue_depth'] = self.waiting
+        data['limit'] = self.max_active
+        data['queue_limit'] = self.max_waiting
+        return data
+
+
+class AdmissionController:
+    """
+    Sınıflar arasında paylaşılan toplam sınırı ve öncelik sırasını uygular.
+    """
+
+    def __init__(self, max_active, classes):
+        self.max_active = max_active
+        self.active = 0
+        self.classes = {cls.name: cls for cls in classes}
+        self._condition = threading.Condition()
+
+    def _can_enter(self, cls):
+        if cls.active >= cls.max_active or self.active >= self.max_active:
+            return False
+        # Daha öncelikli sınıfta bekleyen varsa slot ona bırakılır
+        return not any(other.waiting for other in self.classes.values() if other.priority < cls.priority)
+
+    def _enter(self, cls):
+        cls.active += 1
+        self.active += 1
+        cls._metrics['admitted'] += 1
+        cls._metrics['max_active'] = max(cls._metrics['max_active'], cls.active)
+
+    def acquire(self, name):
+        """
+        Slot alır; gerekirse en fazla wait_timeout saniye bekler. Alınamazsa AdmissionRejected fırlatır.
+        """
+        cls = self.classes[name]
+        with self._condition:
+            # Aynı sınıfta bekleyen varsa sıraya girilir (yeni gelen öne geçmez)
+            if not cls.queue and self._can_enter(cls):
+                self._enter(cls)
+                return
+            if cls.waiting >= cls.max_waiting:
+                cls._metrics['rejected'] += 1
+                raise AdmissionRejected(name, cls.retry_after)
+
+            ticket = object()
+            cls.queue.append(ticket)
+            cls._metrics['queued'] += 1
+            cls._metrics['max_waiting'] = max(cls._metrics['max_waiting'], cls.waiting)
+            started = time.monotonic()
+            deadline = started + cls.wait_timeout
+            try:
+                while cls.queue[0] is not ticket or not self._can_enter(cls):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        cls._metrics['timed_out'] += 1
+                        raise AdmissionRejected(name, cls.retry_after)
+                    self._condition.wait(remaining)
+            finally:
+                cls.queue.remove(ticket)
+                waited = time.monotonic() - started
+                cls._metrics['total_wait_seconds'] += waited
+                cls._metrics['max_wait_seconds'] = max(cls._metrics['max_wait_seconds'], waited)
+                # Çıkan bekleyen daha düşük öncelikli sınıfları engelliyor olabilir
+                self._condition.notify_all()
+            self._enter(cls)
+
+    def release(self, name):
+        cls = self.classes[name]
+        with self._condition:
+            cls.active -= 1
+            self.active -= 1
+            self._condition.notify_all()
+
+    def metrics(self):
+        """
+        Sınıf bazında anlık kuyruk derinliği ve reddetme sayaçlarını döndürür.
+        """
+        with self._condition:
+            data = {name: cls.metrics() for name, cls in self.classes.items()}
+            data['total'] = {'active': self.active, 'limit': self.max_active}
+        return data
+
+
+admission_controller = AdmissionController(max_active=10, classes=[
+    AdmissionClass('checkin', priority=0, max_active=10, max_waiting=200, wait_timeout=5, retry_after=2),
+    AdmissionClass('report', priority=1, max_active=3, max_waiting=10, wait_timeout=2, retry_after=5)
+])
+
+
+def admission(name):
+    """
+    Rotayı verilen sınıfın kabul denetiminden geçirir; route dekoratörünün hemen altına yazılır
+    ki oturum yükleme ve koşullu GET sorguları da sınır içinde kalsın.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            admission_controller.acquire(name)
+            try:
+                return view(*args, **kwargs)
+            finally:
+                admission_controller.release(name)
+        return wrapper
+    return decorator
+
+
+def init_admission(app):
+    """
+    Sınırları uygulama konfigürasyonuna göre ayarlar.
+    """
+    admission_controller.max_active = app.config['ADMISSION_MAX_ACTIVE']
+    for name in admission_controller.classes:
+        prefix = f'ADMISSION_{name.upper()}'
+        admission_controller.classes[name].configure(
+            app.config[f'{prefix}_MAX_ACTIVE'],
+            app.config[f'{prefix}_MAX_WAITING'],
+            app.config[f'{prefix}_WAIT_TIMEOUT'],
+            app.config[f'{prefix}_RETRY_AFTER']
+        )
+
+
+def admission_metrics():
+    return admission_controller.metrics()
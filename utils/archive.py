@@ -0,0 +1,316 @@
+import json
+import os
+import shutil
+from datetime import datetime
+import numpy as np
+from flask import current_app
+from sqlalchemy import select, func
+from extensions import db
+from models import Ders, DersOturum, YoklamaKayit
+
+# Arşiv klasör yapısı:
+#   <ARCHIVE_FOLDER>/<DersYili>_<DersDonemi>/manifest.json
+#   <ARCHIVE_FOLDER>/<DersYili>_<DersDonemi>/oturum.npy   (int32, OturumID'ye göre sıralı)
+#   <ARCHIVE_FOLDER>/<DersYili>_<DersDonemi>/ogrenci.npy  (int32)
+#   <ARCHIVE_FOLDER>/<DersYili>_<DersDonemi>/zaman.npy    (int64, epoch saniye)
+COLUMNS = {
+    'oturum': np.int32,
+    'ogrenci': np.int32,
+    'zaman': np.int64
+}
+
+EPOCH = datetime(1970, 1, 1)
+
+_archive_cache = {}
+_course_index = {'signature': None, 'courses': {}}
+
+
+class ArchiveError(Exception):
+    """
+    Dönem arşivlenemeyecek durumdayken (ör. hâlâ açık oturumu varken) fırlatılır.
+    """
+
+
+def term_directory(archive_folder, ders_yili, ders_donemi):
+    """
+    Dönem arşivinin klasör yolunu döndürür.
+    """
+    safe_name = f"{ders_yili}_{ders_donemi}".replace(os.sep, '-').replace(' ', '-')
+    return os.path.join(archive_folder, safe_name)
+
+
+class TermArchive:
+    """
+    Bir dönemin arşivlenmiş yoklama kayıtlarını mmap ile okur.
+    Diziler belleğe tamamen yüklenmez; yalnızca aranan bölgeler diskten okunur.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'manifest.json'), encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.columns = {
+            name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+            for name in COLUMNS
+        }
+
+    @property
+    def course_ids(self):
+        return self.manifest['course_ids']
+
+    def _session_slices(self, session_ids):
+        sessions = self.columns['oturum']
+        ids = np.asarray(sorted(set(session_ids)), dtype=np.int32)
+        starts = np.searchsorted(sessions, ids, side='left')
+        ends = np.searchsorted(sessions, ids, side='right')
+        return [(start, end) for start, end in zip(starts, ends) if end > start]
+
+    def pairs(self, session_ids, student_ids=None):
+        """
+        Verilen oturumlar (ve isteğe bağlı öğrenciler) için (OturumID, OgrenciID) çiftlerini döndürür.
+        """
+        result = set()
+        student_filter = np.asarray(list(student_ids), dtype=np.int32) if student_ids is not None else None
+        for start, end in self._session_slices(session_ids):
+            sessions = self.columns['oturum'][start:end]
+            students = self.columns['ogrenci'][start:end]
+            if student_filter is not None:
+                mask = np.isin(students, student_filter)
+                sessions, students = sessions[mask], students[mask]
+            result.update(zip(sessions.tolist(), students.tolist()))
+        return result
+
+
+def open_archive(path):
+    """
+    Arşivi açar; manifest değişmedikçe aynı süreçte tekrar açılmaz.
+    """
+    mtime = os.path.getmtime(os.path.join(path, 'manifest.json'))
+    cached = _archive_cache.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, TermArchive(path))
+        _archive_cache[path] = cached
+    return cached[1]
+
+
+def archived_courses():
+    """
+    Arşivde kaydı bulunan dersleri {DersID: arşiv klasörü} olarak döndürür.
+    """
+    archive_folder = current_app.config['ARCHIVE_FOLDER']
+    if not os.path.isdir(archive_folder):
+        return {}
+
+    manifests = []
+    for name in sorted(os.listdir(archive_folder)):
+        manifest_path = os.path.join(archive_folder, name, 'manifest.json')
+        if os.path.exists(manifest_path):
+            manifests.append((os.path.join(archive_folder, name), os.path.getmtime(manifest_path)))
+
+    signature = tuple(manifests)
+    if _course_index['signature'] != signature:
+        courses = {}
+        for path, _ in manifests:
+            for course_id in open_archive(path).course_ids:
+                courses[course_id] = path
+        _course_index['signature'] = signature
+        _course_index['courses'] = courses
+    return _course_index['courses']
+
+
+def attendance_pairs(course_id, session_ids=None, student_ids=None):
+    """
+    Dersin yoklama kayıtlarını (OturumID, OgrenciID) çiftleri kümesi olarak döndürür.
+    Ders arşivlenmişse arşivdeki kayıtlar sıcak tablodakilerle birleştirilir.
+    session_ids ve student_ids verilirse yalnızca o dilim okunur.
+    """
+    if session_ids is None:
+        session_ids = [row[0] for row in db.session.query(DersOturum.OturumID).filter(DersOturum.DersID == course_id).all()]
+    session_ids = list(session_ids)
+    if not session_ids or (student_ids is not None and not student_ids):
+        return set()
+
+    query = db.session.query(YoklamaKayit.OturumID, YoklamaKayit.OgrenciID).\
+        filter(YoklamaKayit.OturumID.in_(session_ids))
+    if student_ids is not None:
+        query = query.filter(YoklamaKayit.OgrenciID.in_(list(student_ids)))
+    pairs = set(query.all())
+
+    archive_path = archived_courses().get(course_id)
+    if archive_path:
+        pairs |= open_archive(archive_path).pairs(session_ids, student_ids)
+    return pairs
+
+
+def courses_attendance_pairs(course_sessions):
+    """
+    Birden çok dersin yoklama kayıtlarını tek sorguda okur.
+    course_sessions: {DersID: [OturumID, ...]}; {DersID: (OturumID, OgrenciID) kümesi} döndürür.
+    """
+    course_of_session = {
+        session_id: course_id
+        for course_id, session_ids in course_sessions.items()
+        for session_id in session_ids
+    }
+    pairs = {course_id: set() for course_id in course_sessions}
+    if not course_of_session:
+        return pairs
+
+    rows = db.session.query(YoklamaKayit.OturumID, YoklamaKayit.OgrenciID).\
+        join(DersOturum, YoklamaKayit.OturumID == DersOturum.OturumID).\
+        filter(DersOturum.DersID.in_(list(course_sessions.keys()))).all()
+    for session_id, student_id in rows:
+        course_id = course_of_session.get(session_id)
+        if course_id is not None:
+            pairs[course_id].add((session_id, student_id))
+
+    archived = archived_courses()
+    for course_id, session_ids in course_sessions.items():
+        if course_id in archived and session_ids:
+            pairs[course_id] |= open_archive(archived[course_id]).pairs(session_ids)
+    return pairs
+
+
+def _sort_keys(chunk):
+    # (OturumID, OgrenciID) sırası tek bir int64 anahtarla karşılaştırılır (ikisi de negatif değil)
+    return (chunk['oturum'].astype(np.int64) << 32) | chunk['ogrenci'].astype(np.int64)
+
+
+def _slice_chunk(chunk, start):
+    return {name: values[start:] for name, values in chunk.items()}
+
+
+def _archive_chunks(archive, batch_size):
+    """
+    Arşivi batch_size satırlık parçalar halinde okur.
+    """
+    row_count = archive.manifest['row_count']
+    for start in range(0, row_count, batch_size):
+        yield {name: np.array(archive.columns[name][start:start + batch_size]) for name in COLUMNS}
+
+
+def _record_chunks(rows):
+    """
+    (OturumID, OgrenciID, KayitZamani) sorgu sonucunu parça parça sütun dizilerine çevirir.
+    """
+    for batch in rows.partitions():
+        yield {
+            'oturum': np.fromiter((row[0] for row in batch), dtype=COLUMNS['oturum'], count=len(batch)),
+            'ogrenci': np.fromiter((row[1] for row in batch), dtype=COLUMNS['ogrenci'], count=len(batch)),
+            'zaman': np.fromiter((int((row[2] - EPOCH).total_seconds()) for row in batch),
+                                 dtype=COLUMNS['zaman'], count=len(batch))
+        }
+
+
+def _merge_sorted(left, right):
+    """
+    (OturumID, OgrenciID) sırasındaki iki parça akışını aynı sırada tek akışa birleştirir.
+    Her akıştan bellekte en fazla bir parça tutulur.
+    """
+    left, right = iter(left), iter(right)
+    a, b = next(left, None), next(right, None)
+    while a is not None and b is not None:
+        keys_a, keys_b = _sort_keys(a), _sort_keys(b)
+        # İki parçanın da son anahtarına kadar olan kısmı güvenle yazılabilir
+        boundary = min(keys_a[-1], keys_b[-1])
+        cut_a = int(np.searchsorted(keys_a, boundary, side='right'))
+        cut_b = int(np.searchsorted(keys_b, boundary, side='right'))
+        order = np.argsort(np.concatenate((keys_a[:cut_a], keys_b[:cut_b])), kind='stable')
+        yield {name: np.concatenate((a[name][:cut_a], b[name][:cut_b]))[order] for name in COLUMNS}
+        a = _slice_chunk(a, cut_a) if cut_a < len(keys_a) else next(left, None)
+        b = _slice_chunk(b, cut_b) if cut_b < len(keys_b) else next(right, None)
+    for chunk, rest in ((a, left), (b, right)):
+        if chunk is not None:
+            yield chunk
+            yield from rest
+
+
+def archive_term(ders_yili, ders_donemi, batch_size=50000):
+    """
+    Kapanmış bir dönemin yoklama kayıtlarını sütun tabanlı .npy dosyalarına taşır
+    ve sıcak tablodan siler. Kayıtlar parça parça okunur, bellek kullanımı sabittir.
+    Dönem daha önce arşivlendiyse mevcut arşiv ile yeni kayıtlar sıralı olarak birleştirilir.
+    Dönemde hâlâ aktif oturum varsa ArchiveError fırlatır. Arşivlenen kayıt sayısını döndürür.
+    """
+    course_ids = [row[0] for row in db.session.query(Ders.DersID).filter(
+        Ders.DersYili == ders_yili, Ders.DersDonemi == ders_donemi
+    ).all()]
+    if not course_ids:
+        return 0
+
+    active_sessions = db.session.query(func.count(DersOturum.OturumID)).filter(
+        DersOturum.DersID.in_(course_ids), DersOturum.AktifMi == True
+    ).scalar()
+    if active_sessions:
+        raise ArchiveError(f'{ders_yili} {ders_donemi} döneminde {active_sessions} aktif oturum var; '
+                           f'arşivlemeden önce oturumlar durdurulmalı')
+
+    course_sessions = select(DersOturum.OturumID).where(DersOturum.DersID.in_(course_ids))
+    # Arşivleme sırasında eklenen kayıtlar silinmesin diye üst sınır sabitlenir
+    max_kayit_id, new_count = db.session.query(func.max(YoklamaKayit.KayitID), func.count(YoklamaKayit.KayitID)).\
+        filter(YoklamaKayit.OturumID.in_(course_sessions)).one()
+    if not new_count:
+        return 0
+
+    path = term_directory(current_app.config['ARCHIVE_FOLDER'], ders_yili, ders_donemi)
+    existing = open_archive(path) if os.path.exists(os.path.join(path, 'manifest.json')) else None
+    existing_count = existing.manifest['row_count'] if existing else 0
+    total = existing_count + new_count
+
+    tmp_path = path + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    columns = {
+        name: np.lib.format.open_memmap(os.path.join(tmp_path, f'{name}.npy'), mode='w+', dtype=dtype, shape=(total,))
+        for name, dtype in COLUMNS.items()
+    }
+
+    # Yeni kayıtlar sıralı akar; mevcut arşiv varsa iki sıralı akış parça parça birleştirilir
+    rows = db.session.execute(
+        select(YoklamaKayit.OturumID, YoklamaKayit.OgrenciID, YoklamaKayit.KayitZamani).
+        where(YoklamaKayit.OturumID.in_(course_sessions), YoklamaKayit.KayitID <= max_kayit_id).
+        order_by(YoklamaKayit.OturumID, YoklamaKayit.OgrenciID).
+        execution_options(yield_per=batch_size)
+    )
+    chunks = _record_chunks(rows)
+    if existing:
+        chunks = _merge_sorted(_archive_chunks(existing, batch_size), chunks)
+    position = 0
+    for chunk in chunks:
+        end = position + len(chunk['oturum'])
+        for name in COLUMNS:
+            columns[name][position:end] = chunk[name]
+        position = end
+    for column in columns.values():
+        column.flush()
+    del columns
+
+    manifest = {
+        'version': 1,
+        'DersYili': ders_yili,
+        'DersDonemi': ders_donemi,
+        'course_ids': sorted(set(course_ids) | set(existing.course_ids if existing else [])),
+        'row_count': total,
+        'columns': {name: np.dtype(dtype).str for name, dtype in COLUMNS.items()},
+        'created_at': datetime.utcnow().isoformat()
+    }
+    with open(os.path.join(tmp_path, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    # Eski arşiv, yeni arşiv hazır olduktan sonra değiştirilir
+    if os.path.exists(path):
+        old_path = path + '.old'
+        shutil.rmtree(old_path, ignore_errors=True)
+        os.rename(path, old_path)
+        os.rename(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+    else:
+        os.rename(tmp_path, path)
+    _archive_cache.pop(path, None)
+
+    YoklamaKayit.query.filter(
+        YoklamaKayit.OturumID.in_(course_sessions),
+        YoklamaKayit.KayitID <= max_kayit_id
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return new_count
@@ -1,6 +1,50 @@
+import os
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+from utils.offload import thread_pool
+
 def send_password_reset_email(email, reset_link):
     """
     Şifre sıfırlama linkini e-posta ile gönderir (gerçek projede Flask-Mail ile yapılmalı).
     """
     # Gerçek projede Flask-Mail ile e-posta gönderimi yapılmalı!
-    print(f"Şifre sıfırlama linki {email} adresine gönderildi: {reset_link}")
\ No newline at end of file
+    print(f"Şifre sıfırlama linki {email} adresine gönderildi: {reset_link}")
+
+def hash_password(password, method=None):
+    """
+    Şifreyi yapılandırılmış maliyetle hash'ler (PASSWORD_HASH_METHOD).
+    """
+    method = method or current_app.config['PASSWORD_HASH_METHOD']
+    return thread_pool.run(generate_password_hash, password, method=method)
+
+def verify_password(password_hash, password):
+    """
+    Şifreyi hash ile karşılaştırır.
+    """
+    return thread_pool.run(check_password_hash, password_hash, password)
+
+def _normalize_hash_method(method):
+    """
+    Yöntemi Werkzeug'un hash'e yazdığı tam biçime getirir; eksik parametreler Werkzeug'un
+    varsayılanlarıyla doldurulur ('scrypt' -> 'scrypt:32768:8:1', 'pbkdf2:sha256' -> 'pbkdf2:sha256:600000').
+    """
+    name, *args = method.split(':')
+    if name == 'scrypt' and not args:
+        return 'scrypt:32768:8:1'
+    if name == 'pbkdf2' and len(args) < 2:
+        return f"pbkdf2:{args[0] if args else 'sha256'}:{DEFAULT_PBKDF2_ITERATIONS}"
+    return method
+
+def password_needs_rehash(password_hash):
+    """
+    Kayıtlı hash güncel yöntem ve maliyetle üretilmemişse True döner.
+    """
+    stored_method = password_hash.split('$', 1)[0]
+    return _normalize_hash_method(stored_method) != _normalize_hash_method(current_app.config['PASSWORD_HASH_METHOD'])
+
+def unusable_password_hash():
+    """
+    Pasif hesaplar için kimsenin bilmediği rastgele bir şifrenin hash'ini üretir.
+    Şifre bilinmediğinden yüksek maliyete gerek yoktur; hesap aktifleştirilirken şifre yeniden belirlenir.
+    """
+    return generate_password_hash(os.urandom(16).hex(), method='pbkdf2:sha256:1000')
@@ -0,0 +1,58 @@
+import hashlib
+from functools import wraps
+from flask import request, make_response, current_app, g
+from flask_login import current_user
+from sqlalchemy import func, select, case
+from extensions import db
+from models import Ders, DersOturum, YoklamaKayit, CourseStudent
+
+
+def course_data_version(course_id):
+    """
+    Dersin rapor verisini değiştiren her şeyi özetleyen ucuz bir sürüm bilgisi döndürür.
+    Yoklama kayıtları, oturumlar ve öğrenci listesi tek sorguda toplanır; sayılar da özete girdiği
+    için kayıt, oturum veya öğrenci silinmesi de sürümü değiştirir.
+    """
+    course_sessions = select(DersOturum.OturumID).where(DersOturum.DersID == course_id)
+    row = db.session.query(
+        select(func.count(YoklamaKayit.KayitID)).where(YoklamaKayit.OturumID.in_(course_sessions)).scalar_subquery(),
+        select(func.max(YoklamaKayit.KayitZamani)).where(YoklamaKayit.OturumID.in_(course_sessions)).scalar_subquery(),
+        select(func.count(DersOturum.OturumID)).where(DersOturum.DersID == course_id).scalar_subquery(),
+        select(func.sum(case((DersOturum.AktifMi == True, 1), else_=0))).where(DersOturum.DersID == course_id).scalar_subquery(),
+        select(func.max(DersOturum.BaslangicZamani)).where(DersOturum.DersID == course_id).scalar_subquery(),
+        select(func.max(DersOturum.BitisZamani)).where(DersOturum.DersID == course_id).scalar_subquery(),
+        select(func.count(CourseStudent.id)).where(CourseStudent.DersID == course_id).scalar_subquery(),
+        select(func.max(CourseStudent.KayitTarihi)).where(CourseStudent.DersID == course_id).scalar_subquery(),
+        select(Ders.DersKodu + Ders.DersAdi).where(Ders.DersID == course_id).scalar_subquery()
+    ).one()
+
+    return hashlib.sha1(repr(tuple(row)).encode('utf-8')).hexdigest()
+
+
+def conditional_course_view(view):
+    """
+    Ders raporu rotaları için koşullu GET desteği (ETag) sağlar.
+    İstemcinin sürümü hâlâ geçerliyse rapor hesaplanmadan 304 döner.
+    Last-Modified gönderilmez: silme işlemleri en son zamanı ilerletmediğinden
+    yalnızca tarihe bakan istemciler eski raporu görürdü.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        version = course_data_version(kwargs['course_id'])
+        # Şablondaki {% cache %} blokları aynı sürümü yeniden sorgulamaz (utils/templating.py)
+        g.setdefault('course_versions', {})[kwargs['course_id']] = version
+        # Aynı URL farklı kullanıcılara farklı içerik döndürebilir
+        etag = hashlib.sha1(f"{version}:{current_user.get_id()}".encode('utf-8')).hexdigest()
+
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
+    return wrapper
@@ -0,0 +1,278 @@
+import csv
+import io
+import tempfile
+import zipfile
+from collections import defaultdict
+from itertools import chain, islice
+from flask import current_app, request, send_file
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
+from sqlalchemy.orm import joinedload
+from werkzeug.utils import secure_filename
+from extensions import db
+from models import DersOturum, CourseStudent, Student
+from utils.archive import courses_attendance_pairs
+from utils.offload import process_pool
+from utils.reporting import summarize_attendance, absence_chart_data, render_course_charts, svg_course_charts, svg_backend
+
+# Zip içinde her parçadan sonra istemciye gönderilecek satır sayısı
+ROWS_PER_CHUNK = 500
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+# XLSX sütun genişlikleri başlık ve bu kadar ilk satırdan hesaplanır
+WIDTH_SAMPLE_ROWS = 100
+MAX_COLUMN_WIDTH = 60
+
+
+def student_report_rows(students, absence_label='Devamsızlık'):
+    """
+    Devamsızlık raporlarının (tüm öğrenciler, kalanlar, sınırdakiler) başlık ve satırlarını üretir.
+    """
+    yield ['Öğrenci No', 'Ad Soyad', 'Katıldığı Hafta', absence_label, 'Durum']
+    for student in students:
+        yield [
+            student['student_no'],
+            student['name'],
+            student['attended_weeks'],
+            student['absence_count'],
+            student['status']
+        ]
+
+
+def class_list_rows(class_list):
+    """
+    Sınıf listesinin başlık ve satırlarını üretir.
+    """
+    yield ['#', 'Öğrenci No', 'Ad Soyad', 'E-posta', 'Sınıf', 'Program', 'Durum']
+    for i, student in enumerate(class_list, 1):
+        yield [
+            i,
+            student['student_no'],
+            student['name'],
+            student['email'],
+            student['class'],
+            student['program'],
+            student['active']
+        ]
+
+
+def attendance_matrix_rows(sessions, students, attended):
+    """
+    Öğrenci x oturum yoklama tablosunun başlık ve satırlarını üretir.
+    sessions hafta ve oturum sırasına göre sıralı DersOturum nesneleri (veya aynı alanlara sahip satırlar) olmalıdır.
+    """
+    yield ['Öğrenci No', 'Adı Soyadı'] + [
+        f"Hafta {session.OturumNumarasi} - Oturum {session.OturumSiraNumarasi}" for session in sessions
+    ]
+    for student in students:
+        yield [student.OgrenciNo, f"{student.user.Isim} {student.user.Soyisim}"] + [
+            'Var' if (session.OturumID, student.OgrenciID) in attended else 'Yok' for session in sessions
+        ]
+
+
+def csv_file(rows):
+    """
+    Satırları send_file ile gönderilebilecek UTF-8 CSV dosyasına yazar.
+    """
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerows(rows)
+    return io.BytesIO(output.getvalue().encode('utf-8'))
+
+
+def write_xlsx(rows, fileobj, sheet_title):
+    """
+    Satırları openpyxl'in yalnızca yazma (write-only) kipinde XLSX olarak yazar.
+    Satırlar belleğe değil geçici dosyaya aktığından bellek kullanımı satır sayısından bağımsızdır.
+    Sütun genişlikleri başlık ve ilk satırlardan hesaplanır, başlık satırı dondurulur.
+    """
+    rows = iter(rows)
+    sample = list(islice(rows, WIDTH_SAMPLE_ROWS + 1))
+    workbook = Workbook(write_only=True)
+    # Excel sayfa adları en fazla 31 karakter olabilir
+    sheet = workbook.create_sheet(title=sheet_title[:31])
+
+    if sample:
+        # Yalnızca yazma kipinde genişlik ve dondurma, ilk satır yazılmadan ayarlanmalıdır
+        widths = defaultdict(int)
+        for row in sample:
+            for index, value in enumerate(row, 1):
+                widths[index] = max(widths[index], len(str(value)) if value is not None else 0)
+        for index, width in widths.items():
+            sheet.column_dimensions[get_column_letter(index)].width = min(width + 2, MAX_COLUMN_WIDTH)
+        sheet.freeze_panes = 'A2'
+
+        header = []
+        for value in sample[0]:
+            cell = WriteOnlyCell(sheet, value=value)
+            cell.font = Font(bold=True)
+            header.append(cell)
+        sheet.append(header)
+        for row in chain(sample[1:], rows):
+            sheet.append(row)
+
+    workbook.save(fileobj)
+
+
+def xlsx_file(rows, sheet_title):
+    """
+    Satırları geçici bir dosyaya XLSX olarak yazar; dosya send_file ile diskten parça parça gönderilir.
+    """
+    output = tempfile.TemporaryFile()
+    try:
+        write_xlsx(rows, output, sheet_title)
+    except Exception:
+        output.close()
+        raise
+    output.seek(0)
+    return output
+
+
+def send_report(rows, filename, sheet_title):
+    """
+    Rapor satırlarını istenen biçimde indirir: ?format=xlsx ise Excel, aksi halde CSV.
+    filename uzantı içermez.
+    """
+    if request.args.get('format') == 'xlsx':
+        return send_file(xlsx_file(rows, sheet_title), mimetype=XLSX_MIMETYPE, as_attachment=True,
+                         download_name=f'{filename}.xlsx')
+    return send_file(csv_file(rows), mimetype='text/csv', as_attachment=True, download_name=f'{filename}.csv')
+
+
+def load_courses_report_data(courses):
+    """
+    Derslerin rapor verilerini toplu sorgularla okur ve ders başına özetler.
+    Oturumlar, yoklama kayıtları ve öğrenci listeleri için ders sayısından bağımsız olarak birer sorgu çalışır.
+    """
+    course_ids = [course.DersID for course in courses]
+    if not course_ids:
+        return []
+
+    sessions_by_course = defaultdict(list)
+    for session in db.session.query(
+        DersOturum.OturumID, DersOturum.DersID, DersOturum.OturumNumarasi,
+        DersOturum.OturumSiraNumarasi, DersOturum.AktifMi
+    ).filter(DersOturum.DersID.in_(course_ids)).\
+            order_by(DersOturum.OturumNumarasi, DersOturum.OturumSiraNumarasi):
+        sessions_by_course[session.DersID].append(session)
+
+    attended_by_course = courses_attendance_pairs({
+        course_id: [session.OturumID for session in sessions_by_course[course_id]] for course_id in course_ids
+    })
+
+    students_by_course = defaultdict(list)
+    for course_id, student in db.session.query(CourseStudent.DersID, Student).\
+            join(Student, CourseStudent.OgrenciID == Student.OgrenciID).\
+            options(joinedload(Student.user)).\
+            filter(CourseStudent.DersID.in_(course_ids)).\
+            order_by(CourseStudent.DersID, CourseStudent.id):
+        students_by_course[course_id].append(student)
+
+    max_absence_percentage = current_app.config['MAX_ABSENCE_PERCENTAGE']
+    report_data = []
+    for course in courses:
+        sessions = sessions_by_course[course.DersID]
+        attended = attended_by_course[course.DersID]
+        students = students_by_course[course.DersID]
+        summary = summarize_attendance(course, [(s.OturumID, s.OturumNumarasi) for s in sessions], attended, students)
+        summary.update({
+            'sessions': sessions,
+            'students': students,
+            'attended': attended,
+            'absence_data': absence_chart_data(
+                [(s.OturumID, s.OturumNumarasi) for s in sessions if s.AktifMi], attended, students, max_absence_percentage
+            ) if students else [],
+            'max_absence_percentage': max_absence_percentage
+        })
+        report_data.append(summary)
+    return report_data
+
+
+class _ZipStream(io.RawIOBase):
+    """
+    ZipFile'ın yazdığı baytları biriktirir; arayan taraf her parçadan sonra boşaltır.
+    Konum değiştirilemediği için ZipFile veri tanımlayıcıları (data descriptor) kullanır.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _write_csv_entry(archive, stream, name, rows):
+    with archive.open(name, 'w') as entry:
+        text = io.TextIOWrapper(entry, encoding='utf-8', newline='')
+        writer = csv.writer(text)
+        for i, row in enumerate(rows, 1):
+            writer.writerow(row)
+            if i % ROWS_PER_CHUNK == 0:
+                text.flush()
+                yield stream.drain()
+        text.flush()
+        text.detach()
+    yield stream.drain()
+
+
+def course_folder_name(course):
+    return secure_filename(f"{course.DersKodu}_{course.DersYili}_{course.DersDonemi}") or str(course.DersID)
+
+
+def stream_reports_zip(report_data):
+    """
+    Derslerin tüm CSV raporlarını ve grafiklerini zip olarak parça parça üretir.
+    Arşiv bellekte tutulmaz; matplotlib kipinde grafikler işçi süreçlerde çizilirken CSV dosyaları yazılır.
+    Grafik kipi istek bağlamında seçildiği için üreteç değil, üreteç döndüren bir fonksiyondur.
+    """
+    chart_args = [
+        (data['weekly_data'], data['overall_attendance'], data['course'].DersAdi,
+         data['absence_data'], data['max_absence_percentage'])
+        for data in report_data
+    ]
+    if svg_backend():
+        charts = (svg_course_charts(*args) for args in chart_args)
+    else:
+        charts = process_pool.imap(render_course_charts, chart_args)
+    return _zip_chunks(report_data, charts)
+
+
+def _zip_chunks(report_data, charts):
+    try:
+        yield from _zip_entries(report_data, charts)
+    finally:
+        # İstemci yarıda ayrılsa da havuzda ayrılan kuyruk yerleri bırakılır
+        charts.close()
+
+
+def _zip_entries(report_data, charts):
+    stream = _ZipStream()
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for data in report_data:
+            folder = course_folder_name(data['course'])
+            csv_entries = {
+                'yoklama_raporu.csv': attendance_matrix_rows(data['sessions'], data['students'], data['attended']),
+                'tum_ogrenciler.csv': student_report_rows(data['student_attendance']),
+                'devamsizliktan_kalanlar.csv': student_report_rows(data['failing_students'], 'Devamsızlık Sayısı'),
+                'sinirda_olan_ogrenciler.csv': student_report_rows(data['borderline_students']),
+                'sinif_listesi.csv': class_list_rows(data['class_list'])
+            }
+            for name, rows in csv_entries.items():
+                yield from _write_csv_entry(archive, stream, f'{folder}/{name}', rows)
+
+            # PNG zaten sıkıştırılmış olduğundan tekrar sıkıştırılmaz; SVG metin olduğu için sıkıştırılır
+            for name, image in next(charts).items():
+                compress_type = zipfile.ZIP_STORED if name.endswith('.png') else zipfile.ZIP_DEFLATED
+                archive.writestr(f'{folder}/{name}', image, compress_type=compress_type)
+                yield stream.drain()
+    yield stream.drain()
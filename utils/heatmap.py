@@ -0,0 +1,99 @@
+from io import BytesIO
+from itertools import chain
+import numpy as np
+from PIL import Image
+
+# Palet indeksleri: 0..LEVELS arası katılım oranı (kırmızıdan yeşile), SEPARATOR hafta ayıracı
+LEVELS = 10
+SEPARATOR = LEVELS + 1
+ABSENT_RGB = np.array([244, 67, 54])
+PRESENT_RGB = np.array([76, 175, 80])
+SEPARATOR_RGB = [255, 255, 255]
+# Görüntünün en fazla yüksekliği; büyük derslerde satır yüksekliği buna göre küçülür
+MAX_IMAGE_HEIGHT = 4000
+MAX_ROW_HEIGHT = 12
+CELL_WIDTH = 12
+
+
+def _palette():
+    steps = np.linspace(0, 1, LEVELS + 1)[:, None]
+    colors = np.rint(ABSENT_RGB + (PRESENT_RGB - ABSENT_RGB) * steps).astype(np.uint8)
+    return colors.flatten().tolist() + SEPARATOR_RGB
+
+
+PALETTE = _palette()
+
+
+def presence_matrix(session_ids, student_ids, attended):
+    """
+    (OturumID, OgrenciID) çiftlerinden öğrenci x oturum boyutunda bool matris üretir.
+    Satırlar student_ids, sütunlar session_ids sırasındadır; listede olmayan kayıtlar yok sayılır.
+    """
+    matrix = np.zeros((len(student_ids), len(session_ids)), dtype=bool)
+    if not attended or not len(student_ids) or not len(session_ids):
+        return matrix
+
+    # Demetlerden dizi oluşturmak yerine düzleştirip tek seferde okumak belirgin şekilde hızlıdır
+    pairs = np.fromiter(chain.from_iterable(attended), dtype=np.int64, count=2 * len(attended)).reshape(-1, 2)
+    session_ids = np.asarray(session_ids, dtype=np.int64)
+    student_ids = np.asarray(student_ids, dtype=np.int64)
+    session_order = np.argsort(session_ids)
+    student_order = np.argsort(student_ids)
+
+    # Kimlikleri sıralı dizilerde arayarak satır/sütun indekslerine çevir
+    columns = np.searchsorted(session_ids, pairs[:, 0], sorter=session_order).clip(max=len(session_ids) - 1)
+    rows = np.searchsorted(student_ids, pairs[:, 1], sorter=student_order).clip(max=len(student_ids) - 1)
+    columns, rows = session_order[columns], student_order[rows]
+    known = (session_ids[columns] == pairs[:, 0]) & (student_ids[rows] == pairs[:, 1])
+    matrix[rows[known], columns[known]] = True
+    return matrix
+
+
+def absence_order(matrix):
+    """
+    Satırları devamsızlık sayısına göre (en çok devamsız üstte) sıralayan indeksleri döndürür.
+    Eşitlikte mevcut sıra korunur.
+    """
+    absences = matrix.shape[1] - matrix.sum(axis=1)
+    return np.argsort(-absences, kind='stable')
+
+
+def render_heatmap(matrix, weeks, group_by_week=False, sort_by_absence=False):
+    """
+    Katılım matrisini palet tabanlı PNG'ye çevirir; piksel dizileri doğrudan yazılır.
+    weeks her sütunun OturumNumarasi değeridir ve sütunlar haftaya göre sıralı olmalıdır.
+    group_by_week: her hafta tek sütun, renk o haftaki oturumlara katılım oranı.
+    Aksi halde her oturum ayrı sütundur ve haftalar arasına ayraç konur.
+    PNG baytlarını döndürür.
+    """
+    if sort_by_absence:
+        matrix = matrix[absence_order(matrix)]
+    weeks = np.asarray(weeks)
+    # Sütunlar haftaya göre sıralı olduğundan ilk görülme indeksleri hafta başlangıçlarıdır
+    week_starts = np.unique(weeks, return_index=True)[1]
+
+    if group_by_week:
+        attended = np.add.reduceat(matrix, week_starts, axis=1) if matrix.shape[1] else matrix.astype(np.int64)
+        sessions_per_week = np.diff(np.append(week_starts, matrix.shape[1]))
+        levels = np.rint(attended / sessions_per_week * LEVELS).astype(np.uint8)
+        separators = np.arange(1, levels.shape[1])
+    else:
+        levels = matrix.astype(np.uint8) * LEVELS
+        separators = week_starts[1:]
+
+    # Hafta ayıraçları: her haftanın ilk sütunundan önce bir piksellik sütun
+    cell = np.repeat(levels, CELL_WIDTH, axis=1)
+    if len(separators):
+        cell = np.insert(cell, separators * CELL_WIDTH, SEPARATOR, axis=1)
+
+    row_height = max(1, min(MAX_ROW_HEIGHT, MAX_IMAGE_HEIGHT // max(1, matrix.shape[0])))
+    pixels = np.ascontiguousarray(np.repeat(cell, row_height, axis=0))
+    if pixels.size == 0:
+        pixels = np.full((1, 1), SEPARATOR, dtype=np.uint8)
+
+    # 'L' görüntüye palet atanınca 'P' kipine geçer; piksel değerleri palet indeksleridir
+    image = Image.fromarray(pixels)
+    image.putpalette(PALETTE)
+    output = BytesIO()
+    image.save(output, format='PNG', compress_level=6)
+    return output.getvalue()
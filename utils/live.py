@@ -0,0 +1,132 @@
+import threading
+from flask import request
+from flask_login import current_user
+from flask_socketio import join_room
+from sqlalchemy.orm import joinedload
+from extensions import db, socketio
+from models import DersOturum, YoklamaKayit, Student, User
+from utils.tracing import span, KIND_PRODUCER
+
+# Aktif oturumlarda derste bulunan öğrencilerin bellek içi kümesi:
+#   {OturumID: {'seq': delta sıra numarası, 'present': {OgrenciID: (OgrenciNo, Ad Soyad)}}}
+# Küme oturum başına bir kez YoklamaKayit'tan doldurulur, sonra yalnızca yeni kayıtlarla güncellenir.
+# Yoklama ekleyen istekler kümeyi eklemeden önce doldurur (prepare_presence); böylece hiçbir küme,
+# mark_present'i henüz çağrılmamış bir kaydı içermez ve her yeni öğrenci için fark gönderilir.
+# Socket.IO tek süreçte çalıştığı için (eventlet worker) küme süreç içinde tutulur.
+_sessions = {}
+_lock = threading.Lock()
+
+
+def room_name(session_id):
+    return f'session_{session_id}'
+
+
+def _load_present(session_id):
+    rows = db.session.query(YoklamaKayit.OgrenciID, Student.OgrenciNo, User.Isim, User.Soyisim).\
+        join(Student, YoklamaKayit.OgrenciID == Student.OgrenciID).\
+        join(User, Student.UserID == User.id).\
+        filter(YoklamaKayit.OturumID == session_id).all()
+    return {row[0]: (row[1], f"{row[2]} {row[3]}") for row in rows}
+
+
+def _session_state(session_id):
+    state = _sessions.get(session_id)
+    if state is None:
+        present = _load_present(session_id)
+        with _lock:
+            # Aynı anda dolduran başka bir istek varsa onun kümesi kullanılır
+            state = _sessions.setdefault(session_id, {'seq': 0, 'present': present})
+    return state
+
+
+def prepare_presence(session_ids):
+    """
+    Oturumların kümesini yoklama kayıtları eklenmeden önce doldurur. Küme eklemeden sonra
+    doldurulursa yeni kayıt zaten kümede görünür ve mark_present farkı göndermez.
+    """
+    for session_id in session_ids:
+        _session_state(session_id)
+
+
+def presence_snapshot(session_id):
+    """
+    Oturumun anlık katılım listesini döndürür; yeniden bağlanan paneller için kullanılır.
+    """
+    state = _session_state(session_id)
+    with _lock:
+        present = dict(state['present'])
+        seq = state['seq']
+    return {
+        'session_id': session_id,
+        'seq': seq,
+        'count': len(present),
+        'present': [
+            {'student_id': student_id, 'student_no': student_no, 'student_name': student_name}
+            for student_id, (student_no, student_name) in present.items()
+        ]
+    }
+
+
+def mark_present(session_id, students):
+    """
+    Yeni yoklama kayıtlarını kümeye ekler ve aboneli akademisyen panellerine yalnızca farkı gönderir.
+    students: (OgrenciID, OgrenciNo, Ad Soyad) üçlüleri. Kümede zaten olanlar için olay gönderilmez;
+    bu yüzden kayıtlar eklenmeden önce prepare_presence çağrılmış olmalıdır.
+    """
+    state = _session_state(session_id)
+    joined = []
+    with _lock:
+        for student_id, student_no, student_name in students:
+            if student_id not in state['present']:
+                state['present'][student_id] = (student_no, student_name)
+                joined.append({'student_id': student_id, 'student_no': student_no, 'student_name': student_name})
+        if not joined:
+            return None
+        state['seq'] += 1
+        delta = {'session_id': session_id, 'seq': state['seq'], 'count': len(state['present']), 'joined': joined}
+
+    with span('socketio.emit attendance_delta', KIND_PRODUCER, room=room_name(session_id), joined=len(joined)):
+        socketio.emit('attendance_delta', delta, room=room_name(session_id))
+    return delta
+
+
+def forget_session(session_id):
+    """
+    Kapanan veya silinen oturumun kümesini bellekten atar.
+    """
+    with _lock:
+        _sessions.pop(session_id, None)
+
+
+def prune_sessions(active_ids):
+    """
+    Aktif olmayan oturumların kümelerini atar (ör. ders silinirken forget_session çağrılmayanlar).
+    """
+    with _lock:
+        for session_id in [session_id for session_id in _sessions if session_id not in active_ids]:
+            del _sessions[session_id]
+
+
+def can_watch(session_obj):
+    """
+    Yalnızca dersin akademisyeni oturumun canlı paneline abone olabilir.
+    """
+    return (current_user.is_authenticated and current_user.is_academician() and
+            session_obj.ders.AkademisyenID == current_user.academician_details.AkademisyenID)
+
+
+@socketio.on('join')
+def on_join(data):
+    """
+    Akademisyen panelini oturum odasına ekler ve başlangıç için anlık listeyi gönderir.
+    """
+    room = (data or {}).get('room', '')
+    if not room.startswith('session_') or not room[len('session_'):].isdigit():
+        return {'status': 'error', 'message': 'Geçersiz oda'}
+    session_obj = db.session.get(DersOturum, int(room[len('session_'):]), options=[joinedload(DersOturum.ders)])
+    if not session_obj or not can_watch(session_obj):
+        return {'status': 'error', 'message': 'Yetkiniz yok'}
+
+    join_room(room)
+    socketio.emit('attendance_snapshot', presence_snapshot(session_obj.OturumID), to=request.sid)
+    return {'status': 'success'}
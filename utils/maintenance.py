@@ -0,0 +1,238 @@
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import update, or_
+from sqlalchemy.exc import IntegrityError
+from extensions import db, socketio
+from models import DersOturum, PasswordResetToken, MaintenanceLease, delete_orphan_attendance
+from utils.live import forget_session, prune_sessions
+from utils.qr_rotation import forget_qr, prune_windows
+
+# Süreç içi bakım zamanlayıcısı. Her işçi MAINTENANCE_TICK saniyede bir vadesi gelen işlere bakar;
+# bir işi çalıştırmak için maintenance_leases tablosundaki satırını koşullu UPDATE ile kilitlemesi
+# gerekir. Böylece birden çok işçi veya sunucu olsa da her iş her aralıkta yalnızca bir kez çalışır
+# ve zamanlama yeniden başlatmalardan etkilenmez. Kilit sahibi öldüyse kilit
+# MAINTENANCE_LEASE_SECONDS sonra düşer.
+#   {iş adı: MaintenanceJob}
+_jobs = {}
+_scheduler = {'owner': None}
+_lock = threading.Lock()
+
+
+class MaintenanceJob:
+    """
+    Zamanlanmış bir bakım işi; interval_key işin aralığını (saniye) tutan konfigürasyon anahtarıdır.
+    """
+
+    def __init__(self, name, func, interval_key):
+        self.name = name
+        self.func = func
+        self.interval_key = interval_key
+
+
+def maintenance_job(name, interval_key):
+    """
+    Fonksiyonu bakım işi olarak kaydeden dekoratör. Fonksiyon app alır ve kısa bir özet metni döndürür.
+    """
+    def decorator(func):
+        _jobs[name] = MaintenanceJob(name, func, interval_key)
+        return func
+    return decorator
+
+
+def _ensure_leases(app, now):
+    # Yeni işin ilk çalışması bir aralık sonradır; aynı satırı ekleyen diğer işçi IntegrityError alır
+    existing = {name for (name,) in db.session.query(MaintenanceLease.name)}
+    for job in _jobs.values():
+        if job.name in existing:
+            continue
+        try:
+            db.session.add(MaintenanceLease(
+                name=job.name, next_run=now + timedelta(seconds=app.config[job.interval_key])))
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+
+
+def _acquire(name, owner, now, lease_seconds):
+    result = db.session.execute(
+        update(MaintenanceLease).
+        where(MaintenanceLease.name == name, MaintenanceLease.next_run <= now,
+              or_(MaintenanceLease.lease_until.is_(None), MaintenanceLease.lease_until < now)).
+        values(owner=owner, lease_until=now + timedelta(seconds=lease_seconds))
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def _release(name, owner, interval, status):
+    now = datetime.utcnow()
+    db.session.execute(
+        update(MaintenanceLease).
+        where(MaintenanceLease.name == name, MaintenanceLease.owner == owner).
+        values(lease_until=None, next_run=now + timedelta(seconds=interval), last_run=now,
+               last_status=status[:200])
+    )
+    db.session.commit()
+
+
+def run_due_jobs(app, owner):
+    """
+    Vadesi gelen ve kilidi alınabilen işleri sırayla çalıştırır. Çalıştırılan iş adlarını döndürür.
+    """
+    now = datetime.utcnow()
+    _ensure_leases(app, now)
+    ran = []
+    for job in _jobs.values():
+        interval = app.config[job.interval_key]
+        if not interval or not _acquire(job.name, owner, now, app.config['MAINTENANCE_LEASE_SECONDS']):
+            continue
+        started = time.perf_counter()
+        try:
+            status = job.func(app)
+        except Exception as error:
+            db.session.rollback()
+            app.logger.exception('Bakım işi %s başarısız', job.name)
+            status = f'hata: {type(error).__name__}: {error}'
+        status = f'{status} ({time.perf_counter() - started:.2f} sn)'
+        _release(job.name, owner, interval, status)
+        app.logger.info('Bakım işi %s: %s', job.name, status)
+        ran.append(job.name)
+    return ran
+
+
+def _scheduler_loop(app, owner):
+    while True:
+        try:
+            with app.app_context():
+                run_due_jobs(app, owner)
+        except Exception:
+            # Veritabanı geçici olarak erişilemezse bir sonraki turda yeniden denenir
+            app.logger.exception('Bakım zamanlayıcısı turu başarısız')
+        socketio.sleep(app.config['MAINTENANCE_TICK'])
+
+
+def _start_scheduler(app):
+    # gunicorn işçisi fork edildikten sonra ilk istekte başlatılır; betikler (init_db.py vb.) başlatmaz
+    if _scheduler['owner'] is not None:
+        return
+    with _lock:
+        if _scheduler['owner'] is not None:
+            return
+        _scheduler['owner'] = f'{socket.gethostname()}:{os.getpid()}'
+    socketio.start_background_task(_scheduler_loop, app, _scheduler['owner'])
+
+
+def init_maintenance(app):
+    """
+    MAINTENANCE_ENABLED ise zamanlayıcıyı ilk istekte arka plan görevi olarak başlatır.
+    """
+    if not app.config['MAINTENANCE_ENABLED']:
+        return
+    app.before_request(lambda: _start_scheduler(app))
+
+
+def maintenance_status():
+    """
+    İşlerin son çalışma zamanını, sonucunu ve bir sonraki çalışma zamanını döndürür.
+    """
+    return {
+        lease.name: {
+            'next_run': lease.next_run.isoformat(),
+            'last_run': lease.last_run.isoformat() if lease.last_run else None,
+            'last_status': lease.last_status,
+            'running': bool(lease.lease_until and lease.lease_until > datetime.utcnow()),
+            'owner': lease.owner
+        }
+        for lease in MaintenanceLease.query.order_by(MaintenanceLease.name)
+    }
+
+
+@maintenance_job('close_sessions', 'MAINTENANCE_CLOSE_SESSIONS_INTERVAL')
+def close_stale_sessions(app):
+    """
+    SESSION_MAX_DURATION saniyeden uzun süredir açık kalan oturumları stop_attendance gibi kapatır.
+    """
+    max_duration = app.config['SESSION_MAX_DURATION']
+    if not max_duration:
+        return 'kapalı'
+    # BaslangicZamani start_attendance'ta yerel saatle yazılır
+    cutoff = datetime.now() - timedelta(seconds=max_duration)
+    stale = [row[0] for row in db.session.query(DersOturum.OturumID).
+             filter(DersOturum.AktifMi == True, DersOturum.BaslangicZamani < cutoff)]
+    if not stale:
+        return '0 oturum kapatıldı'
+    closed = DersOturum.query.filter(DersOturum.OturumID.in_(stale), DersOturum.AktifMi == True).\
+        update({'AktifMi': False, 'BitisZamani': datetime.utcnow()}, synchronize_session=False)
+    db.session.commit()
+    for session_id in stale:
+        forget_session(session_id)
+        forget_qr(session_id)
+    return f'{closed} oturum kapatıldı'
+
+
+@maintenance_job('purge_tokens', 'MAINTENANCE_PURGE_TOKENS_INTERVAL')
+def purge_expired_tokens(app):
+    """
+    Süresi dolmuş şifre sıfırlama jetonlarını siler.
+    """
+    deleted = PasswordResetToken.query.filter(PasswordResetToken.expiration_time < datetime.utcnow()).\
+        delete(synchronize_session=False)
+    db.session.commit()
+    return f'{deleted} jeton silindi'
+
+
+@maintenance_job('derived', 'MAINTENANCE_DERIVED_INTERVAL')
+def rebuild_derived_state(app):
+    """
+    Oturumu silinmiş yoklama kayıtlarını temizler ve bellekteki canlı yoklama kümeleri ile QR
+    pencerelerinden aktif olmayan oturumlara ait olanları atar (yalnızca bu işçinin belleği).
+    """
+    orphans = delete_orphan_attendance()
+    db.session.commit()
+    active_ids = {row[0] for row in db.session.query(DersOturum.OturumID).filter(DersOturum.AktifMi == True)}
+    prune_sessions(active_ids)
+    prune_windows(active_ids)
+    return f'{orphans} sahipsiz yoklama kaydı silindi, {len(active_ids)} aktif oturum'
+
+
+@maintenance_job('analyze', 'MAINTENANCE_ANALYZE_INTERVAL')
+def refresh_statistics(app):
+    """
+    Sorgu planlayıcısının tablo istatistiklerini yeniler (SQLite ve PostgreSQL).
+    """
+    dialect = db.engine.dialect.name
+    with db.engine.connect() as connection:
+        if dialect == 'sqlite':
+            # Her indeks için örneklem sınırı; büyük tablolarda ANALYZE süresini sınırlar
+            connection.exec_driver_sql('PRAGMA analysis_limit=1000')
+            connection.exec_driver_sql('ANALYZE')
+        elif dialect == 'postgresql':
+            connection.exec_driver_sql('ANALYZE')
+        else:
+            return f'{dialect} desteklenmiyor'
+        connection.commit()
+    return f'{dialect} istatistikleri yenilendi'
+
+
+def _sqlite_size(connection):
+    return (connection.exec_driver_sql('PRAGMA page_count').scalar() *
+            connection.exec_driver_sql('PRAGMA page_size').scalar())
+
+
+@maintenance_job('vacuum', 'MAINTENANCE_VACUUM_INTERVAL')
+def vacuum_database(app):
+    """
+    SQLite dosyasını yeniden yazarak silinen satırların alanını geri kazanır.
+    PostgreSQL'de bu iş autovacuum'a bırakılır.
+    """
+    if db.engine.dialect.name != 'sqlite':
+        return 'atlandı (autovacuum)'
+    # VACUUM açık bir işlem içinde çalışamaz
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        before = _sqlite_size(connection)
+        connection.exec_driver_sql('VACUUM')
+        after = _sqlite_size(connection)
+    return f'{before / 1048576:.1f} MB -> {after / 1048576:.1f} MB'
@@ -0,0 +1,241 @@
+import hashlib
+import time
+from datetime import datetime
+from io import BytesIO
+from sqlalchemy import select, func, or_, text, inspect, Integer, Boolean, String
+from sqlalchemy.schema import CreateTable, CreateIndex, AddConstraint
+from extensions import db
+
+# SQLite'tan PostgreSQL'e veri taşıma. models.py'deki tablolar yabancı anahtar sırasıyla,
+# birincil anahtar sırasında batch_size satırlık parçalar halinde okunur ve her parça COPY ile
+# yüklenir; bellek kullanımı tablo boyutundan bağımsızdır. Birincil anahtarlar korunur.
+# Doğrulama için her tablonun COPY metni (aynı sırada) SHA-1 ile özetlenir; hedefteki satırlar
+# geri okunup aynı biçimde kodlandığında özetler eşleşmelidir.
+# pg_restore gibi, hedefte olmayan tablolar yabancı anahtar ve ikincil indeks olmadan oluşturulur;
+# bunlar veri yüklendikten sonra tek geçişte eklenir (satır başına tetikleyici ve indeks bakımı yerine).
+
+
+class MigrationError(Exception):
+    """
+    Taşıma başlatılamadığında veya doğrulama başarısız olduğunda fırlatılır.
+    """
+
+
+def _escape(value):
+    # COPY metin biçimi: ters eğik çizgi, sekme ve satır sonları kaçırılır
+    return value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def _encoder(column):
+    if isinstance(column.type, Boolean):
+        return lambda value: '\\N' if value is None else ('t' if value else 'f')
+    if isinstance(column.type, Integer):
+        return lambda value: '\\N' if value is None else str(value)
+    if isinstance(column.type, String):
+        return lambda value: '\\N' if value is None else _escape(value)
+    return lambda value: '\\N' if value is None else (
+        value.isoformat(' ') if isinstance(value, datetime) else _escape(str(value)))
+
+
+def _quote(engine, name):
+    return engine.dialect.identifier_preparer.quote(name)
+
+
+def _orphan_filters(table):
+    # Yabancı anahtarı boş olmayan ve üst tabloda karşılığı olmayan satırlar (SQLite bunları engellemez)
+    return [
+        or_(fk.parent.is_(None), fk.parent.in_(select(fk.column)))
+        for fk in table.foreign_keys
+    ]
+
+
+def preflight(source, tables, skip_orphans):
+    """
+    PostgreSQL'in reddedeceği satırları taşımadan önce bulur: üst kaydı olmayan yabancı anahtarlar
+    (skip_orphans ile atlanabilir), sütun uzunluğunu aşan metinler ve benzersiz indeksleri
+    bozan çift satırlar. Sorun listesi döndürür.
+    """
+    problems = []
+    with source.connect() as connection:
+        for table in tables:
+            if not skip_orphans:
+                for fk in table.foreign_keys:
+                    count = connection.execute(select(func.count()).select_from(table).where(
+                        fk.parent.is_not(None), fk.parent.not_in(select(fk.column)))).scalar()
+                    if count:
+                        problems.append(f'{table.name}.{fk.parent.name}: {count} satırın '
+                                        f'{fk.column.table.name} kaydı yok')
+            for column in table.columns:
+                if isinstance(column.type, String) and column.type.length:
+                    count = connection.execute(select(func.count()).select_from(table).where(
+                        func.length(column) > column.type.length)).scalar()
+                    if count:
+                        problems.append(f'{table.name}.{column.name}: {count} değer '
+                                        f'{column.type.length} karakterden uzun')
+            for index in table.indexes:
+                if index.unique:
+                    duplicates = select(*index.columns).group_by(*index.columns).having(func.count() > 1).subquery()
+                    count = connection.execute(select(func.count()).select_from(duplicates)).scalar()
+                    if count:
+                        problems.append(f'{table.name}.{index.name}: {count} değer birden fazla satırda '
+                                        f'(init_db.py çift kayıtları temizler)')
+    return problems
+
+
+def _copy_batches(connection, table, batch_size, filters):
+    """
+    Tabloyu birincil anahtar sırasıyla okur ve her parça için (satır sayısı, UTF-8 COPY metni) üretir.
+    """
+    encoders = [_encoder(column) for column in table.columns]
+    query = select(table).where(*filters).order_by(*table.primary_key.columns)
+    result = connection.execution_options(stream_results=True, yield_per=batch_size).execute(query)
+    for rows in result.partitions():
+        lines = ['\t'.join([encode(value) for encode, value in zip(encoders, row)]) for row in rows]
+        yield len(rows), ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def copy_table(source, target, table, batch_size, skip_orphans=False):
+    """
+    Tek bir tabloyu tek işlemde kopyalar; (satır sayısı, özet) döndürür.
+    """
+    filters = _orphan_filters(table) if skip_orphans else []
+    columns = ', '.join(_quote(target, column.name) for column in table.columns)
+    # Metin bağlantının istemci kodlamasından bağımsız olarak UTF-8 bayt gönderilir
+    statement = f"COPY {_quote(target, table.name)} ({columns}) FROM STDIN WITH (ENCODING 'UTF8')"
+    digest = hashlib.sha1()
+    copied = 0
+    with source.connect() as reader, target.begin() as writer:
+        cursor = writer.connection.dbapi_connection.cursor()
+        try:
+            for count, chunk in _copy_batches(reader, table, batch_size, filters):
+                digest.update(chunk)
+                cursor.copy_expert(statement, BytesIO(chunk))
+                copied += count
+        finally:
+            cursor.close()
+    return copied, digest.hexdigest()
+
+
+def table_checksum(engine, table, batch_size, skip_orphans=False):
+    """
+    Tablonun satır sayısını ve COPY metninin özetini hesaplar (kaynak ve hedefte aynı sonuç beklenir).
+    """
+    filters = _orphan_filters(table) if skip_orphans else []
+    digest = hashlib.sha1()
+    count = 0
+    with engine.connect() as connection:
+        for rows, chunk in _copy_batches(connection, table, batch_size, filters):
+            digest.update(chunk)
+            count += rows
+    return count, digest.hexdigest()
+
+
+def reset_sequences(target, tables):
+    """
+    Birincil anahtarlar elle yazıldığından SERIAL dizilerini tablodaki en büyük değerin sonrasına alır.
+    """
+    with target.begin() as connection:
+        for table in tables:
+            key = list(table.primary_key.columns)
+            if len(key) != 1 or not isinstance(key[0].type, Integer):
+                continue
+            table_name, column_name = _quote(target, table.name), _quote(target, key[0].name)
+            connection.execute(text(
+                f'SELECT setval(pg_get_serial_sequence(:table, :column), COALESCE(MAX({column_name}), 0) + 1, false) '
+                f'FROM {table_name}'
+            ), {'table': table_name, 'column': key[0].name})
+
+
+def prepare_target(target, tables, truncate):
+    """
+    Eksik tabloları yabancı anahtarsız ve ikincil indekssiz oluşturur; hedef tablolar boş değilse
+    truncate verilmedikçe durur.
+    """
+    if target.dialect.name != 'postgresql':
+        raise MigrationError(f'Hedef PostgreSQL olmalı ({target.dialect.name} verildi)')
+    existing = set(inspect(target).get_table_names())
+    with target.begin() as connection:
+        for table in tables:
+            if table.name not in existing:
+                connection.execute(CreateTable(table, include_foreign_key_constraints=[]))
+        filled = [table.name for table in tables
+                  if connection.execute(select(func.count()).select_from(table)).scalar()]
+        if filled and not truncate:
+            raise MigrationError(f"Hedef tablolar boş değil: {', '.join(filled)} (--truncate ile boşaltılabilir)")
+        if filled:
+            connection.execute(text('TRUNCATE ' + ', '.join(_quote(target, table.name) for table in tables) +
+                                    ' RESTART IDENTITY CASCADE'))
+
+
+def complete_schema(target, tables):
+    """
+    Hedefte eksik olan indeksleri ve yabancı anahtarları ekler. Yabancı anahtarlar eklenirken
+    PostgreSQL tüm satırları tek sorguda doğrular. Yarıda kalmış bir taşımadan sonra da güvenle çalışır.
+    """
+    inspector = inspect(target)
+    with target.begin() as connection:
+        for table in tables:
+            indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    connection.execute(CreateIndex(index))
+        for table in tables:
+            foreign_keys = {(tuple(fk['constrained_columns']), fk['referred_table'])
+                            for fk in inspector.get_foreign_keys(table.name)}
+            for constraint in table.foreign_key_constraints:
+                key = (tuple(constraint.column_keys), constraint.referred_table.name)
+                if key not in foreign_keys:
+                    connection.execute(AddConstraint(constraint))
+
+
+def migrate(source, target, batch_size=50000, skip_orphans=False, truncate=False, log=print):
+    """
+    Tüm tabloları kopyalar, dizileri günceller ve hedefi yeniden okuyarak doğrular.
+    Her tablo için (ad, satır, süre, doğrulandı mı) listesi döndürür; uyuşmazlıkta MigrationError fırlatır.
+    """
+    if source.dialect.name != 'sqlite':
+        raise MigrationError(f'Kaynak SQLite olmalı ({source.dialect.name} verildi)')
+    tables = db.metadata.sorted_tables
+    problems = preflight(source, tables, skip_orphans)
+    if problems:
+        raise MigrationError('Kaynakta PostgreSQL\'in kabul etmeyeceği satırlar var:\n  ' + '\n  '.join(problems))
+    prepare_target(target, tables, truncate)
+
+    copied = {}
+    for table in tables:
+        started = time.perf_counter()
+        rows, checksum = copy_table(source, target, table, batch_size, skip_orphans)
+        elapsed = time.perf_counter() - started
+        copied[table.name] = (rows, checksum, elapsed)
+        log(f'{table.name:<24} {rows:>10} satır  {elapsed:7.1f} sn  {rows / max(elapsed, 1e-6):>9.0f} satır/sn')
+    started = time.perf_counter()
+    complete_schema(target, tables)
+    log(f"{'indeks ve yabancı anahtar':<24} {'':>10}        {time.perf_counter() - started:7.1f} sn")
+    reset_sequences(target, tables)
+
+    results = []
+    mismatched = []
+    for table in tables:
+        rows, checksum, elapsed = copied[table.name]
+        target_rows, target_checksum = table_checksum(target, table, batch_size)
+        verified = (target_rows, target_checksum) == (rows, checksum)
+        if not verified:
+            mismatched.append(f'{table.name}: kaynak {rows} satır {checksum[:12]}, hedef {target_rows} satır {target_checksum[:12]}')
+        results.append((table.name, rows, elapsed, verified))
+    if mismatched:
+        raise MigrationError('Doğrulama başarısız:\n  ' + '\n  '.join(mismatched))
+    return results
+
+
+def verify(source, target, batch_size=50000, skip_orphans=False):
+    """
+    Kopyalamadan kaynak ve hedefin satır sayılarını ve özetlerini karşılaştırır.
+    (ad, kaynak satır, hedef satır, eşleşiyor mu) listesi döndürür.
+    """
+    results = []
+    for table in db.metadata.sorted_tables:
+        source_rows, source_checksum = table_checksum(source, table, batch_size, skip_orphans)
+        target_rows, target_checksum = table_checksum(target, table, batch_size)
+        results.append((table.name, source_rows, target_rows,
+                        (source_rows, source_checksum) == (target_rows, target_checksum)))
+    return results
@@ -0,0 +1,292 @@
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from utils.tracing import span
+
+try:
+    import eventlet
+    from eventlet import tpool
+except ImportError:  # eventlet yalnızca gunicorn worker'ında gerekli
+    eventlet = None
+    tpool = None
+
+
+class OffloadRejected(Exception):
+    """
+    Havuzun bekleme kuyruğu dolu olduğunda fırlatılır.
+    """
+
+
+class OffloadTimeout(Exception):
+    """
+    İş belirlenen süre içinde tamamlanmadığında fırlatılır.
+    """
+
+
+def eventlet_active():
+    """
+    Uygulama eventlet worker'ı altında (monkey patch uygulanmış) çalışıyorsa True döner.
+    """
+    return eventlet is not None and eventlet.patcher.is_monkey_patched('thread')
+
+
+class OffloadPool:
+    """
+    Bloklayan işleri eventlet hub'ı dışında çalıştıran sınırlı kuyruklu havuz.
+    kind='process': GIL'e bağlı saf Python işleri (grafik çizimi, Excel okuma).
+    kind='thread': GIL'i bırakan C eklentisi işleri (PNG kodlama, şifre hash'leme).
+    """
+
+    def __init__(self, name, kind, max_workers, max_pending, timeout):
+        self.name = name
+        self.kind = kind
+        self._executor = None
+        self._lock = threading.Lock()
+        # Sayaçlar çağıran iş parçacığından ve havuzun tamamlanma geri çağrılarından güncellenir
+        self._metrics_lock = threading.Lock()
+        self.configure(max_workers, max_pending, timeout)
+        self.reset_metrics()
+
+    def configure(self, max_workers, max_pending, timeout):
+        """
+        Havuz boyutunu, kuyruk sınırını ve varsayılan zaman aşımını ayarlar.
+        """
+        self.shutdown()
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+
+    def reset_metrics(self):
+        with self._metrics_lock:
+            self._metrics = {
+                'submitted': 0,
+                'completed': 0,
+                'failed': 0,
+                'rejected': 0,
+                'timed_out': 0,
+                'in_flight': 0,
+                'max_in_flight': 0,
+                'total_seconds': 0.0,
+                'max_seconds': 0.0
+            }
+
+    def metrics(self):
+        """
+        Havuzun anlık sayaçlarını döndürür.
+        """
+        with self._metrics_lock:
+            data = dict(self._metrics)
+        data['queue_depth'] = max(0, data['in_flight'] - self.max_workers)
+        data['max_workers'] = self.max_workers
+        data['max_pending'] = self.max_pending
+        return data
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                if self.kind == 'process':
+                    # fork, eventlet hub'ını ve veritabanı bağlantılarını kopyalayacağından spawn kullanılır
+                    self._executor = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context('spawn'))
+                else:
+                    self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix=f'offload-{self.name}')
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _start(self):
+        with self._metrics_lock:
+            self._metrics['submitted'] += 1
+            self._metrics['in_flight'] += 1
+            self._metrics['max_in_flight'] = max(self._metrics['max_in_flight'], self._metrics['in_flight'])
+        return time.perf_counter()
+
+    def _finish(self, started, ok, release=True):
+        elapsed = time.perf_counter() - started
+        with self._metrics_lock:
+            self._metrics['in_flight'] -= 1
+            self._metrics['completed' if ok else 'failed'] += 1
+            self._metrics['total_seconds'] += elapsed
+            self._metrics['max_seconds'] = max(self._metrics['max_seconds'], elapsed)
+        if release:
+            self._slots.release()
+
+    def _count(self, name):
+        with self._metrics_lock:
+            self._metrics[name] += 1
+
+    def run(self, func, *args, timeout=None, **kwargs):
+        """
+        İşi havuzda çalıştırır ve sonucunu bekler (yalnızca çağıran greenlet bekler).
+        Kuyruk doluysa OffloadRejected, süre aşılırsa OffloadTimeout fırlatır.
+        """
+        with span(f'offload {func.__name__}', pool=self.name):
+            return self._run(func, *args, timeout=timeout or self.timeout, **kwargs)
+
+    def _run(self, func, *args, timeout, **kwargs):
+        self._take_slots(1)
+        started = self._start()
+
+        if self.kind == 'thread' and eventlet_active():
+            # Yeşil iş parçacıkları C kodunda hub'ı bloklayacağından yerel tpool kullanılır.
+            # Yerel çağrı ayrı bir greenlet'te beklenir: zaman aşımında çağıran hemen döner,
+            # kuyruk yeri ise yerel iş parçacığı gerçekten bitince serbest bırakılır.
+            def job():
+                ok = False
+                try:
+                    result = tpool.execute(func, *args, **kwargs)
+                    ok = True
+                    return result
+                finally:
+                    self._finish(started, ok)
+
+            worker = eventlet.spawn(job)
+            try:
+                with eventlet.Timeout(timeout, OffloadTimeout(f'{self.name} işi {timeout} sn içinde bitmedi')):
+                    return worker.wait()
+            except OffloadTimeout:
+                self._count('timed_out')
+                raise
+
+        return self._result(self._submit(func, *args, started=started, **kwargs), timeout)
+
+    def _take_slots(self, count):
+        # Yuvalar ya hep birlikte alınır ya da hiç alınmaz
+        for taken in range(count):
+            if not self._slots.acquire(blocking=False):
+                for _ in range(taken):
+                    self._slots.release()
+                self._count('rejected')
+                raise OffloadRejected(f'{self.name} havuzu dolu')
+
+    def _submit(self, func, *args, started, release=True, **kwargs):
+        try:
+            future = self._get_executor().submit(func, *args, **kwargs)
+        except Exception:
+            self._finish(started, False, release)
+            raise
+        # Kuyruk yeri, zaman aşımında değil iş gerçekten bittiğinde serbest bırakılır
+        future.add_done_callback(lambda f: self._finish(started, not f.cancelled() and f.exception() is None, release))
+        return future
+
+    def _result(self, future, timeout):
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self._count('timed_out')
+            future.cancel()
+            raise OffloadTimeout(f'{self.name} işi {timeout} sn içinde bitmedi')
+        except BrokenProcessPool:
+            # Çöken işçi süreçleri bir sonraki çağrıda yeniden oluşturulur
+            self.shutdown()
+            raise
+
+    def imap(self, func, args_list, timeout=None):
+        """
+        Aynı işi birden çok argüman grubu için havuza dağıtır, sonuçları aynı sırayla üretir.
+        En fazla max_workers kuyruk yeri çağrı anında alınır ve sonuçlar bitene kadar işler
+        arasında devredilir; havuz doluysa OffloadRejected akış (ör. zip yanıtı) başlamadan
+        fırlatılır ve tek istek bekleme kuyruğunu doldurmaz.
+        """
+        timeout = timeout or self.timeout
+        args_list = list(args_list)
+
+        if self.kind == 'thread' and eventlet_active():
+            return (self.run(func, *args, timeout=timeout) for args in args_list)
+
+        reserved = min(self.max_workers, len(args_list))
+        self._take_slots(reserved)
+        return _OrderedResults(self, func, args_list, timeout, reserved)
+
+
+class _OrderedResults:
+    """
+    OffloadPool.imap sonuçlarını sırayla döndüren yineleyici. Ayrılan kuyruk yerleri sonuçlar
+    bitince, hata olunca, close() çağrılınca veya nesne çöpe gidince bırakılır; hâlâ çalışan
+    işlerin yerleri iş bitene kadar tutulur.
+    """
+
+    def __init__(self, pool, func, args_list, timeout, reserved):
+        self._pool = pool
+        self._func = func
+        self._args = iter(args_list)
+        self._timeout = timeout
+        self._reserved = reserved
+        self._pending = deque()
+        self._closed = False
+        try:
+            for _ in range(reserved):
+                self._submit_next()
+        except Exception:
+            self.close()
+            raise
+
+    def _submit_next(self):
+        args = next(self._args, None)
+        if args is not None:
+            self._pending.append(self._pool._submit(self._func, *args, started=self._pool._start(), release=False))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self._pending:
+            self.close()
+            raise StopIteration
+        try:
+            result = self._pool._result(self._pending[0], self._timeout)
+            # Yer, önceki iş bittikten sonra sıradakine geçer
+            self._pending.popleft()
+            self._submit_next()
+        except Exception:
+            self.close()
+            raise
+        return result
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for future in self._pending:
+            future.cancel()
+            future.add_done_callback(lambda f: self._pool._slots.release())
+        for _ in range(self._reserved - len(self._pending)):
+            self._pool._slots.release()
+        self._pending.clear()
+
+    def __del__(self):
+        self.close()
+
+
+process_pool = OffloadPool('process', 'process', max_workers=2, max_pending=16, timeout=30)
+thread_pool = OffloadPool('thread', 'thread', max_workers=4, max_pending=64, timeout=10)
+
+
+def init_offload(app):
+    """
+    Havuzları uygulama konfigürasyonuna göre ayarlar.
+    """
+    process_pool.configure(
+        app.config['OFFLOAD_PROCESS_WORKERS'],
+        app.config['OFFLOAD_PROCESS_MAX_PENDING'],
+        app.config['OFFLOAD_PROCESS_TIMEOUT']
+    )
+    thread_pool.configure(
+        app.config['OFFLOAD_THREAD_WORKERS'],
+        app.config['OFFLOAD_THREAD_MAX_PENDING'],
+        app.config['OFFLOAD_THREAD_TIMEOUT']
+    )
+
+
+def offload_metrics():
+    """
+    Tüm havuzların sayaçlarını döndürür.
+    """
+    return {pool.name: pool.metrics() for pool in (process_pool, thread_pool)}
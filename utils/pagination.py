@@ -0,0 +1,102 @@
+from flask import request, current_app, url_for
+from sqlalchemy import or_
+from sqlalchemy.orm import contains_eager
+from models import Student, CourseStudent, User
+
+
+class KeysetPage:
+    """
+    Anahtar (keyset) tabanlı sayfalamanın tek bir sayfasını temsil eder.
+    """
+
+    def __init__(self, items, key_name, has_next, has_prev):
+        self.items = items
+        self.key_name = key_name
+        self.has_next = has_next
+        self.has_prev = has_prev
+
+    @property
+    def next_cursor(self):
+        return getattr(self.items[-1], self.key_name) if self.items and self.has_next else None
+
+    @property
+    def prev_cursor(self):
+        return getattr(self.items[0], self.key_name) if self.items and self.has_prev else None
+
+    def url_for_next(self, endpoint, **values):
+        return url_for(endpoint, after=self.next_cursor, **values) if self.next_cursor is not None else None
+
+    def url_for_prev(self, endpoint, **values):
+        return url_for(endpoint, before=self.prev_cursor, **values) if self.prev_cursor is not None else None
+
+    def to_dict(self):
+        return {
+            'next_cursor': self.next_cursor,
+            'prev_cursor': self.prev_cursor,
+            'has_next': self.has_next,
+            'has_prev': self.has_prev,
+            'count': len(self.items)
+        }
+
+
+def get_page_args(cursor_type=str):
+    """
+    İstekten sayfalama, sıralama ve filtre parametrelerini okur.
+    """
+    limit = request.args.get('limit', type=int) or current_app.config['PAGE_SIZE']
+    limit = max(1, min(limit, current_app.config['MAX_PAGE_SIZE']))
+    after = request.args.get('after', type=cursor_type)
+    before = request.args.get('before', type=cursor_type)
+    descending = request.args.get('sort') == 'desc'
+    search = (request.args.get('q') or '').strip()
+    return {
+        'limit': limit,
+        'after': after,
+        'before': before,
+        'descending': descending,
+        'search': search
+    }
+
+
+def keyset_paginate(query, column, limit, after=None, before=None, descending=False):
+    """
+    Sorguyu benzersiz bir sütuna göre (OFFSET kullanmadan) sayfalar.
+    Sayfa maliyeti toplam kayıt sayısından bağımsızdır, yalnızca limit kadar satır okunur.
+    """
+    key_name = column.key
+    backwards = before is not None
+
+    # Geriye doğru sayfalamada sıralama yönü tersine çevrilir, sonuç sonra düzeltilir
+    reverse = descending != backwards
+    if backwards:
+        query = query.filter(column > before if descending else column < before)
+    elif after is not None:
+        query = query.filter(column < after if descending else column > after)
+
+    query = query.order_by(column.desc() if reverse else column.asc())
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if backwards:
+        rows.reverse()
+        return KeysetPage(rows, key_name, has_next=True, has_prev=has_more)
+    return KeysetPage(rows, key_name, has_next=has_more, has_prev=after is not None)
+
+
+def course_roster_query(course_id, search=''):
+    """
+    Dersin öğrenci listesi için kullanıcı bilgisiyle birlikte yüklenen sorguyu döndürür.
+    Arama ifadesi öğrenci numarası önekine veya ad/soyada göre filtrelenir.
+    """
+    query = Student.query.join(CourseStudent, Student.OgrenciID == CourseStudent.OgrenciID).\
+        join(User, Student.UserID == User.id).\
+        filter(CourseStudent.DersID == course_id).\
+        options(contains_eager(Student.user))
+    if search:
+        query = query.filter(or_(
+            Student.OgrenciNo.like(f'{search}%'),
+            User.Isim.ilike(f'%{search}%'),
+            User.Soyisim.ilike(f'%{search}%')
+        ))
+    return query
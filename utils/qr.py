@@ -0,0 +1,54 @@
+import base64
+from io import BytesIO
+import qrcode
+from flask import current_app
+from itsdangerous import URLSafeTimedSerializer, BadSignature
+from utils.offload import thread_pool
+
+QR_TOKEN_SALT = 'yoklama-qr'
+
+
+def render_qr_png(data, box_size=10, border=4):
+    """
+    Verilen metin için QR kodu PNG olarak üretir ve base64 metni döndürür.
+    """
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=box_size,
+        border=border,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white")
+
+    buffered = BytesIO()
+    img.save(buffered, format="PNG")
+    return base64.b64encode(buffered.getvalue()).decode('utf-8')
+
+def generate_qr_base64(data):
+    """
+    QR kodu eventlet hub'ını bloklamadan iş parçacığı havuzunda üretir.
+    """
+    return thread_pool.run(render_qr_png, data)
+
+def _token_serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt=QR_TOKEN_SALT)
+
+def sign_qr_token(session_id):
+    """
+    Oturum için sunucu tarafından imzalanmış, üretim zamanını içeren QR jetonu üretir.
+    """
+    return _token_serializer().dumps({'s': session_id})
+
+def verify_qr_token(token):
+    """
+    QR jetonunu doğrular; (OturumID, üretim zamanı) döndürür, geçersizse None döner.
+    Çevrimdışı yüklemeler gecikmeli gelebileceğinden yaş kontrolü burada yapılmaz;
+    verify_scans yükleme zamanını oturumun bitişi ve CHECKIN_OFFLINE_MAX_AGE ile sınırlar.
+    """
+    try:
+        data, issued_at = _token_serializer().loads(token, return_timestamp=True)
+        return int(data['s']), issued_at.replace(tzinfo=None)
+    except (BadSignature, KeyError, TypeError, ValueError):
+        return None
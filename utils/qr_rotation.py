@@ -0,0 +1,164 @@
+import json
+import threading
+import time
+from datetime import datetime
+from flask import current_app, request
+from flask_socketio import join_room
+from sqlalchemy.orm import joinedload
+from extensions import db, socketio
+from models import DersOturum
+from utils.qr import generate_qr_base64, sign_qr_token
+from utils.live import can_watch
+
+# QR kodu döndürme: her oturum için QR_REFRESH_INTERVAL saniyelik pencere başına yalnızca bir QR
+# üretilir (veritabanı güncellemesi + PNG) ve oturumun QR odasındaki tüm ekranlara gönderilir.
+# Odada ekran olduğu sürece oturum başına tek bir arka plan görevi çalışır; son ekran ayrılınca
+# veya oturum kapanınca durur. /refresh_qr (yoklamalı yedek yol) aynı penceredeki QR'ı döndürür.
+#   {OturumID: {'expires': pencerenin bittiği monotonic zaman, 'qr': ekranlara gönderilen veri}}
+# Socket.IO odaları gibi pencere de süreç içinde tutulur (tek eventlet worker).
+_windows = {}
+_render_locks = {}
+_rotators = set()
+_lock = threading.Lock()
+# Döndürme görevinin en kısa uykusu; pencere sonundan hemen önce uyanan görev dönüp durmasın
+_MIN_SLEEP = 0.05
+
+
+def qr_room(session_id):
+    return f'qr_{session_id}'
+
+
+def _render(session_obj, interval):
+    # Öğrenci sayfası yalnızca imzalı jetonu okur; veri QRCodeData sütununa (200 karakter) sığmalı
+    qr_data = {
+        'course_id': session_obj.DersID,
+        'session_id': session_obj.OturumID,
+        'timestamp': datetime.utcnow().isoformat(),
+        'token': sign_qr_token(session_obj.OturumID)
+    }
+    session_obj.QRCodeData = json.dumps(qr_data)
+    session_obj.QR_Olusma_Zamani = datetime.utcnow()
+    session_obj.QR_CODE_VERSION = session_obj.QR_CODE_VERSION + 1 if session_obj.QR_CODE_VERSION else 1
+    db.session.commit()
+
+    return {
+        'status': 'success',
+        'session_id': session_obj.OturumID,
+        'version': session_obj.QR_CODE_VERSION,
+        'qr_image': generate_qr_base64(session_obj.QRCodeData),
+        'last_refresh': datetime.utcnow().strftime('%H:%M:%S'),
+        'interval': interval
+    }
+
+
+def _current_window(session_obj):
+    # Geçerli pencereyi döndürür; dolduysa yenisini üretir. Aynı anda gelen çağrılar üretimi bekler.
+    session_id = session_obj.OturumID
+    with _lock:
+        render_lock = _render_locks.setdefault(session_id, threading.Lock())
+    with render_lock:
+        window = _windows.get(session_id)
+        if window is None or window['expires'] <= time.monotonic():
+            interval = current_app.config['QR_REFRESH_INTERVAL']
+            qr = _render(session_obj, interval)
+            window = _windows[session_id] = {'expires': time.monotonic() + interval, 'qr': qr}
+    return window
+
+
+def _with_refresh_in(window):
+    return dict(window['qr'], refresh_in=round(max(0.0, window['expires'] - time.monotonic()), 1))
+
+
+def current_qr(session_obj):
+    """
+    Oturumun geçerli penceredeki QR'ını döndürür; pencere dolduysa yenisini üretir.
+    Aynı anda gelen çağrılar üretimi bekleyip aynı QR'ı alır. refresh_in pencerenin kalan saniyesidir
+    (ekranda gösterilmek üzere yuvarlanmış).
+    """
+    return _with_refresh_in(_current_window(session_obj))
+
+
+def forget_qr(session_id):
+    """
+    Kapanan veya silinen oturumun QR penceresini bellekten atar.
+    """
+    with _lock:
+        _windows.pop(session_id, None)
+        _render_locks.pop(session_id, None)
+
+
+def prune_windows(active_ids):
+    """
+    Aktif olmayan oturumların QR pencerelerini atar.
+    """
+    with _lock:
+        for session_id in [session_id for session_id in _windows if session_id not in active_ids]:
+            _windows.pop(session_id, None)
+            _render_locks.pop(session_id, None)
+
+
+def _has_viewers(session_id):
+    return bool(socketio.server.manager.rooms.get('/', {}).get(qr_room(session_id)))
+
+
+def _rotate_loop(app, session_id, sent_version, expires):
+    """
+    Oturumun QR odasına her pencerede yeni QR'ı gönderir. Çıkış kararı _lock altında verilir ki
+    aynı anda katılan ekran, durmak üzere olan göreve güvenip QR'sız kalmasın.
+    Görev yuvarlanmamış pencere sonuna (expires) kadar uyur ve odanın zaten aldığı sürümü
+    (sent_version; görevi başlatan ekranınki) yeniden göndermez: erken uyanırsa pencere bitene
+    kadar yeniden uyur.
+    """
+    try:
+        while True:
+            socketio.sleep(max(expires - time.monotonic(), _MIN_SLEEP))
+            with _lock:
+                if not _has_viewers(session_id):
+                    return
+            try:
+                with app.app_context():
+                    session_obj = db.session.get(DersOturum, session_id)
+                    if session_obj is None or not session_obj.AktifMi:
+                        return
+                    window = _current_window(session_obj)
+                    qr = _with_refresh_in(window)
+            except Exception:
+                # Geçici hatalarda (ör. dolu havuz) ekranlar bir sonraki pencereyi veya yedek yolu kullanır
+                app.logger.exception('QR %s yenilenemedi', session_id)
+                expires = time.monotonic() + app.config['QR_REFRESH_INTERVAL']
+                continue
+            expires = window['expires']
+            if qr['version'] == sent_version:
+                continue
+            socketio.emit('qr_update', qr, room=qr_room(session_id))
+            sent_version = qr['version']
+    finally:
+        with _lock:
+            _rotators.discard(session_id)
+
+
+@socketio.on('watch_qr')
+def on_watch_qr(data):
+    """
+    QR ekranını oturumun QR odasına ekler, geçerli QR'ı gönderir ve döndürme görevi yoksa başlatır.
+    """
+    session_id = (data or {}).get('session_id')
+    if not isinstance(session_id, int):
+        return {'status': 'error', 'message': 'Geçersiz oturum'}
+    session_obj = db.session.get(DersOturum, session_id, options=[joinedload(DersOturum.ders)])
+    if not session_obj or not can_watch(session_obj):
+        return {'status': 'error', 'message': 'Yetkiniz yok'}
+
+    join_room(qr_room(session_id))
+    if not session_obj.AktifMi:
+        return {'status': 'success'}
+    # Yeniden bağlanan ekran bir sonraki pencereyi beklemeden güncel QR'ı alır
+    window = _current_window(session_obj)
+    socketio.emit('qr_update', _with_refresh_in(window), to=request.sid)
+    with _lock:
+        start = session_id not in _rotators
+        _rotators.add(session_id)
+    if start:
+        socketio.start_background_task(_rotate_loop, current_app._get_current_object(), session_id,
+                                       window['qr']['version'], window['expires'])
+    return {'status': 'success'}
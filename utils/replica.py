@@ -0,0 +1,75 @@
+import time
+from functools import wraps
+from flask import g, session, has_request_context, current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from utils.tracing import span
+
+# SQLALCHEMY_BINDS içindeki okuma replikasının anahtarı
+REPLICA_BIND = 'replica'
+
+
+class RoutingSession(Session):
+    """
+    read_replica ile işaretlenmiş isteklerdeki okuma sorgularını replikaya yönlendiren oturum.
+    Yazma sorguları, flush ve aynı istekte yazma yapıldıktan sonraki okumalar birincil veritabanına gider.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._replica_usable(clause):
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def commit(self):
+        # Flush sırasındaki SQL ifadeleri bu span'in altında görünür
+        with span('db.commit'):
+            super().commit()
+
+    def _replica_usable(self, clause):
+        if self._flushing or self.info.get('wrote'):
+            return False
+        if clause is not None and getattr(clause, 'is_dml', False):
+            return False
+        return has_request_context() and g.get('use_replica', False) and REPLICA_BIND in self._db.engines
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_flush(db_session, flush_context):
+    db_session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _mark_bulk_write(orm_execute_state):
+    # query.delete() ve insert() gibi toplu ifadeler flush olmadan çalışır
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _remember_write(db_session):
+    # Kullanıcı kendi yazdığını hemen okuyabilsin diye son yazma zamanı çerezde tutulur
+    if db_session.info.pop('wrote', False) and has_request_context():
+        session['last_write_at'] = time.time()
+
+
+def replica_is_fresh():
+    """
+    Kullanıcının son yazmasından bu yana replikanın yetişmesi için yeterli süre geçtiyse True döner.
+    """
+    last_write = session.get('last_write_at')
+    return not last_write or time.time() - last_write > current_app.config['REPLICA_STALENESS_SECONDS']
+
+
+def read_replica(view):
+    """
+    Yalnızca okuma yapan rapor ve panel rotalarının sorgularını replikaya yönlendirir.
+    Replika tanımlı değilse veya kullanıcı az önce yazma yaptıysa birincil veritabanı kullanılır.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.use_replica = replica_is_fresh()
+        try:
+            return view(*args, **kwargs)
+        finally:
+            g.use_replica = False
+    return wrapper
@@ -1,45 +1,110 @@
 import base64
 from io import BytesIO
-import matplotlib.pyplot as plt
+from flask import current_app, send_file
+from markupsafe import Markup
 import numpy as np
 from sqlalchemy import func
-from models import DersOturum, YoklamaKayit, CourseStudent, Ders
+from sqlalchemy.orm import joinedload
+from models import DersOturum, CourseStudent, Ders, Student
 from config import Config
 from extensions import db
+from utils.offload import process_pool
+from utils.archive import attendance_pairs
+from utils.svg_charts import weekly_attendance_svg, overall_attendance_svg, absence_svg
+from utils.tracing import traced
+from collections import defaultdict
 
 def calculate_absence_percentage(course_id, student_id):
     """
     Bir öğrencinin devamsızlık yüzdesini ve katıldığı hafta sayısını hesaplar.
     """
-    # Sadece aktif oturumların olduğu haftaları bul
-    active_weeks = db.session.query(DersOturum.OturumNumarasi).\
-        filter(DersOturum.DersID == course_id, DersOturum.AktifMi == True).\
-        distinct().all()
-    active_week_numbers = [w[0] for w in active_weeks]
-    total_weeks = len(active_week_numbers)
-
-    # Öğrencinin katıldığı aktif haftaları bul
-    attended_weeks = db.session.query(DersOturum.OturumNumarasi).\
-        join(YoklamaKayit, DersOturum.OturumID == YoklamaKayit.OturumID).\
-        filter(
-            YoklamaKayit.OgrenciID == student_id,
-            DersOturum.DersID == course_id,
-            DersOturum.AktifMi == True
-        ).distinct().all()
-    attended_week_count = len(attended_weeks)
+    # Sadece aktif oturumların olduğu haftalar ve yalnızca bu öğrencinin kayıtları okunur
+    scope = AttendanceScope(course_id).active().students([student_id])
+    active_sessions = scope.sessions()
+    week_of_session = dict(active_sessions)
+    total_weeks = len(set(week_of_session.values()))
+
+    # Öğrencinin katıldığı aktif haftaları bul (arşivlenmiş dönemler dahil)
+    attended = scope.attended(active_sessions)
+    attended_week_count = len({week_of_session[session_id] for session_id, _ in attended})
 
     # Eğer hiç oturum yoksa, devamsızlık %0 olsun (veya 0/0 ise 0 kabul et)
     absence_percentage = ((total_weeks - attended_week_count) / total_weeks * 100) if total_weeks > 0 else 0
     return absence_percentage, attended_week_count, total_weeks
 
+def svg_backend():
+    """
+    Grafiklerin SVG olarak mı (varsayılan) yoksa matplotlib ile PNG olarak mı çizileceğini belirtir.
+    """
+    return current_app.config['CHART_BACKEND'] != 'matplotlib'
+
+def _pyplot():
+    # matplotlib isteğe bağlıdır; yalnızca CHART_BACKEND='matplotlib' iken işçi süreçte yüklenir
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+def chart_response(chart):
+    """
+    Üretilen grafiği yanıt olarak döndürür: SVG metni veya PNG dosyası.
+    """
+    if isinstance(chart, str):
+        return current_app.response_class(chart, mimetype='image/svg+xml')
+    return send_file(chart, mimetype='image/png')
+
+def chart_markup(chart, alt):
+    """
+    Grafiği sayfaya gömülecek HTML olarak döndürür; SVG doğrudan, PNG base64 <img> olarak eklenir.
+    """
+    if chart is None:
+        return None
+    if isinstance(chart, str):
+        return Markup(chart)
+    return Markup('<img src="data:image/png;base64,{}" alt="{}" class="img-fluid">').format(
+        base64.b64encode(chart.getvalue()).decode('utf-8'), alt
+    )
+
+@traced('chart.weekly')
 def generate_weekly_attendance_chart(weekly_data):
     """
     Haftalık yoklama verisinden çubuk grafik üretir.
+    SVG kipinde metin, matplotlib kipinde PNG (BytesIO) döner.
     """
-
     if not weekly_data:
         return None
-        
+    if svg_backend():
+        return weekly_attendance_svg(weekly_data)
+    return process_pool.run(render_weekly_attendance_chart, weekly_data)
+
+@traced('chart.overall')
+def generate_overall_attendance_pie(overall_data):
+    """
+    Genel yoklama verisinden pasta grafik üretir.
+    """
+    if svg_backend():
+        return overall_attendance_svg(*pie_values(overall_data))
+    return process_pool.run(render_overall_attendance_pie, overall_data)
+
+def pie_values(overall_data):
+    """
+    Pasta grafiği için (katılan, katılmayan) değerlerini döndürür; veri yoksa 1/1 kabul edilir.
+    """
+    # NaN değerleri kontrol et ve düzelt
+    present = overall_data['present'] if not np.isnan(overall_data['present']) else 0
+    absent = overall_data['absent'] if not np.isnan(overall_data['absent']) else 0
+    
+    # Eğer her iki değer de 0 ise, varsayılan değerler ata
+    if present == 0 and absent == 0:
+        present = 1  # Minimum değer
+        absent = 1   # Minimum değer
+    return present, absent
+
+def render_weekly_attendance_chart(weekly_data):
+    """
+    Haftalık çubuk grafiği çizer (işçi süreçte çalışır).
+    """
+    plt = _pyplot()
     # Haftalık katılım için çubuk grafik
     fig, ax = plt.subplots(figsize=(10, 6))
     
@@ -67,22 +132,15 @@ def generate_weekly_attendance_chart(weekly_data):
     plt.close()
     img.seek(0)
     return img
-def generate_overall_attendance_pie(overall_data):
+
+def render_overall_attendance_pie(overall_data):
     """
-    Genel yoklama verisinden pasta grafik üretir.
+    Genel katılım pasta grafiğini çizer (işçi süreçte çalışır).
     """
-    
+    plt = _pyplot()
     # Genel katılım için pasta grafik
     fig, ax = plt.subplots(figsize=(8, 8))
-    
-    # NaN değerleri kontrol et ve düzelt
-    present = overall_data['present'] if not np.isnan(overall_data['present']) else 0
-    absent = overall_data['absent'] if not np.isnan(overall_data['absent']) else 0
-    
-    # Eğer her iki değer de 0 ise, varsayılan değerler ata
-    if present == 0 and absent == 0:
-        present = 1  # Minimum değer
-        absent = 1   # Minimum değer
+    present, absent = pie_values(overall_data)
     
     labels = ['Katılan', 'Katılmayan']
     sizes = [present, absent]
@@ -103,19 +161,42 @@ def generate_overall_attendance_pie(overall_data):
     img.seek(0)
     return img
 
+@traced('chart.absence')
 def generate_attendance_chart(course_id):
     course = Ders.query.get_or_404(course_id)
-    course_students = CourseStudent.query.filter_by(DersID=course_id).all()
+    scope = AttendanceScope(course_id).active()
+    students = scope.students_query().all()
     
-    if not course_students:
+    if not students:
         return None
     
+    # Sadece aktif oturumların olduğu haftalar; kayıtlar öğrenci başına değil tek seferde okunur
+    max_absence_percentage = current_app.config['MAX_ABSENCE_PERCENTAGE']
+    active_sessions = scope.sessions()
+    attended = scope.attended(active_sessions)
+    display_data = absence_chart_data(active_sessions, attended, students, max_absence_percentage)
+    if svg_backend():
+        return absence_svg(course.DersAdi, display_data, max_absence_percentage)
+    return process_pool.run(render_absence_chart, course.DersAdi, display_data, max_absence_percentage)
+
+def absence_chart_data(active_sessions, attended, students, max_absence_percentage):
+    """
+    Öğrenci bazında devamsızlık yüzdelerini hesaplar ve en yüksek 20 öğrenciyi döndürür.
+    active_sessions: aktif oturumların (OturumID, OturumNumarasi) çiftleri.
+    """
+    week_of_session = dict(active_sessions)
+    total_weeks = len(set(week_of_session.values()))
+    attended_weeks_by_student = defaultdict(set)
+    for session_id, student_id in attended:
+        if session_id in week_of_session:
+            attended_weeks_by_student[student_id].add(week_of_session[session_id])
+
     # Öğrenci başına devamsızlık verilerini hesapla
     attendance_data = []
-    for student_rel in course_students:
-        student = student_rel.ogrenci_objesi
-        absence_percentage, attended_weeks, total_weeks = calculate_absence_percentage(course_id, student.OgrenciID)
-        status = "Güvenli" if absence_percentage < app.config['MAX_ABSENCE_PERCENTAGE'] else "Riskli"
+    for student in students:
+        attended_weeks = len(attended_weeks_by_student[student.OgrenciID])
+        absence_percentage = ((total_weeks - attended_weeks) / total_weeks * 100) if total_weeks > 0 else 0
+        status = "Güvenli" if absence_percentage < max_absence_percentage else "Riskli"
         
         attendance_data.append({
             'student_no': student.OgrenciNo,
@@ -129,24 +210,51 @@ def generate_attendance_chart(course_id):
     # Verileri devamsızlık yüzdesine göre sırala
     attendance_data.sort(key=lambda x: x['absence_percentage'], reverse=True)
     
-    # Grafik oluştur
-    fig, ax = plt.subplots(figsize=(10, 8))
-    
     # Sadece ilk 20 öğrenciyi göster (daha fazlası karışık olabilir)
-    display_data = attendance_data[:20]
+    return attendance_data[:20]
+
+def render_course_charts(weekly_data, overall_data, course_name, absence_data, max_absence_percentage):
+    """
+    Bir dersin tüm rapor grafiklerini tek işçi süreç çağrısında çizer.
+    {dosya adı: PNG baytları} döndürür; çizilemeyen grafikler atlanır.
+    """
+    charts = {
+        'haftalik_katilim.png': render_weekly_attendance_chart(weekly_data) if weekly_data else None,
+        'genel_katilim.png': render_overall_attendance_pie(overall_data),
+        'devamsizlik.png': render_absence_chart(course_name, absence_data, max_absence_percentage) if absence_data else None
+    }
+    return {name: img.getvalue() for name, img in charts.items() if img is not None}
+
+def svg_course_charts(weekly_data, overall_data, course_name, absence_data, max_absence_percentage):
+    """
+    render_course_charts'ın SVG karşılığı; çizim ucuz olduğundan istek sürecinde çalışır.
+    """
+    charts = {
+        'haftalik_katilim.svg': weekly_attendance_svg(weekly_data) if weekly_data else None,
+        'genel_katilim.svg': overall_attendance_svg(*pie_values(overall_data)),
+        'devamsizlik.svg': absence_svg(course_name, absence_data, max_absence_percentage) if absence_data else None
+    }
+    return {name: svg.encode('utf-8') for name, svg in charts.items() if svg is not None}
+
+def render_absence_chart(course_name, display_data, max_absence_percentage):
+    """
+    Öğrenci bazında devamsızlık çubuk grafiğini çizer (işçi süreçte çalışır).
+    """
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(10, 8))
     
     student_names = [f"{d['student_no']} - {d['name']}" for d in display_data]
     absence_percentages = [d['absence_percentage'] for d in display_data]
     
-    colors = ['red' if p >= app.config['MAX_ABSENCE_PERCENTAGE'] else 'green' for p in absence_percentages]
+    colors = ['red' if p >= max_absence_percentage else 'green' for p in absence_percentages]
     y_pos = np.arange(len(display_data))
     
     bars = ax.barh(y_pos, absence_percentages, color=colors)
     ax.set_yticks(y_pos)
     ax.set_yticklabels(student_names, fontsize=9)
     ax.set_xlabel('Devamsızlık Yüzdesi (%)', fontsize=10)
-    ax.set_title(f'{course.DersAdi} - Devamsızlık Durumu (14 Hafta Üzerinden)', fontsize=12)
-    ax.axvline(x=app.config['MAX_ABSENCE_PERCENTAGE'], color='blue', linestyle='--', label='Maksimum Devamsızlık Sınırı')
+    ax.set_title(f'{course_name} - Devamsızlık Durumu (14 Hafta Üzerinden)', fontsize=12)
+    ax.axvline(x=max_absence_percentage, color='blue', linestyle='--', label='Maksimum Devamsızlık Sınırı')
     
     # Çubukların üzerine değerleri yaz
     for i, bar in enumerate(bars):
@@ -165,30 +273,145 @@ def generate_attendance_chart(course_id):
     img.seek(0)
     return img
 
+class AttendanceScope:
+    """
+    Bir dersin yoklama verisinden okunacak dilimi tanımlar: hafta aralığı, öğrenci alt kümesi,
+    oturum sıra numaraları ve yalnızca aktif oturumlar. Filtreler SQL sorgularına aktarılır;
+    maliyet dersin tamamıyla değil, istenen dilimle orantılıdır.
+    Filtre metotları yeni bir kapsam döndürür ve zincirlenebilir:
+        AttendanceScope(course_id).weeks(3, 5).students([12, 15]).weekly_data()
+    """
+
+    def __init__(self, course_id, first_week=None, last_week=None, student_ids=None,
+                 session_orders=None, active_only=False):
+        self.course_id = course_id
+        self.first_week = first_week
+        self.last_week = last_week
+        self.student_ids = list(student_ids) if student_ids is not None else None
+        self.session_orders = list(session_orders) if session_orders is not None else None
+        self.active_only = active_only
+
+    def _replace(self, **changes):
+        filters = {
+            'first_week': self.first_week,
+            'last_week': self.last_week,
+            'student_ids': self.student_ids,
+            'session_orders': self.session_orders,
+            'active_only': self.active_only
+        }
+        filters.update(changes)
+        return AttendanceScope(self.course_id, **filters)
+
+    def weeks(self, first=None, last=None):
+        """
+        Hafta aralığı (OturumNumarasi, iki uç dahil); verilmeyen uç sınırsızdır.
+        """
+        return self._replace(first_week=first, last_week=last)
+
+    def students(self, student_ids):
+        """
+        Yalnızca verilen OgrenciID'ler.
+        """
+        return self._replace(student_ids=student_ids)
+
+    def orders(self, *session_orders):
+        """
+        Yalnızca verilen sıra numaralı oturumlar (OturumSiraNumarasi), örn. her haftanın ilk oturumu.
+        """
+        return self._replace(session_orders=session_orders)
+
+    def active(self):
+        """
+        Yalnızca aktif oturumlar.
+        """
+        return self._replace(active_only=True)
+
+    def _session_filters(self):
+        filters = [DersOturum.DersID == self.course_id]
+        if self.first_week is not None:
+            filters.append(DersOturum.OturumNumarasi >= self.first_week)
+        if self.last_week is not None:
+            filters.append(DersOturum.OturumNumarasi <= self.last_week)
+        if self.session_orders is not None:
+            filters.append(DersOturum.OturumSiraNumarasi.in_(self.session_orders))
+        if self.active_only:
+            filters.append(DersOturum.AktifMi == True)
+        return filters
+
+    def _roster_filters(self):
+        filters = [CourseStudent.DersID == self.course_id]
+        if self.student_ids is not None:
+            filters.append(CourseStudent.OgrenciID.in_(self.student_ids))
+        return filters
+
+    def sessions(self):
+        """
+        Kapsamdaki oturumları hafta ve sıraya göre (OturumID, OturumNumarasi) çiftleri olarak döndürür.
+        """
+        return db.session.query(DersOturum.OturumID, DersOturum.OturumNumarasi).\
+            filter(*self._session_filters()).\
+            order_by(DersOturum.OturumNumarasi, DersOturum.OturumSiraNumarasi).all()
+
+    def attended(self, sessions=None):
+        """
+        Kapsamdaki yoklama kayıtlarını (OturumID, OgrenciID) kümesi olarak döndürür (arşiv dahil).
+        Daha önce okunmuş sessions verilirse oturumlar tekrar sorgulanmaz.
+        """
+        if sessions is None:
+            sessions = self.sessions()
+        return attendance_pairs(self.course_id, [session_id for session_id, _ in sessions], self.student_ids)
+
+    def student_count(self):
+        """
+        Kapsamdaki kayıtlı öğrenci sayısı; öğrenci nesneleri yüklenmez.
+        """
+        return db.session.query(func.count(CourseStudent.id)).filter(*self._roster_filters()).scalar()
+
+    def students_query(self):
+        """
+        Kapsamdaki öğrencileri kayıt sırasıyla, kullanıcı bilgileriyle birlikte okuyan sorgu.
+        """
+        return Student.query.join(CourseStudent, CourseStudent.OgrenciID == Student.OgrenciID).\
+            options(joinedload(Student.user)).\
+            filter(*self._roster_filters()).order_by(CourseStudent.id)
+
+    def weekly_data(self):
+        """
+        Kapsamdaki haftaların katılan / katılmayan sayıları; öğrenci listesi okunmaz.
+        """
+        sessions = self.sessions()
+        return weekly_attendance(sessions, self.attended(sessions), self.student_count())
+
+    def summary(self, course=None):
+        """
+        Kapsam için calculate_attendance ile aynı yapıda tam özeti hesaplar.
+        """
+        if course is None:
+            course = Ders.query.get_or_404(self.course_id)
+        sessions = self.sessions()
+        return summarize_attendance(course, sessions, self.attended(sessions), self.students_query().all())
+
+
 def calculate_attendance(course_id):
-    course = Ders.query.get_or_404(course_id)
-    total_weeks = 14
-    max_allowed_absences = 4
-    
-    # Oturum oluşturulmuş haftaları al
-    weeks_with_sessions = get_weeks_with_sessions(course_id)
-    completed_weeks = len(weeks_with_sessions)
-    
+    """
+    Dersin tamamı için yoklama özetini hesaplar. Yalnızca bir dilim gerekiyorsa AttendanceScope kullanın.
+    """
+    return AttendanceScope(course_id).summary()
+
+def weekly_attendance(sessions, attended, total_students):
+    """
+    Oturum ve yoklama kayıtlarından haftalık katılan / katılmayan sayılarını hesaplar; veritabanına erişmez.
+    """
+    week_of_session = dict(sessions)
+    records_per_week = defaultdict(int)
+    for session_id, _ in attended:
+        records_per_week[week_of_session[session_id]] += 1
+
     # Haftalık katılım verilerini topla (sadece oturum oluşturulmuş haftalar için)
     weekly_data = []
-    for week in weeks_with_sessions:
-        # Bu hafta için oturumlar
-        sessions = DersOturum.query.filter_by(
-            DersID=course_id,
-            OturumNumarasi=week
-        ).all()
-        
+    for week in sorted(set(week_of_session.values())):
         # Bu hafta için katılım kayıtları
-        attendance_records = YoklamaKayit.query.filter(
-            YoklamaKayit.OturumID.in_([s.OturumID for s in sessions])
-        ).count()
-        
-        total_students = CourseStudent.query.filter_by(DersID=course_id).count()
+        attendance_records = records_per_week[week]
         absent_count = total_students - attendance_records
         
         weekly_data.append({
@@ -198,27 +421,45 @@ def calculate_attendance(course_id):
             'total_students': total_students,
             'attendance_rate': (attendance_records / total_students * 100) if total_students > 0 else 0
         })
-    
-    # Genel katılım istatistikleri (sadece oturum oluşturulmuş haftalar için)
+    return weekly_data
+
+def overall_attendance(weekly_data):
+    """
+    Haftalık verilerden genel katılım istatistiklerini hesaplar (sadece oturum oluşturulmuş haftalar).
+    """
     total_present = sum(w['present'] for w in weekly_data)
     total_absent = sum(w['absent'] for w in weekly_data)
     overall_attendance_rate = (total_present / (total_present + total_absent) * 100) if (total_present + total_absent) > 0 else 0
+    return {
+        'present': total_present,
+        'absent': total_absent,
+        'rate': overall_attendance_rate
+    }
+
+def summarize_attendance(course, sessions, attended, students):
+    """
+    Önceden okunmuş verilerden dersin yoklama özetini hesaplar; veritabanına erişmez.
+    sessions: (OturumID, OturumNumarasi) çiftleri, attended: (OturumID, OgrenciID) kümesi,
+    students: derse kayıtlı Student nesneleri (user ilişkisi yüklenmiş olmalı).
+    """
+    total_weeks = 14
+    max_allowed_absences = 4
+
+    week_of_session = dict(sessions)
+    completed_weeks = len(set(week_of_session.values()))
+
+    attended_weeks_by_student = defaultdict(set)
+    for session_id, student_id in attended:
+        attended_weeks_by_student[student_id].add(week_of_session[session_id])
+    
+    weekly_data = weekly_attendance(sessions, attended, len(students))
+    overall = overall_attendance(weekly_data)
     
     # Öğrenci bazında devamsızlık durumu (sadece oturum oluşturulmuş haftalar için)
     student_attendance = []
-    course_students = CourseStudent.query.filter_by(DersID=course_id).all()
-    
-    for student_rel in course_students:
-        student = student_rel.ogrenci_objesi
-        # Öğrencinin katıldığı haftaları bul (sadece oturum oluşturulmuş haftalar)
-        attended_weeks = db.session.query(DersOturum.OturumNumarasi).\
-            join(YoklamaKayit, DersOturum.OturumID == YoklamaKayit.OturumID).\
-            filter(
-                YoklamaKayit.OgrenciID == student.OgrenciID,
-                DersOturum.DersID == course_id
-            ).distinct().all()
-        
-        attended_week_count = len(attended_weeks)
+    for student in students:
+        # Öğrencinin katıldığı haftalar (sadece oturum oluşturulmuş haftalar)
+        attended_week_count = len(attended_weeks_by_student[student.OgrenciID])
         absence_count = completed_weeks - attended_week_count
         
         # Durumu belirle
@@ -247,8 +488,7 @@ def calculate_attendance(course_id):
     
     # Sınıf listesi (tüm öğrenciler)
     class_list = []
-    for student_rel in course_students:
-        student = student_rel.ogrenci_objesi
+    for student in students:
         user = student.user
         # Sisteme kayıt olmamış öğrenciler için ek kontrol
         is_passive = not student.is_active_user or not user.Email or not user.SifreHash or user.SifreHash == ''
@@ -270,11 +510,7 @@ def calculate_attendance(course_id):
     return {
         'course': course,
         'weekly_data': weekly_data,
-        'overall_attendance': {
-            'present': total_present,
-            'absent': total_absent,
-            'rate': overall_attendance_rate
-        },
+        'overall_attendance': overall,
         'student_attendance': student_attendance,
         'failing_students': failing_students,
         'borderline_students': borderline_students,
@@ -0,0 +1,256 @@
+import csv
+import io
+from datetime import datetime
+import pandas as pd
+from flask import current_app
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+from openpyxl import load_workbook
+from sqlalchemy import insert, update
+from extensions import db
+from models import User, Student, CourseStudent
+from utils.auth import unusable_password_hash
+
+REQUIRED_COLUMNS = ['Öğrenci No', 'Adı', 'Soyadı']
+OPTIONAL_COLUMNS = ['Sınıfı', 'Birim Program']
+# Önizleme sayfasında her grup için gösterilecek en fazla satır
+PREVIEW_LIMIT = 100
+
+
+class RosterError(Exception):
+    """
+    Yüklenen dosya okunamadığında veya zorunlu sütunlar eksik olduğunda fırlatılır.
+    """
+
+
+def _csv_rows(data):
+    # Excel'in Türkçe CSV çıktısı genellikle ';' ayraçlı ve cp1254 kodludur
+    try:
+        text = data.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        text = data.decode('cp1254')
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    return csv.reader(io.StringIO(text, newline=''), dialect)
+
+
+def _xlsx_rows(data):
+    # Salt okunur kip satırları sırayla okur, tüm sayfayı belleğe almaz
+    workbook = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield row
+    finally:
+        workbook.close()
+
+
+def read_roster(data, extension):
+    """
+    Yüklenen dosyanın içeriğini (bayt) okur ve normalleştirilmiş öğrenci listesini DataFrame olarak döndürür.
+    Sütunlar: row (dosyadaki satır), student_no, name, surname, sinif, program, valid, duplicate.
+    İşçi süreçte çalışır.
+    """
+    if extension == 'csv':
+        rows = _csv_rows(data)
+    elif extension == 'xlsx':
+        rows = _xlsx_rows(data)
+    else:
+        # Eski .xls biçimini openpyxl okuyamaz
+        frame = pd.read_excel(io.BytesIO(data), dtype=object)
+        rows = iter([list(frame.columns)] + frame.where(frame.notna(), None).values.tolist())
+
+    header = next(rows, None)
+    if header is None:
+        raise RosterError('Dosya boş.')
+    header = [str(value).strip() if value is not None else '' for value in header]
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in header]
+    if missing_columns:
+        raise RosterError(f'Dosyada eksik sütunlar bulundu: {", ".join(missing_columns)}. Lütfen kontrol edin.')
+
+    wanted = {name: header.index(name) for name in REQUIRED_COLUMNS + OPTIONAL_COLUMNS if name in header}
+    line_numbers = []
+    columns = {name: [] for name in wanted}
+    for line, row in enumerate(rows, 2):
+        if not row or all(value is None or str(value).strip() == '' for value in row):
+            continue
+        line_numbers.append(line)
+        for name, index in wanted.items():
+            columns[name].append(row[index] if index < len(row) else None)
+
+    # İndeks, hata mesajlarında gösterilecek dosya satır numarasıdır
+    frame = pd.DataFrame({name: pd.Series(values, dtype=object) for name, values in columns.items()})
+    frame.index = line_numbers
+    return normalize_roster(frame)
+
+
+def _text(series):
+    # Excel sayısal hücreleri 20250001.0 olarak gelebilir
+    text = series.astype('string').str.strip()
+    return text.str.replace(r'\.0$', '', regex=True)
+
+
+def normalize_roster(frame):
+    """
+    Sütunları vektörel olarak temizler ve öğrenci numarası biçimini doğrular.
+    """
+    if frame.empty:
+        return pd.DataFrame(columns=['row', 'student_no', 'name', 'surname', 'sinif', 'program', 'valid', 'duplicate'])
+
+    roster = pd.DataFrame({
+        'row': frame.index,
+        'student_no': _text(frame['Öğrenci No']),
+        'name': frame['Adı'].astype('string').str.strip().fillna(''),
+        'surname': frame['Soyadı'].astype('string').str.strip().fillna(''),
+        'sinif': _text(frame['Sınıfı']) if 'Sınıfı' in frame else pd.NA,
+        'program': frame['Birim Program'].astype('string').str.strip() if 'Birim Program' in frame else pd.NA
+    })
+    for column in ('sinif', 'program'):
+        roster[column] = roster[column].astype('string').replace('', pd.NA)
+
+    roster['valid'] = roster['student_no'].str.fullmatch(r'\d+').fillna(False).astype(bool)
+    roster['duplicate'] = roster['valid'] & roster['student_no'].duplicated(keep='first')
+    return roster.reset_index(drop=True)
+
+
+def roster_records(roster):
+    """
+    Geçerli ve tekrarlanmayan satırları [öğrenci no, ad, soyad, sınıf, program] listesi olarak döndürür.
+    """
+    usable = roster[roster['valid'] & ~roster['duplicate']]
+    records = usable[['student_no', 'name', 'surname', 'sinif', 'program']].astype(object)
+    return records.where(records.notna(), None).values.tolist()
+
+
+def _serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='roster-import')
+
+
+def sign_roster(course_id, records):
+    """
+    Önizlenen listeyi onay formunda taşımak için imzalar (sunucuda dosya saklanmaz).
+    """
+    return _serializer().dumps({'course_id': course_id, 'records': records})
+
+
+def load_signed_roster(token, course_id):
+    """
+    Onay formundaki imzalı listeyi doğrular; geçersiz veya süresi dolmuşsa None döner.
+    """
+    try:
+        payload = _serializer().loads(token, max_age=current_app.config['ROSTER_PREVIEW_MAX_AGE'])
+    except (BadSignature, SignatureExpired):
+        return None
+    if payload.get('course_id') != course_id:
+        return None
+    return payload['records']
+
+
+def diff_roster(course_id, records):
+    """
+    Yüklenen listeyi mevcut kullanıcılar ve ders listesiyle küme işlemleriyle karşılaştırır.
+    Dersin öğrenci sayısından bağımsız olarak iki sorgu çalışır.
+    """
+    by_no = {record[0]: record for record in records}
+    numbers = set(by_no)
+
+    existing = {}
+    if numbers:
+        rows = db.session.query(
+            User.OgrenciNo, User.id, User.UserType, User.Isim, User.Soyisim, User.is_active_user,
+            Student.OgrenciID, Student.Sinif, Student.BirimProgram
+        ).outerjoin(Student, Student.UserID == User.id).filter(User.OgrenciNo.in_(numbers)).all()
+        existing = {row.OgrenciNo: row for row in rows}
+
+    enrolled = set()
+    if numbers:
+        enrolled = {row[0] for row in db.session.query(User.OgrenciNo).
+                    join(Student, Student.UserID == User.id).
+                    join(CourseStudent, CourseStudent.OgrenciID == Student.OgrenciID).
+                    filter(CourseStudent.DersID == course_id, User.OgrenciNo.in_(numbers)).all()}
+
+    conflicts = {no for no, row in existing.items() if row.UserType != 'student'}
+    new = numbers - existing.keys()
+    known = numbers - new - conflicts
+    renamed = {no for no in known if (existing[no].Isim, existing[no].Soyisim) != (by_no[no][1], by_no[no][2])}
+    already_enrolled = known & enrolled
+    passive = {no for no in known if not existing[no].is_active_user}
+
+    return {
+        'records': by_no,
+        'existing': existing,
+        'new': sorted(new),
+        'renamed': sorted(renamed),
+        'already_enrolled': sorted(already_enrolled),
+        'to_enroll': sorted((known - enrolled) | new),
+        'conflicts': sorted(conflicts),
+        'passive': sorted(passive)
+    }
+
+
+def apply_roster(course_id, diff):
+    """
+    Karşılaştırma sonucunu toplu ifadelerle uygular (satır başına sorgu çalıştırılmaz).
+    Commit çağıranın sorumluluğundadır.
+    """
+    records, existing = diff['records'], diff['existing']
+
+    if diff['new']:
+        # Pasif hesapların şifresi bilinmediğinden tek bir kullanılamaz hash yeterlidir
+        password_hash = unusable_password_hash()
+        db.session.execute(insert(User), [{
+            'OgrenciNo': no,
+            'Isim': records[no][1],
+            'Soyisim': records[no][2],
+            'Email': None,
+            'SifreHash': password_hash,
+            'UserType': 'student',
+            'is_active_user': False
+        } for no in diff['new']])
+
+    known = [no for no in records if no in existing and no not in diff['conflicts']]
+    if diff['renamed']:
+        db.session.execute(update(User), [{
+            'id': existing[no].id,
+            'Isim': records[no][1],
+            'Soyisim': records[no][2]
+        } for no in diff['renamed']])
+
+    student_updates = [{
+        'OgrenciID': existing[no].OgrenciID,
+        'Sinif': records[no][3],
+        'BirimProgram': records[no][4]
+    } for no in known if existing[no].OgrenciID is not None and
+        (existing[no].Sinif, existing[no].BirimProgram) != (records[no][3], records[no][4])]
+    if student_updates:
+        db.session.execute(update(Student), student_updates)
+
+    # Yeni kullanıcılar ve öğrenci kaydı eksik olan mevcut kullanıcılar için Student satırları
+    missing_students = diff['new'] + [no for no in known if existing[no].OgrenciID is None]
+    if missing_students:
+        user_ids = dict(db.session.query(User.OgrenciNo, User.id).filter(User.OgrenciNo.in_(missing_students)).all())
+        db.session.execute(insert(Student), [{
+            'UserID': user_ids[no],
+            'OgrenciNo': no,
+            'Sinif': records[no][3],
+            'BirimProgram': records[no][4]
+        } for no in missing_students])
+
+    if diff['to_enroll']:
+        student_ids = dict(db.session.query(User.OgrenciNo, Student.OgrenciID).
+                           join(Student, Student.UserID == User.id).
+                           filter(User.OgrenciNo.in_(diff['to_enroll'])).all())
+        now = datetime.utcnow()
+        db.session.execute(insert(CourseStudent), [{
+            'OgrenciID': student_ids[no],
+            'DersID': course_id,
+            'KayitTarihi': now
+        } for no in diff['to_enroll']])
+
+    return {
+        'added': len(diff['to_enroll']),
+        'created': len(diff['new']),
+        'updated_passive': len(diff['passive']),
+        'already_enrolled': len(diff['already_enrolled']),
+        'conflicts': len(diff['conflicts'])
+    }
@@ -0,0 +1,217 @@
+import os
+import re
+import sys
+import threading
+import time
+from itertools import groupby
+from flask import request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Yavaş sorgu günlüğü: eşiği aşan ifadeler parmak izine göre toplanır, her parmak izinin
+# ilk örneği için EXPLAIN planı alınır. Parametre değerleri değil yalnızca türleri kaydedilir.
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Çağrı yeri aranırken atlanan altyapı dosyaları
+SKIPPED_FILES = {os.path.join(PROJECT_ROOT, name) for name in (
+    'extensions.py', os.path.join('utils', 'slow_queries.py'), os.path.join('utils', 'replica.py'),
+    os.path.join('utils', 'tracing.py')
+)}
+STATEMENT_LOG_LENGTH = 1000
+EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE')
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%\(\w+\)s|%s|(?<!:):\w+|\$\d+|\?')
+_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_ROWS = re.compile(r'\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+')
+_SPACE = re.compile(r'\s+')
+
+
+def fingerprint(statement):
+    """
+    Sabitleri ve yer tutucuları '?' ile, IN listelerini ve çok satırlı VALUES'ı '(...)' ile değiştirir;
+    yalnızca değerleri farklı olan sorgular aynı parmak izini alır.
+    """
+    text = _STRING.sub('?', statement)
+    text = _PLACEHOLDER.sub('?', text)
+    text = _NUMBER.sub('?', text)
+    text = _LIST.sub('(...)', text)
+    text = _ROWS.sub('(...)', text)
+    return _SPACE.sub(' ', text).strip()
+
+
+def parameter_shape(parameters, executemany=False):
+    """
+    Parametrelerin değerleri yerine türlerini özetler, ör. '(int, str x 3)' veya '{ders_id: int}'.
+    """
+    if executemany:
+        if not parameters:
+            return '0 x ()'
+        return f'{len(parameters)} x {parameter_shape(parameters[0])}'
+    if isinstance(parameters, dict):
+        return '{' + ', '.join(f'{key}: {type(value).__name__}' for key, value in parameters.items()) + '}'
+    if isinstance(parameters, (list, tuple)):
+        runs = [(name, len(list(group))) for name, group in groupby(type(value).__name__ for value in parameters)]
+        return '(' + ', '.join(name if count == 1 else f'{name} x {count}' for name, count in runs) + ')'
+    return type(parameters).__name__
+
+
+def call_site():
+    """
+    Sorguyu başlatan proje kodunun dosya:satır bilgisini döndürür (kütüphane çerçeveleri atlanır).
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (filename.startswith(PROJECT_ROOT) and filename not in SKIPPED_FILES and
+                'site-packages' not in filename):
+            return f'{os.path.relpath(filename, PROJECT_ROOT)}:{frame.f_lineno} ({frame.f_code.co_name})'
+        frame = frame.f_back
+    return None
+
+
+def explain(conn, statement, parameters, executemany):
+    """
+    İfadenin yürütme planını aynı bağlantı ve parametrelerle alır (SQLite ve PostgreSQL).
+    Sorgu yeniden çalıştırılmaz; plan alınamazsa None döner.
+    """
+    if statement.lstrip().split(None, 1)[0].upper() not in EXPLAINABLE:
+        return None
+    if executemany:
+        parameters = parameters[0] if parameters else ()
+    dialect = conn.dialect.name
+    # SQLAlchemy olayları tetiklenmesin diye doğrudan DBAPI imleci kullanılır
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        if dialect == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {statement}', parameters)
+            rows = cursor.fetchall()
+            depth = {0: -1}
+            lines = []
+            for node_id, parent_id, _, detail in rows:
+                depth[node_id] = depth.get(parent_id, -1) + 1
+                lines.append('  ' * depth[node_id] + detail)
+            return '\n'.join(lines)
+        if dialect == 'postgresql':
+            # Hatalı bir EXPLAIN açık işlemi bozmasın diye kayıt noktası içinde çalıştırılır
+            cursor.execute('SAVEPOINT slow_query_explain')
+            try:
+                cursor.execute(f'EXPLAIN {statement}', parameters)
+                plan = '\n'.join(row[0] for row in cursor.fetchall())
+                cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+                return plan
+            except Exception:
+                cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+                raise
+        return None
+    except Exception as error:
+        return f'EXPLAIN alınamadı: {type(error).__name__}: {error}'
+    finally:
+        cursor.close()
+
+
+class SlowQueryLog:
+    """
+    Eşiği aşan sorguları parmak izine göre toplar (sayı, toplam ve en uzun süre) ve günlüğe yazar.
+    """
+
+    def __init__(self):
+        self.threshold_ms = 0
+        self.explain = True
+        self.max_fingerprints = 500
+        self.logger = None
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def configure(self, app):
+        self.threshold_ms = app.config['SLOW_QUERY_MS']
+        self.explain = app.config['SLOW_QUERY_EXPLAIN']
+        self.max_fingerprints = app.config['SLOW_QUERY_MAX_FINGERPRINTS']
+        self.logger = app.logger
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+    def record(self, conn, statement, parameters, executemany, elapsed_ms):
+        key = fingerprint(statement)
+        endpoint = request.endpoint if has_request_context() else None
+        source = call_site()
+        with self._lock:
+            entry = self._stats.get(key)
+            first = entry is None
+            if first:
+                if len(self._stats) >= self.max_fingerprints:
+                    # Tablo doluysa sorgu yine günlüğe yazılır ama toplanmaz
+                    self.logger.warning('Yavaş sorgu %.1f ms [%s] %s\n%s', elapsed_ms, endpoint or '-',
+                                        source or '-', statement[:STATEMENT_LOG_LENGTH])
+                    return
+                entry = self._stats[key] = {
+                    'fingerprint': key,
+                    'statement': statement[:STATEMENT_LOG_LENGTH],
+                    'parameters': parameter_shape(parameters, executemany),
+                    'count': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'plan': None,
+                    'callers': {}
+                }
+            entry['count'] += 1
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+            caller = f'{endpoint or "-"} @ {source or "-"}'
+            entry['callers'][caller] = entry['callers'].get(caller, 0) + 1
+
+        # Plan yalnızca ilk örnekte alınır; aynı sorgunun sonraki tekrarları maliyet eklemez
+        if first and self.explain:
+            entry['plan'] = explain(conn, statement, parameters, executemany)
+        self.logger.warning(
+            'Yavaş sorgu %.1f ms [%s] %s\n%s\nparametreler: %s%s',
+            elapsed_ms, endpoint or '-', source or '-', statement[:STATEMENT_LOG_LENGTH],
+            entry['parameters'], f"\nplan:\n{entry['plan']}" if first and entry['plan'] else ''
+        )
+
+    def stats(self):
+        """
+        Parmak izlerini toplam süreye göre azalan sırada döndürür.
+        """
+        with self._lock:
+            entries = [dict(entry, callers=dict(entry['callers'])) for entry in self._stats.values()]
+        for entry in entries:
+            entry['total_ms'] = round(entry['total_ms'], 2)
+            entry['max_ms'] = round(entry['max_ms'], 2)
+            entry['avg_ms'] = round(entry['total_ms'] / entry['count'], 2)
+        return sorted(entries, key=lambda entry: entry['total_ms'], reverse=True)
+
+
+slow_query_log = SlowQueryLog()
+
+
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info['query_started'].pop()) * 1000
+    if elapsed_ms >= slow_query_log.threshold_ms:
+        slow_query_log.record(conn, statement, parameters, executemany, elapsed_ms)
+
+
+def _discard_timer(exception_context):
+    started = exception_context.connection.info.get('query_started') if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def init_slow_query_log(app):
+    """
+    SLOW_QUERY_MS sıfırdan büyükse tüm motorlardaki (birincil ve replika) sorguları süreler.
+    """
+    slow_query_log.configure(app)
+    if not app.config['SLOW_QUERY_MS']:
+        return
+    if not event.contains(Engine, 'before_cursor_execute', _start_timer):
+        event.listen(Engine, 'before_cursor_execute', _start_timer)
+        event.listen(Engine, 'after_cursor_execute', _stop_timer)
+        event.listen(Engine, 'handle_error', _discard_timer)
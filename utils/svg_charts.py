@@ -0,0 +1,188 @@
+import math
+from html import escape
+
+# Rapor grafikleri için bağımlılıksız SVG çizici.
+# Çıktı hem sayfaya doğrudan gömülebilir hem de image/svg+xml olarak gönderilebilir;
+# bu yüzden <defs>/id kullanılmaz (aynı sayfadaki birden çok grafik çakışmaz).
+
+PRESENT_COLOR = '#4CAF50'
+ABSENT_COLOR = '#F44336'
+LIMIT_COLOR = '#1f4fd6'
+AXIS_COLOR = '#333333'
+GRID_COLOR = '#e0e0e0'
+FONT = 'font-family="DejaVu Sans, Arial, sans-serif"'
+
+
+def _num(value):
+    # 12.0 -> "12", 12.35 -> "12.3"; koordinatlarda gereksiz ondalıkları atar
+    text = f'{value:.1f}'
+    return text[:-2] if text.endswith('.0') else text
+
+
+def _text(x, y, content, size=12, anchor='middle', extra=''):
+    return (f'<text x="{_num(x)}" y="{_num(y)}" font-size="{size}" text-anchor="{anchor}"'
+            f'{" " + extra if extra else ""}>{escape(str(content))}</text>')
+
+
+def _rect(x, y, width, height, color):
+    return f'<rect x="{_num(x)}" y="{_num(y)}" width="{_num(width)}" height="{_num(height)}" fill="{color}"/>'
+
+
+def _line(x1, y1, x2, y2, color, extra=''):
+    return (f'<line x1="{_num(x1)}" y1="{_num(y1)}" x2="{_num(x2)}" y2="{_num(y2)}" stroke="{color}"'
+            f'{" " + extra if extra else ""}/>')
+
+
+def _svg(width, height, title, body):
+    # width/height indirilen dosya için, viewBox ve stil sayfa içinde ölçeklenmesi için
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+            f'viewBox="0 0 {width} {height}" role="img" {FONT} style="max-width:100%;height:auto">'
+            f'<title>{escape(title)}</title>'
+            f'<rect width="{width}" height="{height}" fill="#ffffff"/>'
+            + ''.join(body) + '</svg>')
+
+
+def _legend(x, y, items):
+    """
+    Sağ üst köşeye hizalanmış gösterge kutusu; items: [(etiket, renk, 'box' | 'dash')].
+    """
+    width = 24 + max(len(label) for label, _, _ in items) * 7
+    body = [f'<rect x="{_num(x - width)}" y="{_num(y)}" width="{width}" height="{8 + 18 * len(items)}" '
+            f'fill="#ffffff" fill-opacity="0.85" stroke="#cccccc"/>']
+    for i, (label, color, kind) in enumerate(items):
+        row_y = y + 13 + 18 * i
+        if kind == 'dash':
+            body.append(_line(x - width + 6, row_y, x - width + 18, row_y, color, 'stroke-dasharray="4 2"'))
+        else:
+            body.append(_rect(x - width + 6, row_y - 5, 12, 10, color))
+        body.append(_text(x - width + 22, row_y + 4, label, 11, 'start'))
+    return body
+
+
+def _nice_ticks(maximum, count=5):
+    """
+    0'dan maximum'a kadar 1-2-5 adımlı tam sayı eksen çizgileri döndürür.
+    """
+    if maximum <= 0:
+        return [0, 1]
+    raw = maximum / count
+    magnitude = 10 ** math.floor(math.log10(raw)) if raw >= 1 else 1
+    step = next(m * magnitude for m in (1, 2, 5, 10) if m * magnitude >= raw)
+    top = math.ceil(maximum / step) * step
+    return list(range(0, int(top) + 1, int(step)))
+
+
+def weekly_attendance_svg(weekly_data):
+    """
+    Haftalık katılan / katılmayan sayılarını gruplu çubuk grafik olarak çizer.
+    """
+    width, height = 800, 480
+    left, right, top, bottom = 60, 20, 40, 50
+    plot_width, plot_height = width - left - right, height - top - bottom
+
+    ticks = _nice_ticks(max(max(w['present'], w['absent']) for w in weekly_data))
+    scale = plot_height / ticks[-1]
+    base_y = top + plot_height
+
+    body = [_text(width / 2, 24, 'Haftalık Katılım Durumu', 16)]
+    for tick in ticks:
+        y = base_y - tick * scale
+        body.append(_line(left, y, left + plot_width, y, GRID_COLOR))
+        body.append(_text(left - 6, y + 4, tick, 11, 'end'))
+
+    slot = plot_width / len(weekly_data)
+    bar_width = slot * 0.35
+    for i, week in enumerate(weekly_data):
+        x = left + slot * i + slot * 0.15
+        for offset, value, color in ((0, week['present'], PRESENT_COLOR), (bar_width, week['absent'], ABSENT_COLOR)):
+            bar_height = value * scale
+            body.append(_rect(x + offset, base_y - bar_height, bar_width, bar_height, color))
+        body.append(_text(x + bar_width, base_y + 16, week['week'], 11))
+
+    body.append(_line(left, top, left, base_y, AXIS_COLOR))
+    body.append(_line(left, base_y, left + plot_width, base_y, AXIS_COLOR))
+    body.append(_text(left + plot_width / 2, height - 10, 'Hafta'))
+    body.append(_text(16, top + plot_height / 2, 'Öğrenci Sayısı', 12, 'middle',
+                      f'transform="rotate(-90 16 {_num(top + plot_height / 2)})"'))
+    body += _legend(left + plot_width - 6, top + 6, [
+        ('Katılan', PRESENT_COLOR, 'box'),
+        ('Katılmayan', ABSENT_COLOR, 'box')
+    ])
+    return _svg(width, height, 'Haftalık Katılım Durumu', body)
+
+
+def _point(cx, cy, r, angle):
+    # Açı derece cinsinden, saat yönünün tersine ve yukarı doğru artan matematik yönünde
+    radians = math.radians(angle)
+    return cx + r * math.cos(radians), cy - r * math.sin(radians)
+
+
+def overall_attendance_svg(present, absent):
+    """
+    Genel katılan / katılmayan oranını pasta grafik olarak çizer.
+    Dilimler tepeden başlayıp saat yönünün tersine ilerler.
+    """
+    width, height = 480, 480
+    cx, cy, r = 240, 255, 170
+    total = present + absent
+
+    body = [_text(width / 2, 30, 'Genel Katılım Oranı', 16)]
+    start = 90
+    for label, value, color in (('Katılan', present, PRESENT_COLOR), ('Katılmayan', absent, ABSENT_COLOR)):
+        if value <= 0:
+            continue
+        sweep = 360 * value / total
+        if sweep >= 360:
+            body.append(f'<circle cx="{cx}" cy="{cy}" r="{r}" fill="{color}"/>')
+        else:
+            x1, y1 = _point(cx, cy, r, start)
+            x2, y2 = _point(cx, cy, r, start + sweep)
+            large_arc = 1 if sweep > 180 else 0
+            body.append(f'<path d="M{cx} {cy} L{_num(x1)} {_num(y1)} A{r} {r} 0 {large_arc} 0 {_num(x2)} {_num(y2)} Z" '
+                        f'fill="{color}" stroke="#ffffff"/>')
+
+        middle = start + sweep / 2
+        label_x, label_y = _point(cx, cy, r * 0.6, middle)
+        body.append(_text(label_x, label_y + 5, f'{100 * value / total:.1f}%', 14))
+        name_x, name_y = _point(cx, cy, r * 1.1, middle)
+        anchor = 'start' if name_x > cx + 1 else 'end' if name_x < cx - 1 else 'middle'
+        body.append(_text(name_x, name_y + 5, label, 13, anchor))
+        start += sweep
+    return _svg(width, height, 'Genel Katılım Oranı', body)
+
+
+def absence_svg(course_name, display_data, max_absence_percentage):
+    """
+    Öğrenci bazında devamsızlık yüzdelerini yatay çubuk grafik olarak çizer.
+    Sınırı aşan öğrenciler kırmızı, diğerleri yeşil gösterilir.
+    """
+    row_height = 24
+    width = 900
+    left, right, top, bottom = 300, 60, 44, 50
+    plot_width = width - left - right
+    plot_height = row_height * len(display_data)
+    height = top + plot_height + bottom
+    scale = plot_width / 100
+    title = f'{course_name} - Devamsızlık Durumu (14 Hafta Üzerinden)'
+
+    body = [_text(width / 2, 26, title, 15)]
+    for tick in range(0, 101, 20):
+        x = left + tick * scale
+        body.append(_line(x, top, x, top + plot_height, GRID_COLOR))
+        body.append(_text(x, top + plot_height + 16, tick, 11))
+
+    for i, student in enumerate(display_data):
+        percentage = student['absence_percentage']
+        y = top + row_height * i
+        color = ABSENT_COLOR if percentage >= max_absence_percentage else PRESENT_COLOR
+        body.append(_rect(left, y + 4, percentage * scale, row_height - 8, color))
+        body.append(_text(left - 6, y + row_height / 2 + 4, f"{student['student_no']} - {student['name']}", 11, 'end'))
+        body.append(_text(left + percentage * scale + 4, y + row_height / 2 + 4, f'{percentage:.1f}%', 10, 'start'))
+
+    limit_x = left + max_absence_percentage * scale
+    body.append(_line(limit_x, top, limit_x, top + plot_height, LIMIT_COLOR, 'stroke-dasharray="6 4" stroke-width="1.5"'))
+    body.append(_line(left, top, left, top + plot_height, AXIS_COLOR))
+    body.append(_line(left, top + plot_height, left + plot_width, top + plot_height, AXIS_COLOR))
+    body.append(_text(left + plot_width / 2, height - 10, 'Devamsızlık Yüzdesi (%)'))
+    body += _legend(left + plot_width - 6, top + 6, [('Maksimum Devamsızlık Sınırı', LIMIT_COLOR, 'dash')])
+    return _svg(width, height, title, body)
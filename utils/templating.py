@@ -0,0 +1,125 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from flask import g
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from utils.conditional import course_data_version
+
+# Şablon önbellekleri.
+# 1) Bayt kodu önbelleği: derlenmiş şablonlar JINJA_BYTECODE_CACHE dizinine yazılır; yeni başlayan
+#    işçiler şablonları yeniden derlemek yerine buradan yükler. Şablon dosyası değişince
+#    (kaynak özeti farklı olduğundan) kendiliğinden yeniden derlenir.
+# 2) Parça önbelleği: {% cache course_id, 'ad', ek anahtarlar... %} ... {% endcache %} bloğunun
+#    çıktısı dersin veri sürümüyle (utils/conditional.py) anahtarlanır. Yoklama, oturum veya öğrenci
+#    listesi değişince sürüm değişir ve blok yeniden çizilir; eski girdiler LRU ile düşer.
+#    Sürüme girmeyen değişiklikler (ör. öğrenci adı düzeltmesi) en geç FRAGMENT_CACHE_TTL sonra görünür.
+# Önbellek süreç içinde tutulur (tek eventlet worker).
+
+
+class FragmentCache:
+    """
+    Boyutu ve yaşı sınırlı, iş parçacığı güvenli LRU parça önbelleği.
+    """
+
+    def __init__(self, max_entries=0, ttl=0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, max_entries, ttl):
+        with self._lock:
+            self.max_entries = max_entries
+            self.ttl = ttl
+            self._entries.clear()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (self.ttl and entry[0] <= time.monotonic()):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+fragment_cache = FragmentCache()
+
+
+def course_version(course_id):
+    """
+    Dersin veri sürümünü istek boyunca bir kez hesaplar; conditional_course_view'ın
+    hesapladığı sürüm varsa onu kullanır.
+    """
+    versions = g.setdefault('course_versions', {})
+    if course_id not in versions:
+        versions[course_id] = course_data_version(course_id)
+    return versions[course_id]
+
+
+class FragmentCacheExtension(Extension):
+    """
+    {% cache %} etiketi. İlk argüman ders numarasıdır; diğerleri (ör. sayfa ve filtreler)
+    aynı dersin farklı görünümlerini ayırır ve repr() ile anahtara eklenir.
+    """
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        call = self.call_method('_render_fragment', [nodes.Const(parser.name), nodes.List(args)])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render_fragment(self, template_name, args, caller):
+        if not fragment_cache.max_entries:
+            return caller()
+        course_id = args[0]
+        key = (template_name, course_id, course_version(course_id), repr(args[1:]))
+        value = fragment_cache.get(key)
+        if value is None:
+            value = caller()
+            fragment_cache.set(key, value)
+        return value
+
+
+def init_templates(app):
+    """
+    Bayt kodu önbelleğini ve {% cache %} etiketini uygulamanın Jinja ortamına ekler.
+    """
+    cache_dir = app.config['JINJA_BYTECODE_CACHE']
+    if cache_dir:
+        # Göreli yol instance klasörüne göre çözülür (site.db gibi)
+        cache_dir = os.path.join(app.instance_path, cache_dir)
+        os.makedirs(cache_dir, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    fragment_cache.configure(app.config['FRAGMENT_CACHE_SIZE'], app.config['FRAGMENT_CACHE_TTL'])
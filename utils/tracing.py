@@ -0,0 +1,360 @@
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from functools import wraps
+from flask import g, request, has_app_context, before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Hafif istek izleme: her istek için iç içe span'ler (SQL, şablon, havuz işleri, soket olayları)
+# toplanır ve OTLP JSON biçiminde dosyaya veya OTLP/HTTP toplayıcısına aktarılır.
+# İzleme kapalıyken ya da istek örneklenmediğinde yalnızca g üzerinde bir kontrol yapılır.
+
+# W3C trace-context başlığı: sürüm-trace id-üst span id-bayraklar
+TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+INVALID_TRACE_ID = '0' * 32
+INVALID_SPAN_ID = '0' * 16
+# OTLP span türleri
+KIND_INTERNAL, KIND_SERVER, KIND_CLIENT, KIND_PRODUCER = 1, 2, 3, 4
+STATUS_ERROR = 2
+SQL_STATEMENT_LENGTH = 500
+
+
+def _new_id(hex_length):
+    return os.urandom(hex_length // 2).hex()
+
+
+def parse_traceparent(header):
+    """
+    traceparent başlığını (trace id, üst span id, örneklendi mi) olarak çözer; geçersizse None döner.
+    """
+    match = TRACEPARENT.match((header or '').strip().lower())
+    if not match or match.group(1) == INVALID_TRACE_ID or match.group(2) == INVALID_SPAN_ID:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+def _attribute(key, value):
+    if isinstance(value, bool):
+        return {'key': key, 'value': {'boolValue': value}}
+    if isinstance(value, int):
+        return {'key': key, 'value': {'intValue': str(value)}}
+    if isinstance(value, float):
+        return {'key': key, 'value': {'doubleValue': value}}
+    return {'key': key, 'value': {'stringValue': str(value)}}
+
+
+class Span:
+    """
+    Tek bir işlem adımı; süreler Unix nanosaniyesi olarak tutulur.
+    """
+    __slots__ = ('name', 'span_id', 'parent_id', 'kind', 'start', 'end', 'attributes', 'error')
+
+    def __init__(self, name, parent_id, kind, attributes):
+        self.name = name
+        self.span_id = _new_id(16)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = attributes
+        self.error = None
+        self.end = None
+        self.start = time.time_ns()
+
+    def set(self, key, value):
+        self.attributes[key] = value
+
+    def to_otlp(self, trace_id):
+        data = {
+            'traceId': trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start),
+            'endTimeUnixNano': str(self.end),
+            'attributes': [_attribute(key, value) for key, value in self.attributes.items()]
+        }
+        if self.parent_id:
+            data['parentSpanId'] = self.parent_id
+        if self.error:
+            data['status'] = {'code': STATUS_ERROR, 'message': self.error}
+        return data
+
+
+class Trace:
+    """
+    Bir isteğin span'leri. Açık span'ler yığında tutulur; yeni span yığının tepesinin altına eklenir.
+    """
+
+    def __init__(self, trace_id, parent_id, sampled, max_spans):
+        self.trace_id = trace_id
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.max_spans = max_spans
+        self.spans = []
+        self.stack = []
+        self.dropped = 0
+
+    def start(self, name, kind=KIND_INTERNAL, attributes=None):
+        parent = self.stack[-1].span_id if self.stack else self.parent_id
+        span = Span(name, parent, kind, attributes or {})
+        self.stack.append(span)
+        return span
+
+    def finish(self, span, error=None):
+        span.end = time.time_ns()
+        if error is not None:
+            span.error = f'{type(error).__name__}: {error}'[:200]
+        if self.stack and self.stack[-1] is span:
+            self.stack.pop()
+        elif span in self.stack:
+            self.stack.remove(span)
+        if len(self.spans) < self.max_spans:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+
+    def traceparent(self, span=None):
+        """
+        Verilen (yoksa en içteki açık) span için traceparent başlık değerini döndürür.
+        """
+        span = span or (self.stack[-1] if self.stack else None)
+        span_id = span.span_id if span else self.parent_id
+        return f"00-{self.trace_id}-{span_id}-{'01' if self.sampled else '00'}"
+
+
+def current_trace():
+    """
+    Etkin isteğin izini döndürür; izleme kapalıysa veya istek örneklenmediyse None döner.
+    """
+    return g.get('trace') if has_app_context() else None
+
+
+@contextmanager
+def span(name, kind=KIND_INTERNAL, **attributes):
+    """
+    Bloğu etkin isteğin izine iç içe bir span olarak ekler; iz yoksa hiçbir şey yapmaz.
+    """
+    trace = current_trace()
+    if trace is None:
+        yield None
+        return
+    current = trace.start(name, kind, attributes)
+    try:
+        yield current
+    except Exception as error:
+        trace.finish(current, error)
+        raise
+    trace.finish(current)
+
+
+def traced(name):
+    """
+    Fonksiyon çağrısını span olarak kaydeden dekoratör.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def otlp_payload(traces, service_name):
+    """
+    İzleri OTLP/HTTP JSON (ExportTraceServiceRequest) gövdesine çevirir.
+    """
+    return {'resourceSpans': [{
+        'resource': {'attributes': [_attribute('service.name', service_name)]},
+        'scopeSpans': [{
+            'scope': {'name': 'yoklama.tracing'},
+            'spans': [span.to_otlp(trace.trace_id) for trace in traces for span in trace.spans]
+        }]
+    }]}
+
+
+class FileExporter:
+    """
+    Her izi dosyaya bir satırlık OTLP JSON olarak ekler (toplayıcının JSON dosya alıcısıyla okunabilir).
+    """
+
+    def __init__(self, path, service_name):
+        self.path = path
+        self.service_name = service_name
+        self._lock = threading.Lock()
+
+    def export(self, trace):
+        line = json.dumps(otlp_payload([trace], self.service_name), separators=(',', ':'))
+        with self._lock, open(self.path, 'a', encoding='utf-8') as output:
+            output.write(line + '\n')
+
+
+class OtlpExporter:
+    """
+    İzleri arka planda toplu olarak OTLP/HTTP JSON adresine gönderir.
+    Kuyruk doluysa veya toplayıcı yanıt vermiyorsa izler atılır; istekler hiçbir zaman beklemez.
+    """
+
+    def __init__(self, endpoint, service_name, max_queue=1000, batch_size=64, interval=2.0):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.interval = interval
+        self.dropped = 0
+        self.failed = 0
+        self._queue = queue.Queue(max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def export(self, trace):
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+        # İş parçacığı gunicorn işçisi fork edildikten sonra ilk izde başlatılır
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='trace-export', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            self._send(batch)
+
+    def _send(self, batch):
+        body = json.dumps(otlp_payload(batch, self.service_name), separators=(',', ':')).encode('utf-8')
+        post = urllib.request.Request(self.endpoint, data=body, headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(post, timeout=5) as response:
+                response.read()
+        except (OSError, ValueError):
+            self.failed += len(batch)
+
+
+def _start_request(app):
+    if request.endpoint == 'static':
+        return
+    config = app.config
+    incoming = parse_traceparent(request.headers.get('traceparent'))
+    if incoming:
+        # Üst servisin örnekleme kararına uyulur
+        trace_id, parent_id, sampled = incoming
+    else:
+        trace_id, parent_id = _new_id(32), None
+        sampled = random.random() < config['TRACE_SAMPLE_RATE']
+    if not sampled and not config['TRACE_SLOW_REQUEST_MS']:
+        return
+
+    trace = Trace(trace_id, parent_id, sampled, config['TRACE_MAX_SPANS'])
+    route = request.url_rule.rule if request.url_rule else request.path
+    trace.start(f'{request.method} {route}', KIND_SERVER, {
+        'http.method': request.method,
+        'http.route': route,
+        'http.target': request.full_path.rstrip('?')
+    })
+    g.trace = trace
+
+
+def _tag_response(response):
+    trace = current_trace()
+    if trace is not None and trace.stack:
+        trace.stack[0].set('http.status_code', response.status_code)
+        if response.status_code >= 500:
+            trace.stack[0].error = f'HTTP {response.status_code}'
+        response.headers['traceresponse'] = trace.traceparent(trace.stack[0])
+    return response
+
+
+def _finish_request(app, error):
+    trace = g.pop('trace', None)
+    if trace is None or not trace.stack:
+        return
+    root = trace.stack[0]
+    # Hata nedeniyle kapanmamış span'ler (ör. yarıda kalan şablon) burada kapatılır
+    while len(trace.stack) > 1:
+        trace.finish(trace.stack[-1], error)
+    if trace.dropped:
+        root.set('trace.dropped_spans', trace.dropped)
+    trace.finish(root, error)
+
+    slow_ms = app.config['TRACE_SLOW_REQUEST_MS']
+    if trace.sampled or (slow_ms and (root.end - root.start) >= slow_ms * 1_000_000):
+        app.extensions['tracing'].export(trace)
+
+
+def _start_render(sender, template, context, **extra):
+    trace = current_trace()
+    if trace is not None:
+        trace.start(f'render {template.name}', attributes={'template.name': template.name})
+
+
+def _finish_render(sender, template, context, **extra):
+    trace = current_trace()
+    if trace is not None and trace.stack and trace.stack[-1].name == f'render {template.name}':
+        trace.finish(trace.stack[-1])
+
+
+def _start_query(conn, cursor, statement, parameters, context, executemany):
+    trace = current_trace()
+    if trace is not None:
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else 'SQL'
+        conn.info.setdefault('trace_spans', []).append(trace.start(f'db {operation}', KIND_CLIENT, {
+            'db.system': conn.dialect.name,
+            'db.statement': statement[:SQL_STATEMENT_LENGTH],
+            'db.executemany': executemany
+        }))
+
+
+def _finish_query(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get('trace_spans')
+    trace = current_trace()
+    if spans and trace is not None:
+        trace.finish(spans.pop())
+
+
+def _query_error(exception_context):
+    conn = exception_context.connection
+    spans = conn.info.get('trace_spans') if conn is not None else None
+    trace = current_trace()
+    if spans and trace is not None:
+        trace.finish(spans.pop(), exception_context.original_exception)
+
+
+def init_tracing(app):
+    """
+    TRACE_EXPORT tanımlıysa istek, SQL ve şablon izlemeyi etkinleştirir.
+    Adres http(s) ile başlıyorsa OTLP/HTTP toplayıcısına, aksi halde dosyaya aktarılır.
+    """
+    target = app.config['TRACE_EXPORT']
+    if not target:
+        return
+    service_name = app.config['TRACE_SERVICE_NAME']
+    if target.startswith(('http://', 'https://')):
+        app.extensions['tracing'] = OtlpExporter(target, service_name)
+    else:
+        app.extensions['tracing'] = FileExporter(target, service_name)
+
+    # Uygulama düzeyindeki ilk before_request olmalı; create_app'te blueprintlerden önce çağrılır
+    app.before_request(lambda: _start_request(app))
+    app.after_request(_tag_response)
+    app.teardown_request(lambda error: _finish_request(app, error))
+    before_render_template.connect(_start_render, app)
+    template_rendered.connect(_finish_render, app)
+    if not event.contains(Engine, 'before_cursor_execute', _start_query):
+        event.listen(Engine, 'before_cursor_execute', _start_query)
+        event.listen(Engine, 'after_cursor_execute', _finish_query)
+        event.listen(Engine, 'handle_error', _query_error)